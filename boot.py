@@ -6,19 +6,18 @@ This file runs before code.py and configures the USB device settings.
 import storage
 import usb_cdc
 import usb_hid
-import board
-import digitalio
 import time
 
+boot_start = time.monotonic_ns()
+
 # Custom USB device information
 USB_VID = 0x239A  # Adafruit's VID
 USB_PID = 0x8101  # A unique PID (modified from CircuitPython defaults)
 USB_DEVICE_NAME = "StrataBox Controller"
 USB_MANUFACTURER = "Custom Helldivers Hardware"
 
-# Set up LED for boot sequence
-led = digitalio.DigitalInOut(board.LED)
-led.direction = digitalio.Direction.OUTPUT
+# Keyboard report format: "6kro" (boot keyboard) or "nkro" (bitmap)
+from stratabox.config import HID_MODE, FAST_BOOT
 
 # Define custom HID keyboard device with our descriptors
 # This makes the device show up with our custom name in device manager
@@ -55,58 +54,106 @@ keyboard_descriptor = usb_hid.Device(
     out_report_lengths=(0,),   # No output report
 )
 
-# Override default HID devices with our custom one
-usb_hid.enable(
-    (keyboard_descriptor,),
-    boot_device=1
+# N-key rollover keyboard: one bit per key instead of six key slots, so
+# any number of buttons can be held and every change is a single bit flip.
+# Report: byte 0 modifier bits, bytes 1-13 one bit per usage 0x00-0x67.
+# Boot protocol needs the 8-byte report above, so this mode is not
+# available in BIOS/UEFI menus.
+nkro_keyboard_descriptor = usb_hid.Device(
+    report_descriptor=bytes((
+        0x05, 0x01,  # Usage Page (Generic Desktop)
+        0x09, 0x06,  # Usage (Keyboard)
+        0xA1, 0x01,  # Collection (Application)
+        0x05, 0x07,  # Usage Page (Key Codes)
+        0x19, 0xE0,  # Usage Minimum (224)
+        0x29, 0xE7,  # Usage Maximum (231)
+        0x15, 0x00,  # Logical Minimum (0)
+        0x25, 0x01,  # Logical Maximum (1)
+        0x75, 0x01,  # Report Size (1)
+        0x95, 0x08,  # Report Count (8)
+        0x81, 0x02,  # Input (Data, Variable, Absolute)
+        0x19, 0x00,  # Usage Minimum (0)
+        0x29, 0x67,  # Usage Maximum (103)
+        0x95, 0x68,  # Report Count (104)
+        0x81, 0x02,  # Input (Data, Variable, Absolute)
+        0xC0,        # End Collection
+    )),
+    usage_page=0x01,           # Generic Desktop
+    usage=0x06,                # Keyboard
+    report_ids=(0,),           # Report ID (0 = no report ID)
+    in_report_lengths=(14,),   # 1 modifier byte + 13 bitmap bytes
+    out_report_lengths=(0,),   # No output report
 )
 
+# Override default HID devices with our custom one
+hid_enabled = False
+if HID_MODE == "nkro":
+    try:
+        usb_hid.enable((nkro_keyboard_descriptor,), boot_device=0)
+        hid_enabled = True
+    except (ValueError, RuntimeError) as e:
+        print(f"NKRO keyboard not available ({e}), using boot keyboard")
+        HID_MODE = "6kro"
+if not hid_enabled:
+    usb_hid.enable(
+        (keyboard_descriptor,),
+        boot_device=1
+    )
+
 # Override device info
-storage.remount("/", readonly=False)
-with open("/boot_out.txt", "w") as f:
-    f.write(f"StrataBox Controller v1.0\n")
-    f.write(f"=======================\n")
-    f.write(f"Welcome to your custom Helldivers 2 controller!\n")
-    f.write(f"- Press P button to open stratagem menu\n")
-    f.write(f"- Use directional buttons to input stratagems manually\n")
-    f.write(f"- Enjoy the tactile arcade button experience\n")
-    f.write(f"=======================\n")
-    f.write(f"For help, see the README on the CIRCUITPY drive\n")
+BOOT_OUT_TEXT = (
+    "StrataBox Controller v1.0\n"
+    "=======================\n"
+    "Welcome to your custom Helldivers 2 controller!\n"
+    "- Press P button to open stratagem menu\n"
+    "- Use directional buttons to input stratagems manually\n"
+    "- Enjoy the tactile arcade button experience\n"
+    "=======================\n"
+    "For help, see the README on the CIRCUITPY drive\n"
+)
+
+def write_if_changed(path, text):
+    """
+    Write a file only when its contents differ, so a normal boot does not
+    remount the filesystem or write to flash.
+    """
+    try:
+        with open(path) as f:
+            if f.read() == text:
+                return False
+    except OSError:
+        pass
+    try:
+        storage.remount("/", readonly=False)
+        with open(path, "w") as f:
+            f.write(text)
+        # Give write access back to the computer
+        storage.remount("/", readonly=True)
+    except (OSError, RuntimeError) as e:
+        print(f"Could not update {path}: {e}")
+        return False
+    return True
+
+write_if_changed("/boot_out.txt", BOOT_OUT_TEXT)
 
 # Auto-test sequence
-# Perform a distinctive boot pattern to show the device is working
-def startup_sequence():
-    # Short-long-short pattern
-    # Short blinks
-    for _ in range(3):
-        led.value = True
-        time.sleep(0.1)
-        led.value = False
-        time.sleep(0.1)
-    
-    # Medium pause
-    time.sleep(0.3)
-    
-    # Long blink
-    led.value = True
-    time.sleep(0.5)
-    led.value = False
-    time.sleep(0.2)
-    
-    # Short blinks
-    for _ in range(3):
-        led.value = True
-        time.sleep(0.1)
-        led.value = False
-        time.sleep(0.1)
+# Perform a distinctive boot pattern to show the device is working.
+# Nothing is scanned yet, so boot.py waits for the pattern to finish;
+# with FAST_BOOT, code.py plays the same pattern while scanning instead
+if not FAST_BOOT:
+    from stratabox.output.led import LedDriver, STARTUP_PATTERN
 
-# Run startup test sequence
-startup_sequence()
+    led = LedDriver()
+    led.play(STARTUP_PATTERN)
+    led.wait()
+    led.deinit()
 
 # Enable serial console for diagnostics and for Pi Debug Probe use
 usb_cdc.enable(console=True, data=True)
 print(f"StrataBox Controller v1.0 initialized")
 print(f"USB Device Name: {USB_DEVICE_NAME}")
 print(f"Manufacturer: {USB_MANUFACTURER}")
+print(f"Keyboard mode: {HID_MODE}")
+print(f"boot.py finished in {(time.monotonic_ns() - boot_start) // 1000000} ms")
 print(f"Diagnostic port ready for Raspberry Pi Debug Probe")
 print(f"Press any button to test input functionality") 
\ No newline at end of file
@@ -2,78 +2,122 @@
 StrataBox Button Test Utility
 Use this script to test if your buttons are correctly wired before using
 the main keyboard emulation program.
+
+Hold MENU while the script starts to calibrate the debounce windows
+first: press every button repeatedly until the LED goes off, and the
+shortest safe window for each switch is saved to debounce_calibration.py.
+Buttons on a key matrix or shift register chain are tested through the
+scanner instead, without calibration.
 """
 
 import time
-import board
-import digitalio
+import supervisor
+from stratabox.input.buttons import ButtonTable, MENU
+from stratabox.output.led import LedDriver, blink_code, FLASH_PATTERN
+# Settings from config.py, with defaults for anything it leaves out
+from stratabox.config import (
+    PIN_CONFIG, KEY_CONFIG, KEY_NUMBERS, INPUT_BACKEND, INPUT_WIRING, LED_ENABLED, PRINT_DEBUG,
+    CALIBRATION_TIME,
+)
 
-# Try to import config, use defaults if not available
-try:
-    import config
-    PIN_CONFIG = config.PIN_CONFIG
-    LED_ENABLED = config.LED_ENABLED
-    PRINT_DEBUG = config.PRINT_DEBUG
-except ImportError:
-    # Default configuration if config.py is not found
-    PIN_CONFIG = {
-        "MENU_BTN_PIN": board.GP15,
-        "UP_BTN_PIN": board.GP16,
-        "DOWN_BTN_PIN": board.GP17,
-        "LEFT_BTN_PIN": board.GP18,
-        "RIGHT_BTN_PIN": board.GP19,
-    }
-    LED_ENABLED = True
-    PRINT_DEBUG = True
-    
-    if PRINT_DEBUG:
-        print("No config.py found, using default settings")
-
-# Initialize button objects with pull-up resistors
-menu_btn = digitalio.DigitalInOut(PIN_CONFIG["MENU_BTN_PIN"])
-menu_btn.direction = digitalio.Direction.INPUT
-menu_btn.pull = digitalio.Pull.UP
-
-up_btn = digitalio.DigitalInOut(PIN_CONFIG["UP_BTN_PIN"])
-up_btn.direction = digitalio.Direction.INPUT
-up_btn.pull = digitalio.Pull.UP
-
-down_btn = digitalio.DigitalInOut(PIN_CONFIG["DOWN_BTN_PIN"])
-down_btn.direction = digitalio.Direction.INPUT
-down_btn.pull = digitalio.Pull.UP
-
-left_btn = digitalio.DigitalInOut(PIN_CONFIG["LEFT_BTN_PIN"])
-left_btn.direction = digitalio.Direction.INPUT
-left_btn.pull = digitalio.Pull.UP
-
-right_btn = digitalio.DigitalInOut(PIN_CONFIG["RIGHT_BTN_PIN"])
-right_btn.direction = digitalio.Direction.INPUT
-right_btn.pull = digitalio.Pull.UP
-
-# Setup LED for visual feedback
-led = digitalio.DigitalInOut(board.LED)
-led.direction = digitalio.Direction.OUTPUT
-
-# Helper function for LED control
-def set_led(value):
-    if LED_ENABLED:
-        led.value = value
-
-# Create a list of buttons with their names
-buttons = [
-    {"button": menu_btn, "name": "MENU (P key)", "state": True},
-    {"button": up_btn, "name": "UP ARROW", "state": True},
-    {"button": down_btn, "name": "DOWN ARROW", "state": True},
-    {"button": left_btn, "name": "LEFT ARROW", "state": True},
-    {"button": right_btn, "name": "RIGHT ARROW", "state": True},
-]
+# Initialize button inputs with pull-up resistors, indexed by button number
+buttons = ButtonTable(PIN_CONFIG, KEY_CONFIG, KEY_NUMBERS)
+if INPUT_BACKEND in ("matrix", "shift"):
+    # No pin per button to read; the scanner reports the changes instead
+    from stratabox.input.scanner import make_scanner
+
+    scanner = make_scanner(buttons, INPUT_BACKEND, wiring=INPUT_WIRING)
+    inputs = None
+else:
+    scanner = None
+    inputs = buttons.make_inputs()
+
+# LED for visual feedback; patterns play while the buttons are read
+led = LedDriver(enabled=LED_ENABLED)
+
+# Last state of each button (pulled up, so 1 means not pressed)
+states = bytearray([1] * buttons.count)
 
 # Blink LED 3 times to show program has started
-for _ in range(3):
-    set_led(True)
-    time.sleep(0.2)
-    set_led(False)
-    time.sleep(0.2)
+led.play(blink_code(3, 200, 200))
+
+
+def calibrate(duration=CALIBRATION_TIME):
+    """
+    Record the raw edges of every button for `duration` seconds, print the
+    bounce time distribution of each switch and save the suggested
+    debounce windows to debounce_calibration.py.
+    """
+    from stratabox.input.calibration import (
+        EdgeRecorder, percentile, safe_window_ms, format_calibration,
+    )
+
+    # MENU was held to start the calibration; don't record its release
+    while not inputs[MENU].value:
+        time.sleep(0.01)
+    led.stop()
+    print("\n=== Debounce calibration ===")
+    print(f"Press every button many times (at least 5 each) for {duration} seconds.")
+    print("The LED stays on while recording.")
+    recorder = EdgeRecorder(inputs)
+    led.hold(True)
+    recorder.capture(duration)
+    led.hold(False)
+
+    rate = recorder.sample_rate()
+    print(f"{recorder.count} edges recorded at {rate} samples/s")
+    if recorder.overflowed:
+        print("Edge buffer filled up; later edges were not recorded")
+    windows = []
+    for index, name in enumerate(buttons.names):
+        bursts = recorder.bursts(index)
+        bounces = sorted(bounce for _, bounce, _ in bursts)
+        edges = sum(count for _, _, count in bursts)
+        window = safe_window_ms(bursts)
+        print(f"{buttons.labels[index]}: {len(bursts)} presses/releases, {edges} edges")
+        if bursts:
+            print(
+                f"  bounce p50/p95/max: {percentile(bounces, 0.5)}/"
+                f"{percentile(bounces, 0.95)}/{bounces[-1]} us"
+            )
+        if window is None:
+            print("  not enough presses to suggest a window")
+        else:
+            print(f"  suggested window: {window} ms")
+            windows.append((name, window))
+    if not windows:
+        return
+    text = format_calibration(windows)
+    try:
+        with open("/debounce_calibration.py", "w") as f:
+            f.write(text)
+        print("Saved to /debounce_calibration.py")
+    except OSError:
+        # CIRCUITPY is read-only to scripts while the computer can write it
+        print("Could not write to CIRCUITPY; save this as debounce_calibration.py:\n")
+        print(text)
+
+
+def button_pressed(index):
+    """Report a press and start an LED flash."""
+    if PRINT_DEBUG:
+        print(f"Button pressed: {buttons.labels[index]}")
+    led.play(FLASH_PATTERN)
+
+
+def watch_scanner():
+    """Report presses from the matrix or shift register scanner until Ctrl+C."""
+    while True:
+        event = scanner.next_event()
+        if event and event.pressed:
+            button_pressed(event.key_number)
+        elif not event:
+            led.tick(supervisor.ticks_ms())
+            time.sleep(0.01)
+
+
+if inputs is not None and not inputs[MENU].value:
+    calibrate()
 
 if PRINT_DEBUG:
     print("\n=== StrataBox Button Test Utility ===")
@@ -81,33 +125,25 @@ if PRINT_DEBUG:
     print("Press Ctrl+C to exit\n")
 
 try:
+    if scanner is not None:
+        watch_scanner()
     while True:
-        button_pressed = False
-        
         # Check each button
-        for btn_data in buttons:
+        for index in range(buttons.count):
             # Buttons are pulled up, so they read True when not pressed
             # and False when pressed
-            current_state = btn_data["button"].value
+            current_state = inputs[index].value
             
             # If button state changed from not pressed to pressed
-            if current_state == False and btn_data["state"] == True:
-                if PRINT_DEBUG:
-                    print(f"Button pressed: {btn_data['name']}")
-                
+            if not current_state and states[index]:
                 # Flash LED when button is pressed
-                set_led(True)
-                time.sleep(0.1)
-                set_led(False)
-                
-                button_pressed = True
+                button_pressed(index)
                 
             # Update button state
-            btn_data["state"] = current_state
+            states[index] = current_state
         
-        # If no button was pressed, keep the LED off
-        if not button_pressed:
-            set_led(False)
+        # Advance the LED pattern without holding up the next read
+        led.tick(supervisor.ticks_ms())
         
         # Small delay to avoid excessive CPU usage
         time.sleep(0.01)
@@ -117,8 +153,5 @@ except KeyboardInterrupt:
         print("\nTest finished.")
     
     # Final LED blink to indicate program end
-    for _ in range(5):
-        set_led(True)
-        time.sleep(0.1)
-        set_led(False)
-        time.sleep(0.1) 
\ No newline at end of file
+    led.play(blink_code(5))
+    led.wait() 
\ No newline at end of file
@@ -4,167 +4,465 @@ Circuit Python code for a Raspberry Pi Pico that emulates a USB keyboard
 for controlling Helldivers with arcade buttons.
 """
 
+import gc
 import time
-import board
-import digitalio
+
+# Startup phases are timed from here, see BootTimer
+code_start_ns = time.monotonic_ns()
+code_start_free = gc.mem_free()
+
+import asyncio
 import usb_hid
-from adafruit_hid.keyboard import Keyboard
-from adafruit_hid.keycode import Keycode
-
-# Try to import config, use defaults if not available
-try:
-    import config
-    PIN_CONFIG = config.PIN_CONFIG
-    KEY_CONFIG = config.KEY_CONFIG
-    DEBOUNCE_TIME = config.DEBOUNCE_TIME
-    LED_ENABLED = config.LED_ENABLED
-    PRINT_DEBUG = config.PRINT_DEBUG
-except ImportError:
-    # Default configuration if config.py is not found
-    PIN_CONFIG = {
-        "MENU_BTN_PIN": board.GP15,
-        "UP_BTN_PIN": board.GP16,
-        "DOWN_BTN_PIN": board.GP17,
-        "LEFT_BTN_PIN": board.GP18,
-        "RIGHT_BTN_PIN": board.GP19,
-    }
-    KEY_CONFIG = {
-        "MENU_KEY": Keycode.P,
-        "UP_KEY": Keycode.UP_ARROW,
-        "DOWN_KEY": Keycode.DOWN_ARROW,
-        "LEFT_KEY": Keycode.LEFT_ARROW,
-        "RIGHT_KEY": Keycode.RIGHT_ARROW,
-    }
-    DEBOUNCE_TIME = 0.05
-    LED_ENABLED = True
-    PRINT_DEBUG = True
-    
-    if PRINT_DEBUG:
-        print("No config.py found, using default settings")
-
-# Initialize keyboard
-kbd = Keyboard(usb_hid.devices)
-
-# Initialize button objects with pull-up resistors
-menu_btn = digitalio.DigitalInOut(PIN_CONFIG["MENU_BTN_PIN"])
-menu_btn.direction = digitalio.Direction.INPUT
-menu_btn.pull = digitalio.Pull.UP
-
-up_btn = digitalio.DigitalInOut(PIN_CONFIG["UP_BTN_PIN"])
-up_btn.direction = digitalio.Direction.INPUT
-up_btn.pull = digitalio.Pull.UP
-
-down_btn = digitalio.DigitalInOut(PIN_CONFIG["DOWN_BTN_PIN"])
-down_btn.direction = digitalio.Direction.INPUT
-down_btn.pull = digitalio.Pull.UP
-
-left_btn = digitalio.DigitalInOut(PIN_CONFIG["LEFT_BTN_PIN"])
-left_btn.direction = digitalio.Direction.INPUT
-left_btn.pull = digitalio.Pull.UP
-
-right_btn = digitalio.DigitalInOut(PIN_CONFIG["RIGHT_BTN_PIN"])
-right_btn.direction = digitalio.Direction.INPUT
-right_btn.pull = digitalio.Pull.UP
-
-# Create a list of buttons and their corresponding keycodes
-buttons = [
-    {"button": menu_btn, "keycode": KEY_CONFIG["MENU_KEY"], "state": True, "last_press_time": 0},
-    {"button": up_btn, "keycode": KEY_CONFIG["UP_KEY"], "state": True, "last_press_time": 0},
-    {"button": down_btn, "keycode": KEY_CONFIG["DOWN_KEY"], "state": True, "last_press_time": 0},
-    {"button": left_btn, "keycode": KEY_CONFIG["LEFT_KEY"], "state": True, "last_press_time": 0},
-    {"button": right_btn, "keycode": KEY_CONFIG["RIGHT_KEY"], "state": True, "last_press_time": 0},
-]
-
-# LED pin for status indicator
-led = digitalio.DigitalInOut(board.LED)
-led.direction = digitalio.Direction.OUTPUT
-
-# Helper function for LED control
-def set_led(value):
-    if LED_ENABLED:
-        led.value = value
-
-# Blink the LED to show the device is ready
-for _ in range(3):
-    set_led(True)
-    time.sleep(0.1)
-    set_led(False)
-    time.sleep(0.1)
+import usb_cdc
+import supervisor
+import microcontroller
+# Settings from config.py, with defaults for anything it leaves out
+from stratabox.config import (
+    PIN_CONFIG, KEY_CONFIG, DEBOUNCE_TIME, DEBOUNCE_MODE, DEBOUNCE_CONFIG, LED_ENABLED,
+    PRINT_DEBUG, SCAN_INTERVAL, LOOP_INTERVAL, LOG_CAPACITY, HID_MODE, FAST_BOOT,
+    BOOT_BUDGET_MS, BOOT_SAMPLE_MS, KEY_PROFILES, DEBOUNCE_WINDOWS, INPUT_BACKEND,
+    GESTURES, TAP_TIMEOUT, COMBO_WINDOW, REPORT_INTERVAL, ACTIVE_TIME, IDLE_LOOP_INTERVAL,
+    SLEEP_AFTER, INPUT_WIRING, KEY_NUMBERS, GC_MODE, GC_IDLE_MS, GC_MIN_ALLOC,
+    USAGE_FLUSH_INTERVAL, USAGE_FLUSH_PRESSES,
+)
+from stratabox.input.buttons import ButtonTable, MENU, UP
+from stratabox.input.scanner import make_scanner, ticks_diff
+from stratabox.input.debounce import build_debouncer
+from stratabox.output.keystate import KeyState
+from stratabox.output.hid_report import make_keyboard, check_keyboard
+from stratabox.output.led import LedDriver, STARTUP_PATTERN, READY_PATTERN
+from stratabox.keymap import Keymap, build_profiles, PROFILE_PRACTICE
+from stratabox.runtime import RingQueue, play_sequences
+from stratabox.power import ScanPacer, sleep_until_press, MODE_ACTIVE, MODE_SLEEP
+from stratabox.memory import GcScheduler
+from stratabox.diagnostics.latency import (
+    stats, BootTimer, BOOT_IMPORTS, BOOT_HID, BOOT_SCANNER, BOOT_MODES, BOOT_FIRST_SCAN, BOOT_USB,
+)
+from stratabox.diagnostics.ringlog import (
+    RingLog, LOG_BOOT, LOG_BOOT_TIME, LOG_PRESS, LOG_RELEASE, LOG_MACRO, LOG_QUEUE_LOST,
+    LOG_SCAN_GAP, LOG_COMMAND, LOG_KEYMAP, LOG_SLEEP, LOG_GC, LOG_USAGE,
+)
+from stratabox.diagnostics.usage import UsageCounters
+
+boot_timer = BootTimer(code_start_ns, code_start_free)
+boot_timer.mark(BOOT_IMPORTS)
+
+# Initialize keyboard reports and the held-key state that drives them
+key_state = KeyState(make_keyboard(usb_hid.devices, HID_MODE))
+key_state.live = False  # until hid_task sees the host connected
+keyboard_checked = HID_MODE != "nkro"  # NKRO is confirmed once USB is up
+boot_timer.mark(BOOT_HID)
+
+# Debug log records are buffered in RAM and drained to the usb_cdc data
+# port when idle, so logging never blocks the scan loop
+data_port = usb_cdc.data
+if data_port is not None:
+    data_port.write_timeout = 0
+log = RingLog(LOG_CAPACITY, data_port)
+LOG_IDLE_MS = 20  # Quiet time after the last button event before draining
+
+# Pins and keycodes of each button, indexed by button number
+buttons = ButtonTable(PIN_CONFIG, KEY_CONFIG, KEY_NUMBERS)
+# Keycode of each button in the active profile; profiles can be switched
+# and keys remapped at runtime over the data port
+keymap = Keymap(*build_profiles(buttons.keycodes, KEY_PROFILES, buttons.names))
+# Keycode each held button pressed, so a remap never strands a held key
+pressed_keycodes = bytearray(buttons.count)
+# Lifetime press counts and usage, saved to nvm in idle time
+usage = UsageCounters(
+    microcontroller.nvm, buttons.count, int(USAGE_FLUSH_INTERVAL * 1000), USAGE_FLUSH_PRESSES
+)
+usage.booted()
+
+# Start background scanning of the buttons; key numbers are button numbers
+scanner = make_scanner(buttons, INPUT_BACKEND, SCAN_INTERVAL, INPUT_WIRING)
+# Debounced state of each button lives in debouncer.out
+debouncer = build_debouncer(
+    buttons.names, DEBOUNCE_MODE, DEBOUNCE_TIME, DEBOUNCE_CONFIG, DEBOUNCE_WINDOWS
+)
+boot_timer.mark(BOOT_SCANNER)
+
+# Status LED, lit while a button is held; patterns are played by led_task
+led = LedDriver(enabled=LED_ENABLED)
 
 if PRINT_DEBUG:
     print("StrataBox initialized and ready")
+    print(f"Input backend: {scanner.name}")
     print("This is the simplified version - for the true Helldivers experience!")
     print("Each button sends exactly one keystroke to the computer:")
     print("- Menu Button: P (opens stratagem menu)")
     print("- Four direction buttons: Arrow keys (for manual stratagem input)")
 
-# Wait for stable button reading
-time.sleep(0.5)  # Increased delay for stability
-
 # Boot mode detection
-sos_mode = not up_btn.value  # SOS mode if UP held at boot
-default_menu_key = Keycode.P
-practice_mode = not menu_btn.value  # Practice mode if MENU held at boot
+# Buttons held since power-up are reported as press events by the first
+# scans; sample until a couple of scans have passed without a change
+held_at_boot = scanner.sample_held(int(SCAN_INTERVAL * 2000) + 1, BOOT_SAMPLE_MS)
+sos_mode = bool(held_at_boot & (1 << UP))  # SOS mode if UP held at boot
+practice_mode = bool(held_at_boot & (1 << MENU))  # Practice mode if MENU held at boot
+gestures = None  # matches the GESTURES while SOS mode is on
+macro_queue = RingQueue(4)  # key sequences waiting to be played
+
+
+def set_sos_mode(enabled):
+    """Turn SOS mode on or off; the gestures are only compiled when first needed."""
+    global gestures
+    if not enabled:
+        gestures = None
+    elif gestures is None:
+        from stratabox.gestures import build_matcher
+        gestures = build_matcher(buttons.names, GESTURES, macro_queue, TAP_TIMEOUT, COMBO_WINDOW)
+
+
+set_sos_mode(sos_mode)
 if practice_mode:
-    menu_key = Keycode.R
-else:
-    menu_key = default_menu_key
+    keymap.select(PROFILE_PRACTICE)
 
+log.log(LOG_BOOT, 0, supervisor.ticks_ms(), (1 if sos_mode else 0) | (2 if practice_mode else 0))
 if PRINT_DEBUG:
     if sos_mode:
         print("SOS Mode activated - Emergency sequence available!")
     if practice_mode:
         print("Practice Mode activated - Menu button sends 'R' instead of 'P'")
+boot_timer.mark(BOOT_MODES)
+
+# LED pattern played once the firmware is running. With FAST_BOOT this is
+# boot.py's short-long-short startup pattern, which no longer blocks the boot.
+led.play(STARTUP_PATTERN if FAST_BOOT else READY_PATTERN)
+
+# Signals and queues joining the tasks
+hid_pending = asyncio.Event()   # key_state has changes to report
+led_pending = asyncio.Event()   # held buttons changed
+last_activity = supervisor.ticks_ms()  # ms ticks of the last button event
+# Full scan rate after activity, slower while idle, light sleep after SLEEP_AFTER
+pacer = ScanPacer(LOOP_INTERVAL, IDLE_LOOP_INTERVAL, int(ACTIVE_TIME * 1000), int(SLEEP_AFTER * 1000))
+if scanner.name in ("matrix", "shift") or None in buttons.pins:
+    pacer.sleep_ms = 0  # waking needs a pin per button
+# Garbage is collected in quiet time after input rather than mid-press
+gc_scheduler = GcScheduler(stats, GC_MODE, GC_IDLE_MS, GC_MIN_ALLOC)
+SCAN_GAP_BUDGET_US = 2000       # Worst scan gap we expect, reported when exceeded
+
+
+def button_changed(index, pressed, timestamp):
+    """Apply a debounced press or release of a button to the key state."""
+    stats.detected()
+    led_pending.set()
+    if not pressed:
+        keycode = pressed_keycodes[index]
+        log.log(LOG_RELEASE, index, timestamp, keycode)
+        key_state.key_up(keycode)
+        if gestures is not None:
+            gestures.release(index, timestamp)
+        return
+    keycode = keymap.active[index]
+    pressed_keycodes[index] = keycode
+    log.log(LOG_PRESS, index, timestamp, keycode)
+    key_state.key_down(keycode)
+    usage.pressed(index)
+    # In SOS mode gestures (three MENU taps by default) queue a key sequence
+    if gestures is not None:
+        gesture = gestures.press(index, timestamp)
+        if gesture >= 0:
+            usage.gesture()
+            log.log(LOG_MACRO, index, timestamp, len(gestures.actions[gesture]))
+
+
+def handle_events():
+    """
+    Debounce every event queued by the background scanner and apply the
+    result to the key state.
+    Never waits on output: reports, LED changes and macros are handed off
+    to their own tasks.
+    """
+    global last_activity
+    event = scanner.next_event()
+    while event:
+        index = event.key_number
+        last_activity = event.timestamp
+        if event.pressed:
+            stats.woke(pacer.mode, ticks_diff(supervisor.ticks_ms(), event.timestamp) * 1000)
+        if debouncer.edge(index, event.pressed, event.timestamp):
+            button_changed(index, debouncer.out[index], event.timestamp)
+        event = scanner.next_event()
+    # Buttons whose debounce window ran out since the last scan
+    now = supervisor.ticks_ms()
+    changed = debouncer.poll(now)
+    index = 0
+    while changed:
+        if changed & 1:
+            button_changed(index, debouncer.out[index], now)
+        changed >>= 1
+        index += 1
+    # Long presses fire while the button is still held
+    if gestures is not None:
+        gesture = gestures.poll(now)
+        if gesture >= 0:
+            usage.gesture()
+            log.log(LOG_MACRO, gestures.buttons[gesture], now, len(gestures.actions[gesture]))
+    if key_state.dirty:
+        hid_pending.set()
+
+
+def input_settled():
+    """True when no key is held or waiting to be reported."""
+    return (
+        not any(debouncer.out)
+        and not debouncer.pending
+        and not key_state.dirty
+        and not len(macro_queue)
+    )
+
+
+def idle_sleep():
+    """
+    Light sleep until a button is pressed, then restart scanning. The
+    press that woke the controller is reported straight away, and is
+    delivered even if the button was released before scanning restarted.
+    """
+    global scanner, last_activity
+    slept_at = supervisor.ticks_ms()
+    scanner.deinit()
+    try:
+        woken, woke_ns = sleep_until_press(buttons.pins)
+    except ImportError:
+        woken = -1
+        pacer.sleep_ms = 0
+        if PRINT_DEBUG:
+            print("Light sleep not available, scanning slowly while idle")
+    now = supervisor.ticks_ms()
+    last_activity = now
+    if woken >= 0:
+        log.log(LOG_SLEEP, woken, now, ticks_diff(now, slept_at))
+        if debouncer.edge(woken, True, now):
+            button_changed(woken, True, now)
+            try:
+                if key_state.live and key_state.flush():
+                    stats.reported()
+            except OSError:
+                pass  # left pending for the HID task
+        stats.woke(MODE_SLEEP, (time.monotonic_ns() - woke_ns) // 1000)
+    scanner = make_scanner(buttons, INPUT_BACKEND, SCAN_INTERVAL, INPUT_WIRING)
+    # Buttons held now show up as presses in the first scans
+    held = scanner.sample_held(int(SCAN_INTERVAL * 2000) + 1, BOOT_SAMPLE_MS)
+    now = supervisor.ticks_ms()
+    if woken >= 0 and not held & (1 << woken):
+        if debouncer.out[woken]:
+            if debouncer.edge(woken, False, now):
+                button_changed(woken, False, now)
+        else:
+            # Too short for the debouncer: report the press and the release
+            button_changed(woken, True, now)
+            button_changed(woken, False, now)
+    index = 0
+    while held:
+        if held & 1 and debouncer.edge(index, True, now):
+            button_changed(index, debouncer.out[index], now)
+        held >>= 1
+        index += 1
+    if key_state.dirty:
+        hid_pending.set()
+
+
+async def scan_task():
+    """Drain scanner events, at full rate while buttons are in use."""
+    first_scan_us = boot_timer.mark(BOOT_FIRST_SCAN)
+    log.log(LOG_BOOT_TIME, 0, supervisor.ticks_ms(), first_scan_us)
+    if PRINT_DEBUG and first_scan_us > BOOT_BUDGET_MS * 1000:
+        print(f"Boot took {first_scan_us // 1000} ms (budget {BOOT_BUDGET_MS} ms)")
+    stats.start()
+    while True:
+        if pacer.mode == MODE_ACTIVE:
+            stats.scan_tick()
+        else:
+            # Slow idle loops are not scan gaps
+            stats.start()
+        if scanner.check_overflow():
+            log.log(LOG_QUEUE_LOST, 0, supervisor.ticks_ms())
+        handle_events()
+        interval = pacer.interval(ticks_diff(supervisor.ticks_ms(), last_activity))
+        if pacer.mode == MODE_SLEEP and input_settled():
+            idle_sleep()
+            interval = pacer.interval(0)
+            stats.start()
+        await asyncio.sleep(interval)
+
+
+async def hid_task():
+    """Send one report whenever the set of held keys changes."""
+    global keyboard_checked
+    while True:
+        # Scanning runs while the host is still enumerating the keyboard
+        while not supervisor.runtime.usb_connected:
+            key_state.live = False
+            await asyncio.sleep(0.01)
+        if not boot_timer.phase_us[BOOT_USB]:
+            boot_timer.mark(BOOT_USB)
+        try:
+            if not keyboard_checked:
+                # Falls back to 6KRO if boot.py could not enable NKRO
+                key_state.replace_writer(check_keyboard(key_state.writer, usb_hid.devices))
+                keyboard_checked = True
+            key_state.live = True
+            await hid_pending.wait()
+            hid_pending.clear()
+            if key_state.flush():
+                stats.reported()
+        except OSError:
+            # USB went away or the host stopped polling; the changes stay
+            # pending and are sent again
+            stats.send_failed()
+            hid_pending.set()
+            await asyncio.sleep(0.01)
+
+
+async def led_task():
+    """Mirror the held buttons on the LED, and play patterns over them."""
+    while True:
+        led.hold(any(debouncer.out))
+        next_ms = led.tick(supervisor.ticks_ms())
+        if next_ms < 0:
+            await led_pending.wait()
+            led_pending.clear()
+        else:
+            await asyncio.sleep(next_ms / 1000)
+
+
+async def stats_task():
+    """Close a stats interval every 10 s and report its worst scan gap."""
+    while True:
+        await asyncio.sleep(10)
+        gap_us = stats.end_interval()
+        log.log(LOG_SCAN_GAP, 0, supervisor.ticks_ms(), gap_us)
+        if PRINT_DEBUG and gap_us > SCAN_GAP_BUDGET_US:
+            print(f"Max scan gap: {gap_us} us (budget {SCAN_GAP_BUDGET_US} us)")
+
+
+# Data port requests are parsed by stratabox.commands, loaded on first use
+protocol = None
+command_reader = None
+# Text answers (stats, diagnostics report) streamed to the data port a
+# chunk at a time by the log task, one after the other in request order
+streams = []
+MAX_STREAMS = 2                 # the one being sent and one waiting
+
+
+def queue_stream(stream):
+    """Queue a text answer for the log task to send; dropped if the queue is full."""
+    if len(streams) < MAX_STREAMS:
+        streams.append(stream)
+
+
+def start_report():
+    """Queue the diagnostics report; it is sent from the log task."""
+    from stratabox.diagnostics.report import ReportStream, report_records
+
+    firmware = {
+        "hid_mode": HID_MODE,
+        "input_backend": scanner.name,
+        "buttons": buttons.count,
+        "profile": keymap.profile,
+        "sos": gestures is not None,
+        "log_dropped": log.dropped,
+        "gc_mode": GC_MODE,
+    }
+    usage.update(stats)
+    queue_stream(ReportStream(data_port, report_records(stats, boot_timer, firmware, usage)))
+
+
+def run_command(command):
+    """Carry out one request from the data port and acknowledge it in the log."""
+    now = supervisor.ticks_ms()
+    if command == protocol.REQUEST_STATS:
+        from stratabox.diagnostics.query import StatsStream
+        queue_stream(StatsStream(data_port, stats, boot_timer))
+        return
+    payload = command_reader.payload
+    length = command_reader.length
+    status = protocol.STATUS_OK
+    if command == protocol.REQUEST_BAD_FRAME:
+        status = protocol.STATUS_BAD_FRAME
+    elif command == protocol.CMD_SELECT_PROFILE:
+        if length != 1 or not keymap.select(payload[0]):
+            status = protocol.STATUS_BAD_ARGUMENT
+        elif PRINT_DEBUG:
+            print(f"Keymap profile: {keymap.names[keymap.profile]}")
+    elif command == protocol.CMD_REMAP:
+        if length != 2 or not keymap.remap(payload[0], payload[1]):
+            status = protocol.STATUS_BAD_ARGUMENT
+    elif command == protocol.CMD_GET_KEYMAP:
+        for index in range(buttons.count):
+            log.log(LOG_KEYMAP, index, now, keymap.active[index])
+    elif command == protocol.CMD_SET_SOS:
+        if length != 1:
+            status = protocol.STATUS_BAD_ARGUMENT
+        else:
+            set_sos_mode(payload[0])
+    elif command == protocol.CMD_DIAGNOSTICS:
+        start_report()
+    elif command == protocol.CMD_PING:
+        pass  # the reply carries the time
+    else:
+        status = protocol.STATUS_UNKNOWN_COMMAND
+    log.log(LOG_COMMAND, command, now, protocol.ack_value(status, keymap.profile, len(keymap.tables)))
+
+
+def handle_requests():
+    """Run every complete request waiting on the data port."""
+    global protocol, command_reader
+    if command_reader is None:
+        import stratabox.commands as protocol
+        command_reader = protocol.CommandReader(data_port)
+    command = command_reader.poll()
+    while command:
+        run_command(command)
+        command = command_reader.poll()
+
+
+async def log_task():
+    """
+    Drain the debug log to the data port, handle requests from the host,
+    stream requested stats and diagnostics reports, collect garbage and
+    save the usage counters while no input is happening.
+    """
+    while True:
+        await asyncio.sleep(0.02)
+        now = supervisor.ticks_ms()
+        idle_ms = ticks_diff(now, last_activity)
+        if idle_ms >= LOG_IDLE_MS and not key_state.dirty and not len(macro_queue):
+            if data_port is not None and data_port.in_waiting:
+                handle_requests()
+            # Text lines and log records never split each other: a new line
+            # is only started once the log has been written out, and text
+            # waits while the port took only part of a record
+            stream = streams[0] if streams else None
+            if stream is None or not stream.mid_line:
+                drained = log.drain(now)
+            else:
+                drained = 0
+            if stream is not None and not drained and not log.mid_record:
+                if not stream.pump():
+                    streams.pop(0)
+            if input_settled():
+                pause_us = gc_scheduler.idle(idle_ms)
+                if pause_us >= 0:
+                    log.log(LOG_GC, 0, now, pause_us)
+                else:
+                    # At most one pause per idle tick
+                    write_us = usage.idle(stats)
+                    if write_us >= 0:
+                        log.log(LOG_USAGE, usage.slot, now, write_us)
+
+
+async def main():
+    # Start with a clean heap
+    gc_scheduler.collect()
+    await asyncio.gather(
+        asyncio.create_task(scan_task()),
+        asyncio.create_task(hid_task()),
+        asyncio.create_task(led_task()),
+        asyncio.create_task(play_sequences(macro_queue, key_state, hid_pending, REPORT_INTERVAL, log)),
+        asyncio.create_task(stats_task()),
+        asyncio.create_task(log_task()),
+    )
+
 
-# Update buttons list with correct menu key
-buttons = [
-    {"button": menu_btn, "keycode": menu_key, "state": True, "last_press_time": 0},
-    {"button": up_btn, "keycode": KEY_CONFIG["UP_KEY"], "state": True, "last_press_time": 0},
-    {"button": down_btn, "keycode": KEY_CONFIG["DOWN_KEY"], "state": True, "last_press_time": 0},
-    {"button": left_btn, "keycode": KEY_CONFIG["LEFT_KEY"], "state": True, "last_press_time": 0},
-    {"button": right_btn, "keycode": KEY_CONFIG["RIGHT_KEY"], "state": True, "last_press_time": 0},
-]
-
-# Add a counter for menu button presses
-menu_press_count = 0
-menu_press_time = 0
-MENU_PRESS_TIMEOUT = 1.0  # Time window in seconds for three presses
-
-while True:
-    # Check each button
-    for btn_data in buttons:
-        current_state = btn_data["button"].value
-        if current_state == False and btn_data["state"] == True:
-            current_time = time.monotonic()
-            if current_time - btn_data["last_press_time"] > DEBOUNCE_TIME:
-                if PRINT_DEBUG:
-                    print(f"Button pressed: {btn_data['keycode']}")
-                set_led(True)
-                kbd.press(btn_data["keycode"])
-                time.sleep(0.01)
-                kbd.release(btn_data["keycode"])
-                btn_data["last_press_time"] = current_time
-                set_led(False)
-                # Check if menu button was pressed
-                if btn_data["button"] == menu_btn:
-                    if current_time - menu_press_time > MENU_PRESS_TIMEOUT:
-                        menu_press_count = 1
-                    else:
-                        menu_press_count += 1
-                    menu_press_time = current_time
-                    if menu_press_count >= 3:
-                        if sos_mode:  # Only trigger SOS sequence if SOS mode was activated at boot
-                            if PRINT_DEBUG:
-                                print("SOS macro triggered - Menu button pressed three times")
-                            # Ensure the third P is sent before SOS sequence
-                            time.sleep(0.05)
-                            # Send arrow key sequence: up>down>right>left>up
-                            sequence = [Keycode.UP_ARROW, Keycode.DOWN_ARROW, Keycode.RIGHT_ARROW, Keycode.LEFT_ARROW, Keycode.UP_ARROW]
-                            for key in sequence:
-                                kbd.press(key)
-                                time.sleep(0.01)
-                                kbd.release(key)
-                                time.sleep(0.05)
-                        menu_press_count = 0
-        btn_data["state"] = current_state
-    time.sleep(0.01) 
\ No newline at end of file
+asyncio.run(main())
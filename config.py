@@ -25,9 +25,94 @@ KEY_CONFIG = {
     "DOWN_KEY": Keycode.DOWN_ARROW, # Default: Down arrow key
     "LEFT_KEY": Keycode.LEFT_ARROW, # Default: Left arrow key
     "RIGHT_KEY": Keycode.RIGHT_ARROW, # Default: Right arrow key
+    # More buttons: add a NAME_KEY entry here for each (for example
+    # "SLOT1_KEY": Keycode.ONE) and wire it with a NAME_BTN_PIN entry in
+    # PIN_CONFIG, or on a key matrix or shift register chain (see below)
 }
 
+# Key matrix or shift register wiring, for builds with more buttons than
+# free pins (up to 30 buttons). Used when INPUT_BACKEND is "matrix"
+# (keypad.KeyMatrix) or "shift" (74HC165 chain, keypad.ShiftRegisterKeys).
+INPUT_WIRING = {
+    # "matrix": key number = row * number of columns + column
+    # "ROW_PINS": (board.GP2, board.GP3, board.GP4, board.GP5),
+    # "COLUMN_PINS": (board.GP6, board.GP7, board.GP8, board.GP9, board.GP10),
+    # "COLUMNS_TO_ANODES": True,     # diode direction
+    # "shift": key number = input position in the chain, 8 per chip
+    # "CLOCK_PIN": board.GP10,
+    # "DATA_PIN": board.GP11,
+    # "LATCH_PIN": board.GP12,
+    # "KEY_COUNT": 24,
+    # "VALUE_WHEN_PRESSED": False,   # buttons pulled up, pressed to ground
+}
+# Key number of each button on the matrix or chain; unlisted buttons use
+# their button number (MENU, UP, DOWN, LEFT, RIGHT, then extras by name)
+KEY_NUMBERS = {
+    # "MENU": 0, "UP": 1, "DOWN": 2, "LEFT": 3, "RIGHT": 4, "SLOT1": 5,
+}
+
+# Keymap profiles that can be switched at runtime over the usb_cdc data
+# port with host/keymap_client.py --profile N, without saving this file.
+# Profile 0 is KEY_CONFIG and profile 1 is practice mode (MENU sends R);
+# these follow as 2, 3, ... Each lists only the keys it changes.
+KEY_PROFILES = (
+    # ("wasd", {"UP_KEY": Keycode.W, "DOWN_KEY": Keycode.S, "LEFT_KEY": Keycode.A, "RIGHT_KEY": Keycode.D}),
+)
+
+# Gestures that play a key sequence while SOS mode is on (UP held at
+# startup, or host/keymap_client.py --sos on). Leave GESTURES commented out
+# for the SOS macro alone: three MENU taps send up, down, right, left, up.
+#   ("tap", button, count, keys)      count presses, each within TAP_TIMEOUT
+#   ("hold", button, seconds, keys)   button held down for this long
+#   ("combo", (buttons), None, keys)  buttons pressed within COMBO_WINDOW
+# GESTURES = (
+#     ("tap", "MENU", 3, (Keycode.UP_ARROW, Keycode.DOWN_ARROW, Keycode.RIGHT_ARROW, Keycode.LEFT_ARROW, Keycode.UP_ARROW)),
+#     ("hold", "DOWN", 0.8, (Keycode.DOWN_ARROW, Keycode.LEFT_ARROW, Keycode.UP_ARROW, Keycode.RIGHT_ARROW)),
+#     ("combo", ("LEFT", "RIGHT"), None, (Keycode.R,)),
+# )
+TAP_TIMEOUT = 1.0     # Seconds allowed between the taps of a multi-tap gesture
+COMBO_WINDOW = 0.05   # Seconds allowed between the presses of a combo gesture
+
 # Other settings
-DEBOUNCE_TIME = 0.05  # Time in seconds to debounce button presses
+DEBOUNCE_TIME = 0.01  # Default debounce window in seconds (presses and releases)
+DEBOUNCE_MODE = "eager"  # Default debounce algorithm: "eager", "integrator" or "defer"
+CALIBRATION_TIME = 20 # Seconds of button presses recorded by button_test.py calibration
 LED_ENABLED = True    # Set to False to disable LED feedback
-PRINT_DEBUG = True    # Set to False to disable debug print statements 
\ No newline at end of file
+PRINT_DEBUG = True    # Set to False to disable debug print statements
+SCAN_INTERVAL = 0.005 # Seconds between background button scans (keypad)
+INPUT_BACKEND = "keypad" # "keypad", "pio" for hardware edge timestamps (contiguous pins only), "matrix" or "shift"
+LOOP_INTERVAL = 0.001 # Seconds the scan task sleeps between event queue checks
+ACTIVE_TIME = 2.0     # Seconds at full scan rate after a button event; then the loop slows down
+IDLE_LOOP_INTERVAL = 0.02 # Slowest scan task sleep while idle, in seconds
+SLEEP_AFTER = 600     # Seconds without button events before light sleep (0 never sleeps)
+LOG_CAPACITY = 128    # Debug log records buffered for the usb_cdc data port
+USAGE_FLUSH_INTERVAL = 600 # Seconds between saves of the usage counters to nvm (0 never saves)
+USAGE_FLUSH_PRESSES = 500  # Unsaved presses that bring the next save forward (at most every 5 minutes)
+GC_MODE = "idle"      # "idle": collect garbage in quiet time after input; "auto": MicroPython decides
+GC_IDLE_MS = 50       # Quiet time after the last button event before an idle collection
+GC_MIN_ALLOC = 4096   # Bytes allocated since the last collection before collecting again
+
+# Keyboard report format, applied by boot.py (needs a reset, not just a save)
+# "6kro": standard boot keyboard, up to 6 keys at once, works in BIOS menus
+# "nkro": one bit per key, any number of keys at once; falls back to
+#         "6kro" if the NKRO device cannot be enabled
+HID_MODE = "6kro"
+# Shortest time between the reports of a played key sequence, in seconds.
+# Match the host's USB poll interval; reports also wait for the host to
+# pick up the previous one, so a slower host never loses keys.
+REPORT_INTERVAL = 0.001
+
+# Startup
+FAST_BOOT = True      # Skip the blocking LED pattern in boot.py (played by code.py instead)
+BOOT_BUDGET_MS = 300  # Warn if code.py takes longer than this to start scanning
+BOOT_SAMPLE_MS = 50   # Longest time spent detecting buttons held at power-up
+
+# Per-button debounce settings: button name -> (algorithm, window in seconds)
+# "eager" reacts to the first edge and then ignores bounce for the window,
+# "integrator" switches once the contact has been closed/open long enough
+# overall, "defer" waits until the contact has been stable for the window.
+# Buttons not listed use DEBOUNCE_MODE and DEBOUNCE_TIME.
+DEBOUNCE_CONFIG = {
+    # "MENU": ("eager", 0.02),
+    # "UP": ("integrator", 0.005),
+}
@@ -5,40 +5,62 @@ Connect your Debug Probe to the StrataBox using the SWD pins.
 """
 
 import time
-import board
-import digitalio
+from stratabox.output.led import LedDriver, blink_code
+
+# capture_debug_report gives up when the port takes nothing for this long
+REPORT_STALL_TIMEOUT = 5.0
+
+# The LED pin can only be claimed once, so every utility shares one driver
+_led = None
+
+
+def status_led():
+    """Return the shared LED driver, claiming the pin on first use."""
+    global _led
+    if _led is None:
+        _led = LedDriver()
+    return _led
+
 
 # Debug message function that outputs to both serial console and LED
-def debug_message(message, blink_count=1):
+def debug_message(message, blink_count=1, wait=True):
     """
     Print a debug message and blink the LED to visually confirm.
     
     Args:
         message: The message to print to serial console
-        blink_count: Number of times to blink the LED
+        blink_count: Number of times to blink the LED (0 only prints)
+        wait: False returns straight away; the blinks are then played by
+            status_led().tick() calls from the caller's loop
     """
     print(f"DEBUG: {message}")
+    if blink_count < 1:
+        return
     
     # Blink the LED to visually confirm
-    led = digitalio.DigitalInOut(board.LED)
-    led.direction = digitalio.Direction.OUTPUT
-    
-    for _ in range(blink_count):
-        led.value = True
-        time.sleep(0.1)
-        led.value = False
-        time.sleep(0.1)
+    led = status_led()
+    led.play(blink_code(blink_count))
+    if wait:
+        led.wait()
 
 # Function to monitor button states and report detailed timing
 def monitor_button_timing(duration=10):
     """
     Monitor button presses and report detailed timing information.
-    This is useful for debugging latency issues.
+    This is useful for checking wiring and switch timing while the keyboard
+    firmware is not running. For the latency of the real firmware pipeline,
+    query the histograms kept by code.py with host/query_stats.py.
     
     Args:
         duration: How long to monitor in seconds
     """
-    from code import buttons  # Import the buttons from the main code
+    # Build the shared button table from config.py rather than importing
+    # code.py, which would start the keyboard firmware
+    from stratabox import config
+    from stratabox.input.buttons import ButtonTable
+    
+    buttons = ButtonTable(config.PIN_CONFIG)
+    inputs = buttons.make_inputs()
     
     print(f"Beginning button timing monitor for {duration} seconds")
     print("Press buttons to see detailed timing information")
@@ -46,33 +68,30 @@ def monitor_button_timing(duration=10):
     start_time = time.monotonic()
     end_time = start_time + duration
     
-    # Dictionary to track button states
-    button_states = {}
-    for btn in buttons:
-        button_states[id(btn["button"])] = btn["button"].value
+    # Last state of each button, indexed by button number
+    button_states = bytearray([1] * buttons.count)
     
     while time.monotonic() < end_time:
-        current_time = time.monotonic()
-        
         # Check each button
-        for btn in buttons:
-            button_id = id(btn["button"])
-            current_state = btn["button"].value
+        for index in range(buttons.count):
+            current_state = inputs[index].value
             
             # If button state changed from not pressed to pressed
-            if current_state == False and button_states[button_id] == True:
+            if not current_state and button_states[index]:
                 # Calculate and print response time
                 event_time = time.monotonic()
-                print(f"Button: {btn.get('direction', 'unknown')}")
+                print(f"Button: {buttons.labels[index]}")
                 print(f"  Press detected at: {event_time - start_time:.6f}s")
                 print(f"  Value: {current_state}")
             
             # Update button state
-            button_states[button_id] = current_state
+            button_states[index] = current_state
         
         # Small delay to avoid excessive CPU usage
         time.sleep(0.001)  # Use a smaller delay for more precise timing
     
+    for button in inputs:
+        button.deinit()
     print("Button timing monitor completed")
 
 # Function to test USB HID communication
@@ -99,13 +118,9 @@ def test_usb_hid_connection():
         print("Connection is working properly")
         
         # Blink LED to indicate success
-        led = digitalio.DigitalInOut(board.LED)
-        led.direction = digitalio.Direction.OUTPUT
-        for _ in range(3):
-            led.value = True
-            time.sleep(0.1)
-            led.value = False
-            time.sleep(0.1)
+        led = status_led()
+        led.play(blink_code(3))
+        led.wait()
             
         return True
         
@@ -113,67 +128,73 @@ def test_usb_hid_connection():
         print(f"USB HID test failed: {e}")
         return False
 
-# Function to capture and log a debug report for troubleshooting
-def capture_debug_report():
+# Function to stream a debug report for troubleshooting
+def capture_debug_report(port=None):
     """
-    Capture system information and create a debug report.
+    Generate the diagnostics report one record at a time and print each
+    record as a JSON line, or stream it to `port` (e.g. usb_cdc.data) for
+    host/collect_diagnostics.py. Nothing is collected in RAM or written
+    to flash.
+
+    Streaming waits briefly between chunks, and gives up if the host
+    stops reading for REPORT_STALL_TIMEOUT seconds.
+
+    Args:
+        port: Serial port to stream the report to, or None to print it
+
+    Returns:
+        The number of records in the report (None if streaming stalled)
+    """
+    from stratabox.diagnostics.report import ReportStream, report_records, format_record
+
+    if port is None:
+        count = 0
+        for record in report_records():
+            print(format_record(record).decode().rstrip())
+            count += 1
+        return count
+    stream = ReportStream(port, report_records())
+    written = 0
+    last_progress = time.monotonic()
+    while stream.pump():
+        if stream.written != written:
+            written = stream.written
+            last_progress = time.monotonic()
+        elif time.monotonic() - last_progress > REPORT_STALL_TIMEOUT:
+            print(f"Report stalled after {stream.count} records: is the host reading the port?")
+            return None
+        time.sleep(0.005)
+    return stream.count
+
+# Function to show the lifetime usage counters saved by the firmware
+def show_usage():
+    """
+    Print the press count of every button and the other usage counters
+    the firmware saved to nvm, to keep an eye on switch wear.
+
+    Returns:
+        The counters as a dictionary, or None if nothing was saved yet
     """
-    import os
     import microcontroller
-    import gc
-    
-    debug_report = []
-    debug_report.append("StrataBox Debug Report")
-    debug_report.append("====================")
-    
-    # System information
-    debug_report.append(f"CircuitPython version: {os.uname().version}")
-    debug_report.append(f"Board: {os.uname().machine}")
-    
-    # Memory information
-    gc.collect()
-    debug_report.append(f"Free memory: {gc.mem_free()} bytes")
-    debug_report.append(f"Allocated memory: {gc.mem_alloc()} bytes")
-    
-    # CPU temperature
-    try:
-        cpu_temp = microcontroller.cpu.temperature
-        debug_report.append(f"CPU temperature: {cpu_temp:.1f}°C")
-    except:
-        debug_report.append("CPU temperature: Not available")
-    
-    # USB information
-    try:
-        debug_report.append(f"USB devices: {len(usb_hid.devices)}")
-    except:
-        debug_report.append("USB devices: Not available")
-    
-    # File system information
-    try:
-        debug_report.append("Files on device:")
-        files = os.listdir("/")
-        for file in files:
-            try:
-                file_stat = os.stat("/" + file)
-                debug_report.append(f"  {file} ({file_stat[6]} bytes)")
-            except:
-                debug_report.append(f"  {file} (unknown size)")
-    except:
-        debug_report.append("File listing failed")
-    
-    # Join all lines and return
-    report_text = "\n".join(debug_report)
-    print(report_text)
-    
-    # Save to file if possible
-    try:
-        with open("/debug_report.txt", "w") as f:
-            f.write(report_text)
-        print("Debug report saved to /debug_report.txt")
-    except:
-        print("Could not save debug report to file")
-    
-    return report_text
+    from stratabox import config
+    from stratabox.input.buttons import button_names
+    from stratabox.diagnostics.usage import read_usage
+
+    usage, slot = read_usage(microcontroller.nvm)
+    if usage is None:
+        print("No usage counters saved yet")
+        return None
+    names = button_names(config.KEY_CONFIG)
+    print(f"Usage counters (nvm slot {slot}, save #{usage['sequence']})")
+    print(f"  Boots: {usage['boots']}")
+    print(f"  Hours powered: {usage['seconds'] / 3600:.1f}")
+    print(f"  Gestures played: {usage['gestures']}")
+    print(f"  Peak report latency: {usage['peak_report_us']} us")
+    print(f"  Peak scan stall: {usage['peak_stall_us']} us")
+    for index, count in enumerate(usage["presses"]):
+        name = names[index] if index < len(names) else f"button {index}"
+        print(f"  {name}: {count} presses")
+    return usage
 
 # Example usage for Debug Probe console
 if __name__ == "__main__":
@@ -183,5 +204,6 @@ if __name__ == "__main__":
     print("1. debug_message('message') - Print a debug message with LED confirmation")
     print("2. monitor_button_timing(duration) - Monitor button timing for latency testing")
     print("3. test_usb_hid_connection() - Test USB HID functionality")
-    print("4. capture_debug_report() - Generate a complete system report")
+    print("4. capture_debug_report() - Print a complete system report (pass usb_cdc.data to stream it)")
+    print("5. show_usage() - Show lifetime press counts and usage saved in nvm")
     print("Use these functions via the Debug Probe REPL") 
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+StrataBox HID Report Benchmark
+Compares the per-report cost of the adafruit_hid Keyboard press/release
+path with the RawKeyboard writer used by code.py.
+Run it from the REPL with `import hid_benchmark`, or copy it to the
+CIRCUITPY drive as code.py.
+"""
+
+import gc
+import time
+import usb_hid
+from adafruit_hid.keyboard import Keyboard
+from adafruit_hid.keycode import Keycode
+from stratabox.output.hid_report import RawKeyboard
+from stratabox.output.keystate import KeyState
+
+ITERATIONS = 1000
+
+
+class NullDevice:
+    """Stands in for the USB keyboard so only the Python-side cost is measured."""
+
+    usage_page = 0x01
+    usage = 0x06
+
+    def send_report(self, report, report_id=None):
+        pass
+
+
+def measure(name, keystroke, iterations=ITERATIONS):
+    """
+    Time `iterations` keystrokes (press + release, two reports each) and
+    print the cost per report and the heap used per keystroke.
+    """
+    keystroke()
+    gc.collect()
+    free_before = gc.mem_free()
+    start = time.monotonic_ns()
+    for _ in range(iterations):
+        keystroke()
+    elapsed = time.monotonic_ns() - start
+    used = free_before - gc.mem_free()
+    print(f"{name}: {elapsed // (iterations * 2)} ns/report, {used // iterations} bytes/keystroke")
+
+
+def run():
+    device = NullDevice()
+    print("=== StrataBox HID report benchmark ===")
+    print(f"{ITERATIONS} keystrokes per path, reports discarded")
+
+    kbd = Keyboard(device)
+
+    def keyboard_keystroke():
+        kbd.press(Keycode.UP_ARROW)
+        kbd.release(Keycode.UP_ARROW)
+
+    raw = RawKeyboard((device,))
+
+    def raw_keystroke():
+        raw.press(Keycode.UP_ARROW)
+        raw.send()
+        raw.release(Keycode.UP_ARROW)
+        raw.send()
+
+    key_state = KeyState(RawKeyboard((device,)))
+
+    def key_state_keystroke():
+        key_state.key_down(Keycode.UP_ARROW)
+        key_state.flush()
+        key_state.key_up(Keycode.UP_ARROW)
+        key_state.flush()
+
+    measure("Keyboard.press/release", keyboard_keystroke)
+    measure("RawKeyboard", raw_keystroke)
+    measure("KeyState + RawKeyboard", key_state_keystroke)
+
+    # Cost of the USB transfer itself, identical for every path.
+    # An empty report is sent so the host sees no key presses.
+    real = RawKeyboard(usb_hid.devices)
+    start = time.monotonic_ns()
+    for _ in range(100):
+        real.send()
+    print(f"usb_hid send_report: {(time.monotonic_ns() - start) // 100} ns/report")
+
+
+run()
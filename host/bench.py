@@ -0,0 +1,201 @@
+"""
+StrataBox Benchmark Suite
+Runs the firmware in the host simulator against the synthetic traces in
+host/traces.py and reports, per scenario:
+
+- loop iterations per second of the firmware scan loop
+- detection latency from the physical press to the HID report
+- lost and duplicate keystrokes
+- for the SOS scenario, whether the macro played and how long it took
+- for the sleep scenarios, that presses waking the controller are delivered
+- for the wide scenario, the same with 24 buttons on a key matrix
+
+Usage:
+    python host/bench.py [--scenario NAME] [--hid-mode nkro] [--input-backend pio]
+                         [--host-poll-ms 8] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import simulate
+import traces
+
+# A press must reach the host within this many ms to count as delivered
+MATCH_WINDOW_MS = 200
+
+
+def report_keys(report_hex):
+    """Return the set of keycodes held in a 6KRO or NKRO report."""
+    report = bytes.fromhex(report_hex)
+    keys = {0xE0 + bit for bit in range(8) if report[0] & (1 << bit)}
+    if len(report) == 8:
+        keys.update(key for key in report[2:] if key)
+    else:
+        for index, byte in enumerate(report[1:]):
+            keys.update(index * 8 + bit for bit in range(8) if byte & (1 << bit))
+    return keys
+
+
+def key_downs(reports):
+    """Return (ms, keycode) for every key that appears in a report."""
+    downs = []
+    held = set()
+    for at, report_hex in reports:
+        keys = report_keys(report_hex)
+        downs.extend((at, key) for key in sorted(keys - held))
+        held = keys
+    return downs
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_trace(trace, hid_mode="6kro", input_backend="keypad", host_poll_ms=1.0, sends=()):
+    """
+    Run one trace in a fresh simulator process and return its results.
+    `sends` are extra (ms, bytes) written to the data port, e.g. command frames.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        trace_path = os.path.join(tmp, "trace.json")
+        output_path = os.path.join(tmp, "result.json")
+        with open(trace_path, "w") as f:
+            json.dump(trace.changes, f)
+        # Stats are streamed in idle time, so leave them most of the final second
+        query_at = (trace.duration - 0.9) * 1000
+        subprocess.run(
+            [
+                sys.executable, os.path.join(simulate.HOST_DIR, "simulate.py"), trace_path,
+                "--duration", str(trace.duration), "--output", output_path,
+                "--hid-mode", hid_mode, "--query-at", str(query_at),
+                "--input-backend", input_backend, "--host-poll-ms", str(host_poll_ms),
+            ] + [f"--set={name}={value!r}" for name, value in trace.settings.items()]
+            + [f"--send={at}:{data.hex()}" for at, data in sends],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        with open(output_path) as f:
+            return json.load(f)
+
+
+def trace_keycodes(trace):
+    """
+    Return the keycode of each button name for a trace, and of each
+    direction in its macro. Call simulate.install() first.
+    """
+    import config
+    from adafruit_hid.keycode import Keycode
+
+    key_config = trace.settings.get("KEY_CONFIG", config.KEY_CONFIG)
+    keycodes = {key[:-len("_KEY")]: keycode for key, keycode in key_config.items() if key.endswith("_KEY")}
+    macro_keycodes = {
+        "UP": Keycode.UP_ARROW, "DOWN": Keycode.DOWN_ARROW,
+        "LEFT": Keycode.LEFT_ARROW, "RIGHT": Keycode.RIGHT_ARROW,
+    }
+    return keycodes, macro_keycodes
+
+
+def analyse(trace, results, keycodes, macro_keycodes):
+    """Compare the captured reports with the presses the trace should produce."""
+    downs = key_downs(results["reports"])
+    used = [False] * len(downs)
+    latencies = []
+    lost = 0
+    for at, button in trace.presses:
+        keycode = keycodes[button]
+        for i, (down_at, key) in enumerate(downs):
+            if not used[i] and key == keycode and at - 1 <= down_at <= at + MATCH_WINDOW_MS:
+                used[i] = True
+                latencies.append(down_at - at)
+                break
+        else:
+            lost += 1
+    extra = [downs[i] for i in range(len(downs)) if not used[i]]
+
+    summary = {
+        "scenario": trace.name,
+        "presses": len(trace.presses),
+        "lost": lost,
+        "latency_p50_ms": percentile(latencies, 0.5),
+        "latency_p95_ms": percentile(latencies, 0.95),
+        "latency_max_ms": max(latencies) if latencies else None,
+    }
+    if trace.macro:
+        expected = [macro_keycodes[name] for name in trace.macro]
+        played = [key for _, key in extra[:len(expected)]]
+        summary["macro_ok"] = played == expected
+        if summary["macro_ok"] and trace.presses:
+            last_trigger = trace.presses[-1][0]
+            summary["macro_ms"] = extra[len(expected) - 1][0] - last_trigger
+        extra = extra[len(expected):]
+    summary["duplicates"] = len(extra)
+
+    span = (results["scan_last_ms"] or 0) - (results["scan_first_ms"] or 0)
+    summary["loop_per_s"] = int(results["scan_polls"] * 1000 / span) if span > 0 else None
+    summary["firmware_stats"] = stats_lines(bytes.fromhex(results["cdc"]))
+    return summary
+
+
+def stats_lines(cdc):
+    """Extract the firmware's answer to the stats query from the data port stream."""
+    start = cdc.rfind(b"STATS BEGIN\n")
+    end = cdc.rfind(b"STATS END\n")
+    if start < 0 or end < start:
+        return []
+    return cdc[start + len("STATS BEGIN\n"):end].decode("ascii", "replace").splitlines()
+
+
+def print_summary(summary):
+    def ms(value):
+        return "-" if value is None else f"{value:.1f}"
+
+    line = (
+        f"{summary['scenario']:<10} presses={summary['presses']:<3} lost={summary['lost']:<2} "
+        f"dup={summary['duplicates']:<2} latency p50/p95/max={ms(summary['latency_p50_ms'])}/"
+        f"{ms(summary['latency_p95_ms'])}/{ms(summary['latency_max_ms'])} ms "
+        f"loop={summary['loop_per_s']}/s"
+    )
+    if "macro_ok" in summary:
+        line += f" macro={'ok' if summary['macro_ok'] else 'FAILED'}"
+        if "macro_ms" in summary:
+            line += f" ({summary['macro_ms']:.0f} ms)"
+    print(line)
+    for stats_line in summary["firmware_stats"]:
+        print("    " + stats_line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the StrataBox firmware in the host simulator")
+    parser.add_argument("--scenario", action="append", help="run only these scenarios")
+    parser.add_argument("--hid-mode", choices=("6kro", "nkro"), default="6kro")
+    parser.add_argument("--input-backend", choices=("keypad", "pio", "matrix", "shift"), default="keypad")
+    parser.add_argument("--host-poll-ms", type=float, default=1.0, help="USB poll interval of the host")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    simulate.install()
+    summaries = []
+    for make_trace in traces.SCENARIOS:
+        trace = make_trace()
+        if args.scenario and trace.name not in args.scenario:
+            continue
+        keycodes, macro_keycodes = trace_keycodes(trace)
+        results = run_trace(trace, args.hid_mode, args.input_backend, args.host_poll_ms)
+        summary = analyse(trace, results, keycodes, macro_keycodes)
+        print_summary(summary)
+        summaries.append(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summaries, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
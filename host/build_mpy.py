@@ -0,0 +1,97 @@
+"""
+StrataBox .mpy Build
+Runs on the computer (CPython), not on the Pico. Compiles the stratabox
+package to .mpy bytecode with mpy-cross and lays out a folder that can be
+copied onto the CIRCUITPY drive as is. The Pico then loads precompiled
+bytecode instead of parsing .py source at boot, which is faster and
+needs far less heap.
+
+boot.py and code.py stay .py (CircuitPython only runs those names), and
+so does config.py, so it can still be edited on the drive.
+
+mpy-cross must match the CircuitPython version on the Pico; download it
+from https://adafruit-circuit-python.s3.amazonaws.com/index.html?prefix=bin/mpy-cross/
+
+Usage:
+    python host/build_mpy.py --mpy-cross ./mpy-cross --output build
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+
+HOST_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(HOST_DIR)
+
+# Copied as source: run by name, or meant to be edited on the drive
+SOURCE_FILES = ("boot.py", "code.py", "config.py")
+# Optional REPL utilities, compiled like the package
+UTILITY_FILES = ("debug_probe_utils.py", "hid_benchmark.py", "import_benchmark.py")
+PACKAGE = "stratabox"
+
+
+def package_sources():
+    """Return the .py files of the package, relative to the repository root."""
+    sources = []
+    for root, _, files in os.walk(os.path.join(REPO_DIR, PACKAGE)):
+        for name in sorted(files):
+            if name.endswith(".py"):
+                sources.append(os.path.relpath(os.path.join(root, name), REPO_DIR))
+    return sorted(sources)
+
+
+def compile_mpy(mpy_cross, source, output_dir):
+    """Compile one source file to output_dir with the same relative path; returns its size."""
+    target = os.path.join(output_dir, source[:-3] + ".mpy")
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # -s keeps the repository-relative name in tracebacks
+    subprocess.run(
+        [mpy_cross, "-s", source, "-o", target, os.path.join(REPO_DIR, source)],
+        check=True,
+    )
+    return os.path.getsize(target)
+
+
+def build(mpy_cross, output_dir, utilities=False):
+    """Write the CIRCUITPY layout to output_dir and print the file sizes."""
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+    source_total = 0
+    mpy_total = 0
+    for name in SOURCE_FILES:
+        shutil.copy(os.path.join(REPO_DIR, name), output_dir)
+    sources = package_sources()
+    if utilities:
+        sources.extend(UTILITY_FILES)
+    for source in sources:
+        source_size = os.path.getsize(os.path.join(REPO_DIR, source))
+        mpy_size = compile_mpy(mpy_cross, source, output_dir)
+        source_total += source_size
+        mpy_total += mpy_size
+        print(f"{source}: {source_size} -> {mpy_size} bytes")
+    print(f"Total: {source_total} bytes of source -> {mpy_total} bytes of .mpy")
+    print(f"Copy the contents of {output_dir} to the CIRCUITPY drive and delete")
+    print(f"any old {PACKAGE}/*.py files there, since .py is imported before .mpy")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build .mpy files for the CIRCUITPY drive")
+    parser.add_argument("--mpy-cross", default="mpy-cross", help="mpy-cross executable")
+    parser.add_argument("--output", default=os.path.join(REPO_DIR, "build"), help="output folder")
+    parser.add_argument("--utilities", action="store_true", help="also compile the REPL utilities")
+    args = parser.parse_args()
+    try:
+        version = subprocess.run(
+            [args.mpy_cross, "--version"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        sys.exit(f"Could not run {args.mpy_cross}; download the mpy-cross for your CircuitPython version")
+    print(f"Using {version}")
+    build(args.mpy_cross, args.output, args.utilities)
+
+
+if __name__ == "__main__":
+    main()
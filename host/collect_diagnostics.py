@@ -0,0 +1,112 @@
+"""
+StrataBox Diagnostics Collector
+Runs on the computer (CPython), not on the Pico. Asks the running
+firmware for its diagnostics report over the usb_cdc data port and
+prints it, or saves the records as JSON lines. The report is streamed
+in the controller's idle time, so it can be pulled mid-session without
+the buttons stuttering.
+
+Usage:
+    python host/collect_diagnostics.py /dev/ttyACM1
+    python host/collect_diagnostics.py /dev/ttyACM1 --json report.jsonl
+
+Needs pyserial: pip install pyserial
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Share the protocol and report format with the firmware
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from stratabox import commands  # noqa: E402
+
+# Prefix of every report line, as in stratabox.diagnostics.report
+LINE_PREFIX = b"DIAG "
+
+
+def parse_lines(data):
+    """
+    Pick the report records out of data read from the port.
+
+    Returns:
+        A list of records and the bytes after the last complete line
+    """
+    records = []
+    *lines, rest = data.split(b"\n")
+    for line in lines:
+        # Binary log records may come before the prefix on the same line
+        start = line.rfind(LINE_PREFIX)
+        if start < 0:
+            continue
+        try:
+            records.append(json.loads(line[start + len(LINE_PREFIX):]))
+        except ValueError:
+            continue
+    return records, rest
+
+
+def collect(port, timeout=10.0):
+    """Request the report and return its records, ending with the "end" record."""
+    port.reset_input_buffer()
+    port.write(commands.encode(commands.CMD_DIAGNOSTICS))
+    deadline = time.monotonic() + timeout
+    records = []
+    pending = b""
+    while time.monotonic() < deadline:
+        new, pending = parse_lines(pending + port.read(256))
+        for record in new:
+            if record.get("type") == "begin":
+                records = []
+            records.append(record)
+            if record.get("type") == "end":
+                if record.get("records") != len(records):
+                    print(
+                        f"Warning: {record.get('records')} records sent, {len(records)} received",
+                        file=sys.stderr,
+                    )
+                return records
+    raise TimeoutError("No diagnostics report from the StrataBox")
+
+
+def format_record(record):
+    """Return one record as a line of text."""
+    kind = record.get("type")
+    if kind == "histogram":
+        buckets = [
+            f"<{bound}:{count}" for bound, count in zip(record["bounds_us"], record["counts"]) if count
+        ]
+        if record["counts"][-1]:
+            buckets.append(f">={record['bounds_us'][-1]}:{record['counts'][-1]}")
+        return f"{record['name']}: n={record['count']} max={record['max_us']}us " + " ".join(buckets)
+    if kind == "file":
+        size = "dir" if record["dir"] else f"{record['size']} bytes"
+        return f"file: {record['name']} ({size})"
+    fields = " ".join(f"{name}={value}" for name, value in record.items() if name != "type")
+    return f"{kind}: {fields}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("port", help="usb_cdc data serial port, e.g. /dev/ttyACM1 or COM4")
+    parser.add_argument("--json", help="write the records to this file as JSON lines")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for the report")
+    args = parser.parse_args()
+    try:
+        import serial
+    except ImportError:
+        sys.exit("Reading a serial port needs pyserial: pip install pyserial")
+    with serial.Serial(args.port, timeout=0.1) as port:
+        records = collect(port, args.timeout)
+    if args.json:
+        with open(args.json, "w") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+    for record in records:
+        print(format_record(record))
+
+
+if __name__ == "__main__":
+    main()
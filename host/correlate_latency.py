@@ -0,0 +1,553 @@
+"""
+StrataBox Latency Correlator
+Runs on the computer (CPython), not on the Pico. Measures the whole path
+from a button press to the key event the operating system delivers, per
+button, by matching the press timestamps the firmware logs on the
+usb_cdc data port with the key events the computer receives.
+
+The two clocks are aligned with ping commands: the reply to each ping
+carries the device time (supervisor.ticks_ms) at which it was handled,
+which must lie between the host's send and receive times. The clock
+offset and rate (drift) are chosen as the line that best fits inside all
+of those bounds, so the alignment error is known too.
+
+The device timestamp of a press is when the background scanner saw it,
+so the physical press was up to SCAN_INTERVAL earlier with the keypad
+backend (the PIO backend timestamps the edge itself).
+
+Every source is first turned into a session file (JSON lines of ping,
+device and host records), so recordings can be analysed again later and
+firmware builds or host USB settings compared on the same footing:
+
+    record     live: the data port plus a Linux evdev or hidraw device
+    sim        a benchmark scenario run in the host simulator
+    synthetic  generated events with a known latency, offset and drift
+    analyse    a session file saved by one of the above
+
+Usage:
+    python host/correlate_latency.py record /dev/ttyACM1 /dev/input/event7 --duration 60 --session s.jsonl
+    python host/correlate_latency.py record /dev/ttyACM1 /dev/hidraw3 --duration 60
+    python host/correlate_latency.py sim --scenario taps --host-poll-ms 8
+    python host/correlate_latency.py synthetic --latency-ms 3 --drift-ppm 40
+    python host/correlate_latency.py analyse s.jsonl --json summary.json
+
+record needs pyserial and read access to the input device (root or the
+input group). Key events reach every program, so record with the
+keyboard focus somewhere harmless.
+"""
+
+import argparse
+import json
+import os
+import random
+import select
+import struct
+import sys
+import time
+
+# Share the protocol and record format with the firmware
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from stratabox import commands  # noqa: E402
+from stratabox.diagnostics import ringlog  # noqa: E402
+from stratabox.input.buttons import BUTTON_NAMES  # noqa: E402
+from bench import percentile, report_keys  # noqa: E402
+
+TICKS_PERIOD = 1 << 29
+PING_INTERVAL_S = 0.5
+PING_TIMEOUT_S = 2.0
+# A host event must follow its device event within this many seconds
+MATCH_WINDOW_S = 0.25
+# Drift is only estimated from pings spanning at least this long
+MIN_DRIFT_SPAN_S = 10.0
+MAX_DRIFT = 1e-3
+
+# HID keyboard usage -> Linux key code, as mapped by drivers/hid/hid-input.c,
+# for usages 0x00 to 0x52 (letters, digits, editing keys, F-keys, arrows)
+HID_TO_EVDEV = (
+    0, 0, 0, 0, 30, 48, 46, 32, 18, 33, 34, 35, 23, 36, 37, 38,
+    50, 49, 24, 25, 16, 19, 31, 20, 22, 47, 17, 45, 21, 44, 2, 3,
+    4, 5, 6, 7, 8, 9, 10, 11, 28, 1, 14, 15, 57, 12, 13, 26,
+    27, 43, 43, 39, 40, 41, 51, 52, 53, 58, 59, 60, 61, 62, 63, 64,
+    65, 66, 67, 68, 87, 88, 99, 70, 119, 110, 102, 104, 111, 107, 109, 106,
+    105, 108, 103,
+)
+# Modifier usages 0xE0-0xE7
+HID_MODIFIERS_EVDEV = (29, 42, 56, 125, 97, 54, 100, 126)
+EVDEV_TO_HID = {}
+for _usage, _code in enumerate(HID_TO_EVDEV):
+    if _code:
+        EVDEV_TO_HID.setdefault(_code, _usage)
+for _bit, _code in enumerate(HID_MODIFIERS_EVDEV):
+    EVDEV_TO_HID[_code] = 0xE0 + _bit
+
+
+def ticks_diff(end, start):
+    """Signed difference of two supervisor.ticks_ms() values, across the 2**29 wrap."""
+    diff = (end - start) % TICKS_PERIOD
+    return diff - TICKS_PERIOD if diff >= TICKS_PERIOD // 2 else diff
+
+
+class DeviceStream:
+    """
+    Turn bytes read from the data port into session records: presses and
+    releases logged by the firmware, and ping replies paired with the
+    time their ping was sent.
+    """
+
+    def __init__(self):
+        self.pending = b""
+        self.pings = []     # send times of pings waiting for their reply
+
+    def ping_sent(self, at):
+        self.pings.append(at)
+
+    def feed(self, data, received):
+        """Decode data that arrived at host time `received`; returns new records."""
+        self.pending += data
+        decoded, used = ringlog.decode(self.pending)
+        self.pending = self.pending[used:]
+        records = []
+        for code, index, timestamp, value in decoded:
+            if code in (ringlog.LOG_PRESS, ringlog.LOG_RELEASE):
+                records.append({
+                    "type": "device", "pressed": code == ringlog.LOG_PRESS, "button": index,
+                    "keycode": value, "device_ms": timestamp,
+                })
+            elif code == ringlog.LOG_COMMAND and index == commands.CMD_PING and self.pings:
+                records.append({
+                    "type": "ping", "sent": self.pings.pop(0), "device_ms": timestamp, "received": received,
+                })
+        return records
+
+
+class EvdevReader:
+    """Key events from a Linux /dev/input/event* device, with kernel timestamps."""
+
+    EVENT_FORMAT = "llHHi"  # struct input_event: seconds, microseconds, type, code, value
+    EV_KEY = 1
+
+    def __init__(self, path):
+        self.fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        self.size = struct.calcsize(self.EVENT_FORMAT)
+
+    def read(self):
+        records = []
+        try:
+            data = os.read(self.fd, self.size * 64)
+        except BlockingIOError:
+            return records
+        for offset in range(0, len(data) - self.size + 1, self.size):
+            seconds, micros, kind, code, value = struct.unpack_from(self.EVENT_FORMAT, data, offset)
+            # value 2 is autorepeat
+            if kind == self.EV_KEY and value in (0, 1) and code in EVDEV_TO_HID:
+                records.append({
+                    "type": "host", "pressed": value == 1, "keycode": EVDEV_TO_HID[code],
+                    "time": seconds + micros / 1e6,
+                })
+        return records
+
+    def close(self):
+        os.close(self.fd)
+
+
+class HidrawReader:
+    """
+    Key changes from a Linux /dev/hidraw* device, timestamped when read
+    (hidraw has no kernel timestamps, so this adds the reader's wakeup).
+    """
+
+    def __init__(self, path):
+        self.fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+        self.held = set()
+
+    def read(self):
+        records = []
+        try:
+            report = os.read(self.fd, 64)
+        except BlockingIOError:
+            return records
+        at = time.time()
+        if len(report) not in (8, 14):
+            return records
+        keys = report_keys(report.hex())
+        for keycode in sorted(keys - self.held):
+            records.append({"type": "host", "pressed": True, "keycode": keycode, "time": at})
+        for keycode in sorted(self.held - keys):
+            records.append({"type": "host", "pressed": False, "keycode": keycode, "time": at})
+        self.held = keys
+        return records
+
+    def close(self):
+        os.close(self.fd)
+
+
+def record_session(port_path, input_path, duration, ping_interval=PING_INTERVAL_S):
+    """
+    Record pings, device events and host key events from a live
+    controller for `duration` seconds. Host times are time.time(), the
+    clock of evdev timestamps.
+    """
+    try:
+        import serial
+    except ImportError:
+        sys.exit("Reading a serial port needs pyserial: pip install pyserial")
+    reader = HidrawReader(input_path) if "hidraw" in input_path else EvdevReader(input_path)
+    stream = DeviceStream()
+    records = []
+    ping = commands.encode(commands.CMD_PING)
+    next_ping = 0.0
+    try:
+        with serial.Serial(port_path, timeout=0) as port:
+            port.reset_input_buffer()
+            end = time.time() + duration
+            while time.time() < end:
+                now = time.time()
+                if stream.pings and now - stream.pings[0] > PING_TIMEOUT_S:
+                    # Never answered; a late reply would be paired with the wrong ping
+                    stream.pings.clear()
+                # One ping at a time, so every reply belongs to the ping in flight
+                if not stream.pings and now >= next_ping:
+                    stream.ping_sent(time.time())
+                    port.write(ping)
+                    next_ping = now + ping_interval
+                ready, _, _ = select.select([port.fileno(), reader.fd], [], [], 0.01)
+                if reader.fd in ready:
+                    records.extend(reader.read())
+                if port.fileno() in ready:
+                    data = port.read(port.in_waiting or 1)
+                    records.extend(stream.feed(data, time.time()))
+    finally:
+        reader.close()
+    return records
+
+
+def simulate_session(scenario, host_poll_ms=1.0, input_backend="keypad", ping_interval=PING_INTERVAL_S):
+    """
+    Run a benchmark scenario in the simulator with pings on the data port
+    and return its session records. Host times are simulator seconds;
+    a report reaches the host at the USB poll after it was sent.
+
+    Returns:
+        (records, bench.analyse() summary of the run, whose latencies run
+        from the physical press in the trace to the HID report)
+    """
+    import bench
+    import simulate
+    import traces
+
+    makers = {make().name: make for make in traces.SCENARIOS}
+    if scenario not in makers:
+        sys.exit(f"Unknown scenario {scenario}; choose from {', '.join(makers)}")
+    trace = makers[scenario]()
+    ping = commands.encode(commands.CMD_PING)
+    step_ms = int(ping_interval * 1000)
+    sends = [(at, ping) for at in range(step_ms, int(trace.duration * 1000) - 500, step_ms)]
+    results = bench.run_trace(trace, "6kro", input_backend, host_poll_ms, sends)
+
+    cdc = bytes.fromhex(results["cdc"])
+    stream = DeviceStream()
+    records = []
+    # Replay the pings and data port writes in time order
+    timeline = [(at, 0, None) for at, _ in sends] + [(at, 1, end) for at, end in results["cdc_writes"]]
+    start = 0
+    for at, kind, end in sorted(timeline):
+        if kind == 0:
+            stream.ping_sent(at / 1000)
+        else:
+            records.extend(stream.feed(cdc[start:end], at / 1000))
+            start = end
+    poll_ms = results["host_poll_ms"]
+    held = set()
+    for at, report_hex in results["reports"]:
+        picked_up = (at // poll_ms + 1) * poll_ms / 1000
+        keys = report_keys(report_hex)
+        for keycode in sorted(keys - held):
+            records.append({"type": "host", "pressed": True, "keycode": keycode, "time": picked_up})
+        for keycode in sorted(held - keys):
+            records.append({"type": "host", "pressed": False, "keycode": keycode, "time": picked_up})
+        held = keys
+
+    simulate.install()
+    keycodes, macro_keycodes = bench.trace_keycodes(trace)
+    summary = bench.analyse(trace, results, keycodes, macro_keycodes)
+    return records, summary
+
+
+def synthetic_session(presses=200, latency_ms=4.0, jitter_ms=1.5, drift_ppm=30.0,
+                      ping_interval=PING_INTERVAL_S, seed=0):
+    """
+    Generate a session with a known latency: each host event follows its
+    device event by latency_ms plus an exponential tail of mean jitter_ms.
+    The device clock starts 30 s before its 2**29 wrap, runs drift_ppm
+    slower than the host and is offset from it at random. Pings are
+    handled up to 20 ms after they are sent, like the firmware's log task.
+    """
+    rng = random.Random(seed)
+    keycodes = (0x13, 0x52, 0x51, 0x50, 0x4F)  # default KEY_CONFIG: P and the arrows
+    device_start_ms = TICKS_PERIOD - 30000
+    offset_s = 1.7e9 + rng.uniform(0, 1e6)
+    rate = 1 + drift_ppm * 1e-6
+
+    def host_time(device_ms):
+        return offset_s + (device_ms - device_start_ms) / 1000 * rate
+
+    records = []
+    t = device_start_ms + 1000.0
+    for _ in range(presses):
+        t += rng.uniform(80, 300)
+        button = rng.randrange(len(keycodes))
+        for pressed, at in ((True, t), (False, t + rng.uniform(40, 120))):
+            arrives = host_time(at) + (latency_ms + rng.expovariate(1 / jitter_ms)) / 1000
+            records.append({
+                "type": "device", "pressed": pressed, "button": button,
+                "keycode": keycodes[button], "device_ms": int(at) % TICKS_PERIOD,
+            })
+            records.append({"type": "host", "pressed": pressed, "keycode": keycodes[button], "time": arrives})
+        t += 150
+    end = t
+    at = device_start_ms + 500.0
+    while at < end:
+        handled = at + rng.uniform(0, 20)
+        records.append({
+            "type": "ping", "sent": host_time(at), "device_ms": int(handled) % TICKS_PERIOD,
+            "received": host_time(handled) + rng.uniform(0.0005, 0.003),
+        })
+        at += ping_interval * 1000
+    return [{
+        "type": "synthetic", "latency_ms": latency_ms, "jitter_ms": jitter_ms, "drift_ppm": drift_ppm,
+    }] + records
+
+
+def write_session(path, records):
+    with open(path, "w") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def read_session(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ClockSync:
+    """
+    Map device time to host time as host = rate * device + offset.
+
+    Every ping reply bounds the line: sent <= host time of the reply's
+    device time (which is truncated to the ms) <= received. The rate and
+    offset are the line with the widest margin inside all the bounds;
+    half that margin is the alignment error. If no line fits (a ping
+    paired with the wrong reply, or clock steps on the host) the line
+    that violates them least is used and `consistent` is False.
+
+    Args:
+        pings: (sent, device seconds, received) for every ping reply
+    """
+
+    def __init__(self, pings):
+        if not pings:
+            raise ValueError("No ping replies in the session; cannot align the clocks")
+        self.pings = pings
+        self.device_zero = pings[0][1]
+        span = pings[-1][1] - pings[0][1]
+        if len(pings) >= 2 and span >= MIN_DRIFT_SPAN_S:
+            low, high = 1 - MAX_DRIFT, 1 + MAX_DRIFT
+            for _ in range(100):
+                a = low + (high - low) / 3
+                b = high - (high - low) / 3
+                if self._margin(a)[0] < self._margin(b)[0]:
+                    low = a
+                else:
+                    high = b
+            self.rate = (low + high) / 2
+        else:
+            self.rate = 1.0
+        margin, self.offset = self._margin(self.rate)
+        self.error = abs(margin)
+        self.consistent = margin >= 0
+
+    def _margin(self, rate):
+        """Return (half the widest margin, centred offset) for a rate."""
+        lower = max(sent - rate * (device + 0.001 - self.device_zero) for sent, device, _ in self.pings)
+        upper = min(received - rate * (device - self.device_zero) for _, device, received in self.pings)
+        return (upper - lower) / 2, (upper + lower) / 2
+
+    def host_time(self, device_s):
+        return self.rate * (device_s - self.device_zero) + self.offset
+
+    @property
+    def drift_ppm(self):
+        return (self.rate - 1) * 1e6
+
+
+def unwrap_device_times(records):
+    """Add "device_s": device_ms unwrapped across the 2**29 wrap, in seconds."""
+    last_ticks = None
+    unwrapped = 0
+    for record in records:
+        if "device_ms" not in record:
+            continue
+        ticks = record["device_ms"]
+        unwrapped = ticks if last_ticks is None else unwrapped + ticks_diff(ticks, last_ticks)
+        last_ticks = ticks
+        record["device_s"] = unwrapped / 1000
+
+
+def match_events(device_events, host_events, sync):
+    """
+    Pair every device press/release with the first unused host event of
+    the same key and direction that follows it within MATCH_WINDOW_S.
+
+    Returns:
+        (list of (device record, latency in ms), unmatched device events,
+        unused host events)
+    """
+    by_key = {}
+    for event in sorted(host_events, key=lambda event: event["time"]):
+        by_key.setdefault((event["keycode"], event["pressed"]), []).append([event, False])
+    slack = sync.error + 0.001
+    matches = []
+    unmatched = 0
+    for event in sorted(device_events, key=lambda event: event["device_s"]):
+        at = sync.host_time(event["device_s"])
+        for candidate in by_key.get((event["keycode"], event["pressed"]), ()):
+            host_event, used = candidate
+            if used or host_event["time"] < at - slack:
+                continue
+            if host_event["time"] > at + MATCH_WINDOW_S:
+                break
+            candidate[1] = True
+            matches.append((event, (host_event["time"] - at) * 1000))
+            break
+        else:
+            unmatched += 1
+    unused = sum(1 for candidates in by_key.values() for _, used in candidates if not used)
+    return matches, unmatched, unused
+
+
+def distribution(latencies):
+    latencies = sorted(latencies)
+    return {
+        "n": len(latencies),
+        "min_ms": latencies[0],
+        "p50_ms": percentile(latencies, 0.5),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": latencies[-1],
+    }
+
+
+def analyse(records):
+    """Align the clocks and return the latency distributions of a session."""
+    unwrap_device_times(records)
+    pings = [(r["sent"], r["device_s"], r["received"]) for r in records if r["type"] == "ping"]
+    pings.sort(key=lambda ping: ping[1])
+    sync = ClockSync(pings)
+    device_events = [r for r in records if r["type"] == "device"]
+    host_events = [r for r in records if r["type"] == "host"]
+    matches, unmatched, unused = match_events(device_events, host_events, sync)
+    summary = {
+        "clock": {
+            "pings": len(pings),
+            "drift_ppm": sync.drift_ppm,
+            "error_ms": sync.error * 1000,
+            "consistent": sync.consistent,
+        },
+        "unmatched_device_events": unmatched,
+        "unmatched_host_events": unused,
+    }
+    for pressed, kind in ((True, "press"), (False, "release")):
+        per_button = {}
+        for event, latency in matches:
+            if event["pressed"] == pressed:
+                per_button.setdefault(event["button"], []).append(latency)
+        table = {}
+        for button in sorted(per_button):
+            name = BUTTON_NAMES[button] if button < len(BUTTON_NAMES) else f"button {button}"
+            table[name] = distribution(per_button[button])
+        if per_button:
+            table["all"] = distribution([value for values in per_button.values() for value in values])
+        summary[kind] = table
+    return summary
+
+
+def print_summary(summary):
+    clock = summary["clock"]
+    print(
+        f"clock: {clock['pings']} pings, drift {clock['drift_ppm']:+.1f} ppm, "
+        f"alignment error +/-{clock['error_ms']:.2f} ms"
+        + ("" if clock["consistent"] else " (pings inconsistent, check the host clock)")
+    )
+    for kind in ("press", "release"):
+        print(f"{kind} latency, device timestamp to host key event (ms):")
+        print(f"  {'button':<12} {'n':>5} {'min':>6} {'p50':>6} {'p95':>6} {'p99':>6} {'max':>6}")
+        for name, row in summary[kind].items():
+            print(
+                f"  {name:<12} {row['n']:>5} {row['min_ms']:>6.2f} {row['p50_ms']:>6.2f} "
+                f"{row['p95_ms']:>6.2f} {row['p99_ms']:>6.2f} {row['max_ms']:>6.2f}"
+            )
+    print(
+        f"unmatched: {summary['unmatched_device_events']} device events, "
+        f"{summary['unmatched_host_events']} host events (key sequences or other keyboards)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="source", required=True)
+    record = sub.add_parser("record", help="record a live controller")
+    record.add_argument("port", help="usb_cdc data serial port, e.g. /dev/ttyACM1")
+    record.add_argument("input", help="the StrataBox's /dev/input/eventN or /dev/hidrawN")
+    record.add_argument("--duration", type=float, default=60.0, help="seconds to record")
+    sim = sub.add_parser("sim", help="run a benchmark scenario in the simulator")
+    sim.add_argument("--scenario", default="taps")
+    sim.add_argument("--host-poll-ms", type=float, default=1.0, help="USB poll interval of the host")
+    sim.add_argument("--input-backend", choices=("keypad", "pio", "matrix", "shift"), default="keypad")
+    synthetic = sub.add_parser("synthetic", help="generate events with a known latency")
+    synthetic.add_argument("--presses", type=int, default=200)
+    synthetic.add_argument("--latency-ms", type=float, default=4.0)
+    synthetic.add_argument("--jitter-ms", type=float, default=1.5)
+    synthetic.add_argument("--drift-ppm", type=float, default=30.0)
+    synthetic.add_argument("--seed", type=int, default=0)
+    analyse_parser = sub.add_parser("analyse", help="analyse a saved session file")
+    analyse_parser.add_argument("session", help="session file (JSON lines)")
+    for source in (record, sim, synthetic):
+        source.add_argument("--session", help="save the session records to this file")
+        source.add_argument("--ping-interval", type=float, default=PING_INTERVAL_S, help="seconds between pings")
+    for source in (record, sim, synthetic, analyse_parser):
+        source.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    if args.source == "record":
+        records = record_session(args.port, args.input, args.duration, args.ping_interval)
+    elif args.source == "sim":
+        records, truth = simulate_session(args.scenario, args.host_poll_ms, args.input_backend, args.ping_interval)
+        print(
+            f"simulator: physical press to HID report p50/p95/max = {truth['latency_p50_ms']:.1f}/"
+            f"{truth['latency_p95_ms']:.1f}/{truth['latency_max_ms']:.1f} ms "
+            f"(the host picks it up within {args.host_poll_ms:g} ms)"
+        )
+    elif args.source == "synthetic":
+        records = synthetic_session(
+            args.presses, args.latency_ms, args.jitter_ms, args.drift_ppm, args.ping_interval, args.seed,
+        )
+        print(
+            f"synthetic: latency {args.latency_ms} ms + exponential tail of mean {args.jitter_ms} ms, "
+            f"drift {args.drift_ppm} ppm"
+        )
+    else:
+        records = read_session(args.session)
+    if args.source != "analyse" and args.session:
+        write_session(args.session, records)
+    try:
+        summary = analyse(records)
+    except ValueError as e:
+        sys.exit(str(e))
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+StrataBox Log Decoder
+Runs on the computer (CPython), not on the Pico. Reads the binary debug
+log that code.py streams over the usb_cdc data port and prints one
+readable line per record.
+
+Usage:
+    python host/decode_log.py /dev/ttyACM1     # live, needs pyserial
+    python host/decode_log.py capture.bin      # recorded stream
+"""
+
+import argparse
+import os
+import sys
+
+# Share the record format and event codes with the firmware
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from stratabox import commands  # noqa: E402
+from stratabox.diagnostics import ringlog  # noqa: E402
+
+
+def open_stream(path):
+    """Open a serial port with pyserial, or a recorded capture file."""
+    if path.startswith(("/dev/", "COM")):
+        try:
+            import serial
+        except ImportError:
+            sys.exit("Reading a serial port needs pyserial: pip install pyserial")
+        return serial.Serial(path, timeout=0.1)
+    return open(path, "rb")
+
+
+def format_record(code, index, timestamp, value):
+    """Return a readable line for one record."""
+    name = ringlog.EVENT_NAMES[code]
+    line = f"{timestamp:>10} ms  {name:<10}"
+    if code in (ringlog.LOG_PRESS, ringlog.LOG_RELEASE, ringlog.LOG_KEYMAP):
+        line += f" button={index} keycode={value}"
+    elif code == ringlog.LOG_COMMAND:
+        status, profile, profile_count = commands.parse_ack(value)
+        line += f" command={index} status={commands.STATUS_NAMES[status]} profile={profile}/{profile_count}"
+    elif code == ringlog.LOG_SCAN_GAP:
+        line += f" max_gap={value} us"
+    elif code == ringlog.LOG_MACRO_DONE:
+        line += f" time={value} us stalls={index}"
+    elif code == ringlog.LOG_SLEEP:
+        line += f" woken_by={index} slept={value} ms"
+    elif code == ringlog.LOG_GC:
+        line += f" pause={value} us"
+    elif code == ringlog.LOG_USAGE:
+        line += f" slot={index} write={value} us"
+    elif code == ringlog.LOG_BOOT_TIME:
+        line += f" first_scan={value} us"
+    elif code in (ringlog.LOG_DROPPED, ringlog.LOG_MACRO):
+        line += f" count={value}"
+    elif code == ringlog.LOG_BOOT:
+        line += f" sos={bool(value & 1)} practice={bool(value & 2)}"
+    return line
+
+
+def run(stream, out=sys.stdout):
+    """Decode records from a stream until it ends."""
+    pending = b""
+    while True:
+        chunk = stream.read(256)
+        if not chunk:
+            # Serial reads time out with no data; files are finished
+            if hasattr(stream, "in_waiting"):
+                continue
+            break
+        pending += chunk
+        records, used = ringlog.decode(pending)
+        pending = pending[used:]
+        for record in records:
+            print(format_record(*record), file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("source", help="usb_cdc data serial port or capture file")
+    args = parser.parse_args()
+    with open_stream(args.source) as stream:
+        try:
+            run(stream)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+StrataBox Keymap Client
+Runs on the computer (CPython), not on the Pico. Switches keymap
+profiles, remaps keys and turns SOS mode on or off on the running
+firmware over the usb_cdc data port, without saving config.py (which
+would make CircuitPython reload).
+
+Usage:
+    python host/keymap_client.py /dev/ttyACM1 --show
+    python host/keymap_client.py /dev/ttyACM1 --profile 1
+    python host/keymap_client.py /dev/ttyACM1 --remap UP=W --remap DOWN=0x16
+    python host/keymap_client.py /dev/ttyACM1 --sos on
+
+Profile 0 is KEY_CONFIG, profile 1 is practice mode (MENU sends R) and
+the KEY_PROFILES from config.py follow. Keys are adafruit_hid Keycode
+names (needs adafruit-circuitpython-hid) or numbers. Buttons are the five
+standard names or button numbers (extra buttons are numbered from 5).
+Needs pyserial: pip install pyserial
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Share the protocol and record format with the firmware
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from stratabox import commands  # noqa: E402
+from stratabox.diagnostics import ringlog  # noqa: E402
+from stratabox.input.buttons import BUTTON_NAMES  # noqa: E402
+
+
+class CommandError(Exception):
+    """The firmware rejected a command."""
+
+
+def send_command(port, command, payload=b"", timeout=2.0):
+    """
+    Send one command frame and wait for its reply record.
+
+    Returns:
+        (profile, profile_count, keymap) where keymap maps button number to
+        keycode for any LOG_KEYMAP records that came with the reply
+    """
+    port.write(commands.encode(command, payload))
+    deadline = time.monotonic() + timeout
+    pending = b""
+    keymap = {}
+    while time.monotonic() < deadline:
+        pending += port.read(256)
+        records, used = ringlog.decode(pending)
+        pending = pending[used:]
+        for code, index, _, value in records:
+            if code == ringlog.LOG_KEYMAP:
+                keymap[index] = value
+            elif code == ringlog.LOG_COMMAND and index in (command, commands.REQUEST_BAD_FRAME):
+                status, profile, profile_count = commands.parse_ack(value)
+                if status != commands.STATUS_OK:
+                    raise CommandError(commands.STATUS_NAMES[status])
+                return profile, profile_count, keymap
+    raise TimeoutError("No reply from the StrataBox")
+
+
+def parse_keycode(text):
+    """Return the keycode for a number or an adafruit_hid Keycode name."""
+    try:
+        return int(text, 0)
+    except ValueError:
+        pass
+    try:
+        from adafruit_hid.keycode import Keycode
+    except ImportError:
+        sys.exit("Key names need adafruit_hid: pip install adafruit-circuitpython-hid")
+    try:
+        return getattr(Keycode, text.upper())
+    except AttributeError:
+        sys.exit(f"Unknown key: {text}")
+
+
+def button_name(index):
+    """Return the name of a button number."""
+    return BUTTON_NAMES[index] if index < len(BUTTON_NAMES) else f"button {index}"
+
+
+def parse_remap(text):
+    """Parse BUTTON=KEY into (button number, keycode)."""
+    button, _, key = text.partition("=")
+    if button.isdigit() and key:
+        return int(button), parse_keycode(key)
+    if button.upper() not in BUTTON_NAMES or not key:
+        sys.exit(f"Expected BUTTON=KEY with BUTTON a number or one of {', '.join(BUTTON_NAMES)}: {text}")
+    return BUTTON_NAMES.index(button.upper()), parse_keycode(key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("port", help="usb_cdc data serial port, e.g. /dev/ttyACM1 or COM4")
+    parser.add_argument("--profile", type=int, help="switch to this keymap profile")
+    parser.add_argument("--remap", action="append", default=[], help="BUTTON=KEY, e.g. UP=W")
+    parser.add_argument("--sos", choices=("on", "off"), help="turn the SOS macro on or off")
+    parser.add_argument("--show", action="store_true", help="print the active keymap")
+    args = parser.parse_args()
+    remaps = [parse_remap(text) for text in args.remap]
+    try:
+        import serial
+    except ImportError:
+        sys.exit("Reading a serial port needs pyserial: pip install pyserial")
+    with serial.Serial(args.port, timeout=0.05) as port:
+        port.reset_input_buffer()
+        try:
+            if args.profile is not None:
+                start = time.monotonic()
+                profile, count, _ = send_command(port, commands.CMD_SELECT_PROFILE, bytes((args.profile,)))
+                elapsed = (time.monotonic() - start) * 1000
+                print(f"Profile {profile} of {count} active ({elapsed:.0f} ms)")
+            for index, keycode in remaps:
+                send_command(port, commands.CMD_REMAP, bytes((index, keycode)))
+                print(f"{button_name(index)} -> keycode {keycode}")
+            if args.sos:
+                send_command(port, commands.CMD_SET_SOS, bytes((args.sos == "on",)))
+                print(f"SOS mode {args.sos}")
+            if args.show:
+                profile, count, keymap = send_command(port, commands.CMD_GET_KEYMAP)
+                print(f"Profile {profile} of {count}:")
+                for index in range(max(len(BUTTON_NAMES), len(keymap))):
+                    print(f"  {button_name(index)}: keycode {keymap.get(index, '?')}")
+        except CommandError as error:
+            sys.exit(f"Command failed: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+StrataBox Stats Query
+Runs on the computer (CPython), not on the Pico. Asks the running
+firmware for its latency histograms over the usb_cdc data port and
+prints them.
+
+Usage:
+    python host/query_stats.py /dev/ttyACM1    # needs pyserial
+"""
+
+import argparse
+import sys
+import time
+
+
+def query(port, timeout=2.0):
+    """Send the stats request and return the report lines."""
+    port.reset_input_buffer()
+    port.write(b"?")
+    deadline = time.monotonic() + timeout
+    lines = []
+    collecting = False
+    buffer = b""
+    while time.monotonic() < deadline:
+        buffer += port.read(256)
+        while b"\n" in buffer:
+            raw, buffer = buffer.split(b"\n", 1)
+            # Binary log records may precede the reply; only look at text lines
+            line = raw.decode("ascii", "ignore").strip()
+            if line.endswith("STATS BEGIN"):
+                collecting = True
+            elif line == "STATS END" and collecting:
+                return lines
+            elif collecting:
+                lines.append(line)
+    raise TimeoutError("No stats reply from the StrataBox")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("port", help="usb_cdc data serial port, e.g. /dev/ttyACM1 or COM4")
+    args = parser.parse_args()
+    try:
+        import serial
+    except ImportError:
+        sys.exit("Reading a serial port needs pyserial: pip install pyserial")
+    with serial.Serial(args.port, timeout=0.1) as port:
+        for line in query(port):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""
+Stand-in for alarm. light_sleep_until_alarms() blocks until a PinAlarm
+pin reaches its value in the simulated trace, like a light sleep.
+"""
+
+import time
+
+import simhw
+from alarm import pin  # noqa: F401
+
+wake_alarm = None
+
+
+def light_sleep_until_alarms(*alarms):
+    global wake_alarm
+    while True:
+        for pin_alarm in alarms:
+            if simhw.pin_level(pin_alarm.pin.name) == pin_alarm.value:
+                wake_alarm = pin_alarm
+                return pin_alarm
+        time.sleep(0.0005)
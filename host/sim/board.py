@@ -0,0 +1,20 @@
+"""Stand-in for the CircuitPython board module (Raspberry Pi Pico pins)."""
+
+
+class Pin:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return "board." + self.name
+
+
+for _number in range(29):
+    globals()["GP%d" % _number] = Pin("GP%d" % _number)
+
+LED = Pin("LED")
+VBUS_SENSE = Pin("VBUS_SENSE")
+SMPS_MODE = Pin("SMPS_MODE")
+A0 = GP26  # noqa: F821
+A1 = GP27  # noqa: F821
+A2 = GP28  # noqa: F821
@@ -0,0 +1,124 @@
+"""
+Stand-in for keypad. A background thread scans the simulated pins at the
+requested interval and queues timestamped events, like the C module does.
+KeyMatrix and ShiftRegisterKeys read simulated keys named KEY0, KEY1, ...
+by key number instead of real pins.
+"""
+
+import threading
+import time
+
+import simhw
+
+
+class Event:
+    def __init__(self, key_number=0, pressed=True, timestamp=None):
+        self.key_number = key_number
+        self.pressed = pressed
+        self.timestamp = timestamp
+
+    @property
+    def released(self):
+        return not self.pressed
+
+
+class EventQueue:
+    def __init__(self, max_events):
+        self._events = []
+        self._max_events = max_events
+        self._lock = threading.Lock()
+        self.overflowed = False
+
+    def _put(self, key_number, pressed):
+        with self._lock:
+            if len(self._events) >= self._max_events:
+                self.overflowed = True
+                return
+            self._events.append((key_number, pressed, simhw.ticks_ms()))
+
+    def get_into(self, event):
+        simhw.record_scan_poll()
+        with self._lock:
+            if not self._events:
+                return False
+            event.key_number, event.pressed, event.timestamp = self._events.pop(0)
+            return True
+
+    def get(self):
+        event = Event()
+        return event if self.get_into(event) else None
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+    def __len__(self):
+        return len(self._events)
+
+    def __bool__(self):
+        return bool(self._events)
+
+
+class _Scanner:
+    def __init__(self, key_count, interval, max_events):
+        self.key_count = key_count
+        self.events = EventQueue(max_events)
+        self._interval = interval
+        self._state = [False] * key_count
+        self._running = True
+        threading.Thread(target=self._scan_loop, daemon=True).start()
+
+    def _read(self, key_number):
+        raise NotImplementedError
+
+    def _scan_loop(self):
+        while self._running:
+            for key_number in range(self.key_count):
+                pressed = self._read(key_number)
+                if pressed != self._state[key_number]:
+                    self._state[key_number] = pressed
+                    self.events._put(key_number, pressed)
+            time.sleep(self._interval)
+
+    def reset(self):
+        self._state = [False] * self.key_count
+
+    def deinit(self):
+        self._running = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.deinit()
+
+
+class Keys(_Scanner):
+    def __init__(self, pins, *, value_when_pressed, pull=True, interval=0.02,
+                 max_events=64, debounce_threshold=1):
+        self._pins = tuple(pins)
+        self._value_when_pressed = value_when_pressed
+        super().__init__(len(self._pins), interval, max_events)
+
+    def _read(self, key_number):
+        return simhw.pin_level(self._pins[key_number].name) == self._value_when_pressed
+
+
+class KeyMatrix(_Scanner):
+    def __init__(self, row_pins, column_pins, *, columns_to_anodes=True, interval=0.02,
+                 max_events=64, debounce_threshold=1):
+        self.row_pins = tuple(row_pins)
+        self.column_pins = tuple(column_pins)
+        super().__init__(len(self.row_pins) * len(self.column_pins), interval, max_events)
+
+    def _read(self, key_number):
+        return not simhw.pin_level("KEY%d" % key_number)
+
+
+class ShiftRegisterKeys(_Scanner):
+    def __init__(self, *, clock, data, latch, value_to_latch=True, key_count,
+                 value_when_pressed, interval=0.02, max_events=64, debounce_threshold=1):
+        super().__init__(key_count, interval, max_events)
+
+    def _read(self, key_number):
+        return not simhw.pin_level("KEY%d" % key_number)
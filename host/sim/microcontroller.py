@@ -0,0 +1,17 @@
+"""Stand-in for microcontroller."""
+
+
+class _Processor:
+    frequency = 125_000_000
+    temperature = 27.0
+    voltage = 3.3
+    uid = bytes(8)
+
+
+cpu = _Processor()
+cpus = (cpu, cpu)
+nvm = bytearray(4096)
+
+
+def reset():
+    raise SystemExit("microcontroller.reset()")
@@ -0,0 +1,91 @@
+"""
+Stand-in for rp2pio that only knows the StrataBox edge capture program
+(stratabox/input/pio_scanner.py). A background thread samples the
+simulated pins and pushes the same words the state machine would: a
+marker bit, the pin levels and a counter that counts down every 1.4 us.
+"""
+
+import collections
+import threading
+import time
+
+import simhw
+
+_FIFO_DEPTH = 4
+_COUNTER_MASK = (1 << 24) - 1
+
+
+class StateMachine:
+    def __init__(self, program, frequency, *, first_in_pin=None, in_pin_count=1,
+                 pull_in_pin_up=0, in_shift_right=True, wrap_target=0, wrap=-1, **kwargs):
+        number = int(first_in_pin.name[2:])
+        self._pin_names = ["GP%d" % (number + offset) for offset in range(in_pin_count)]
+        # Each counter step is 7 state machine cycles
+        self._step_ns = 7 * 1_000_000_000 // frequency
+        self._fifo = collections.deque()
+        self._lock = threading.Lock()
+        self._ring = None
+        self._ring_index = 0
+        self.rxstall = False
+        self._start_ns = time.monotonic_ns()
+        self._running = True
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _levels(self):
+        levels = 0
+        for bit, name in enumerate(self._pin_names):
+            if simhw.pin_level(name):
+                levels |= 1 << bit
+        return levels
+
+    def _run(self):
+        last = None
+        while self._running:
+            levels = self._levels()
+            if levels != last:
+                last = levels
+                steps = (time.monotonic_ns() - self._start_ns) // self._step_ns
+                self._push((1 << 29) | (levels << 24) | ((_COUNTER_MASK - steps) & _COUNTER_MASK))
+            time.sleep(0.0002)
+
+    def _push(self, word):
+        with self._lock:
+            if self._ring is not None:
+                self._ring[self._ring_index] = word
+                self._ring_index = (self._ring_index + 1) % len(self._ring)
+            elif len(self._fifo) < _FIFO_DEPTH:
+                self._fifo.append(word)
+            else:
+                # push noblock drops the word when the FIFO is full
+                self.rxstall = True
+
+    def background_read(self, once=None, *, loop=None, loop2=None, swap=False):
+        with self._lock:
+            self._ring = loop
+            self._ring_index = 0
+            # DMA starts with whatever is already waiting in the FIFO
+            while self._fifo:
+                loop[self._ring_index] = self._fifo.popleft()
+                self._ring_index += 1
+
+    def readinto(self, buffer, *, start=0, end=None, swap=False):
+        end = len(buffer) if end is None else end
+        for index in range(start, end):
+            while True:
+                with self._lock:
+                    if self._fifo:
+                        buffer[index] = self._fifo.popleft()
+                        break
+                time.sleep(0.0001)
+
+    @property
+    def in_waiting(self):
+        return len(self._fifo)
+
+    def clear_rxfifo(self):
+        with self._lock:
+            self._fifo.clear()
+            self.rxstall = False
+
+    def deinit(self):
+        self._running = False
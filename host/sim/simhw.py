@@ -0,0 +1,117 @@
+"""
+Simulated StrataBox hardware shared by the stand-in CircuitPython modules
+in this directory. It holds the scripted button trace, the simulated
+clock and everything the firmware sends to the host.
+"""
+
+import bisect
+import json
+import threading
+import time
+
+_START_NS = time.monotonic_ns()
+
+# CircuitPython starts supervisor.ticks_ms() about a minute before its
+# 2**29 wraparound so wrap bugs show up quickly; do the same here
+TICKS_START = (1 << 29) - 60000
+TICKS_MASK = (1 << 29) - 1
+
+# Pin name -> (sorted change times in ms, pin level after each change)
+_pin_changes = {}
+_lock = threading.Lock()
+
+reports = []          # (ms, report hex) for every send_report
+cdc_output = bytearray()
+cdc_writes = []       # (ms, length of cdc_output) after every data port write
+cdc_requests = []     # (ms, bytes) the host writes to the data port
+scan_polls = 0        # calls to keypad EventQueue.get_into
+scan_first_ms = None
+scan_last_ms = None
+host_poll_ms = 1.0    # USB poll interval of the simulated host
+_ready_ms = 0.0       # when the host has picked up the last report
+
+
+def now_ms():
+    """Milliseconds since the simulation started."""
+    return (time.monotonic_ns() - _START_NS) / 1e6
+
+
+def ticks_ms():
+    """Simulated supervisor.ticks_ms() value."""
+    return (TICKS_START + int(now_ms())) & TICKS_MASK
+
+
+def load_trace(changes, pin_names):
+    """
+    Load a button trace.
+
+    Args:
+        changes: Iterable of (ms, button name, pressed) pin changes
+        pin_names: Dictionary of button name -> board pin name
+    """
+    _pin_changes.clear()
+    for at, button, pressed in sorted(changes, key=lambda change: change[0]):
+        times, levels = _pin_changes.setdefault(pin_names[button], ([], []))
+        times.append(at)
+        # Buttons are active-low: pressed pulls the pin to ground
+        levels.append(not pressed)
+
+
+def pin_level(pin_name):
+    """Level of a pin right now; unwired pins float high on their pull-ups."""
+    changes = _pin_changes.get(pin_name)
+    if not changes:
+        return True
+    times, levels = changes
+    index = bisect.bisect_right(times, now_ms()) - 1
+    return True if index < 0 else levels[index]
+
+
+def wait_host_ready():
+    """Block, like send_report, until the host has polled the previous report."""
+    delay = _ready_ms - now_ms()
+    if delay > 0:
+        time.sleep(delay / 1000)
+
+
+def record_report(report):
+    global _ready_ms
+    at = now_ms()
+    with _lock:
+        reports.append((at, bytes(report).hex()))
+    # The report waits in the endpoint until the host's next poll
+    _ready_ms = (at // host_poll_ms + 1) * host_poll_ms
+
+
+def record_cdc_write(data):
+    with _lock:
+        cdc_output.extend(data)
+        cdc_writes.append((now_ms(), len(cdc_output)))
+
+
+def record_scan_poll():
+    global scan_polls, scan_first_ms, scan_last_ms
+    at = now_ms()
+    scan_polls += 1
+    if scan_first_ms is None:
+        scan_first_ms = at
+    scan_last_ms = at
+
+
+def results():
+    """Everything captured so far, as a JSON-serialisable dictionary."""
+    with _lock:
+        return {
+            "reports": list(reports),
+            "cdc": bytes(cdc_output).hex(),
+            "cdc_writes": list(cdc_writes),
+            "host_poll_ms": host_poll_ms,
+            "scan_polls": scan_polls,
+            "scan_first_ms": scan_first_ms,
+            "scan_last_ms": scan_last_ms,
+        }
+
+
+def write_results(path):
+    with open(path, "w") as f:
+        json.dump(results(), f)
@@ -0,0 +1,13 @@
+"""Stand-in for storage; the simulated filesystem is never remounted."""
+
+
+def remount(mount_path, readonly=False, *, disable_concurrent_write_protection=False):
+    pass
+
+
+def disable_usb_drive():
+    pass
+
+
+def enable_usb_drive():
+    pass
@@ -0,0 +1,18 @@
+"""Stand-in for the CircuitPython supervisor module."""
+
+import simhw
+
+
+def ticks_ms():
+    return simhw.ticks_ms()
+
+
+class runtime:
+    usb_connected = True
+    serial_connected = True
+    serial_bytes_available = 0
+    autoreload = False
+
+
+def reload():
+    raise SystemExit("supervisor.reload()")
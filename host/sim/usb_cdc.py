@@ -0,0 +1,57 @@
+"""
+Stand-in for usb_cdc. Bytes written to the data port are captured in
+simhw.cdc_output, with the time of every write in simhw.cdc_writes;
+bytes in simhw.cdc_requests become readable once the simulated time
+reaches them.
+"""
+
+import simhw
+
+
+class Serial:
+    def __init__(self, capture=False):
+        self.connected = True
+        self.timeout = 1
+        self.write_timeout = None
+        self._capture = capture
+        self._input = bytearray()
+
+    def _deliver(self):
+        now = simhw.now_ms()
+        while simhw.cdc_requests and simhw.cdc_requests[0][0] <= now:
+            self._input.extend(simhw.cdc_requests.pop(0)[1])
+
+    @property
+    def in_waiting(self):
+        self._deliver()
+        return len(self._input)
+
+    def read(self, size=1):
+        self._deliver()
+        data = bytes(self._input[:size])
+        del self._input[:size]
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def write(self, data):
+        if self._capture:
+            simhw.record_cdc_write(data)
+        return len(data)
+
+    def reset_input_buffer(self):
+        self._input.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+
+console = Serial()
+data = Serial(capture=True)
+
+
+def enable(console=True, data=False):
+    pass
@@ -0,0 +1,45 @@
+"""
+Stand-in for usb_hid. Reports sent to a device are captured with a
+timestamp in simhw.reports. As on the device, send_report waits until
+the host has polled the previous report (every simhw.host_poll_ms). The device list matches what boot.py enables;
+simulate.py replaces it for NKRO runs.
+"""
+
+import simhw
+
+
+class Device:
+    def __init__(self, *, report_descriptor=b"", usage_page=0x01, usage=0x06,
+                 report_ids=(0,), in_report_lengths=(8,), out_report_lengths=(0,)):
+        self.report_descriptor = report_descriptor
+        self.usage_page = usage_page
+        self.usage = usage
+        self.in_report_length = in_report_lengths[0]
+
+    def send_report(self, report, report_id=None):
+        if len(report) != self.in_report_length:
+            raise ValueError("Buffer incorrect size. Should be %d bytes." % self.in_report_length)
+        simhw.wait_host_ready()
+        simhw.record_report(report)
+
+    def get_last_received_report(self, report_id=None):
+        return None
+
+
+Device.KEYBOARD = Device()
+
+devices = (Device.KEYBOARD,)
+
+
+def enable(new_devices, boot_device=0):
+    global devices
+    devices = tuple(new_devices)
+
+
+def disable():
+    global devices
+    devices = ()
+
+
+def get_boot_device():
+    return 0
@@ -0,0 +1,173 @@
+"""
+StrataBox Host Simulator
+Runs the unmodified firmware (code.py, or another script such as
+button_test.py) on the computer with CPython. The stand-in modules in
+host/sim replace board, digitalio, keypad, usb_hid, usb_cdc and the other
+CircuitPython modules: button pins follow a scripted trace and every HID
+report is captured with a timestamp.
+
+Usage:
+    python host/simulate.py trace.json --duration 5 --output result.json
+
+A trace is a JSON list of [ms, button name, pressed] pin changes, for
+example [[1000, "UP", true], [1080, "UP", false]]. Button names are the
+ones used in config.py (MENU, UP, DOWN, LEFT, RIGHT and any extra
+buttons in KEY_CONFIG).
+
+Needs the adafruit_hid library: pip install adafruit-circuitpython-hid
+"""
+
+import argparse
+import ast
+import gc
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+
+HOST_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(HOST_DIR)
+SIM_DIR = os.path.join(HOST_DIR, "sim")
+
+
+def install():
+    """Put the stand-in modules and the firmware on the import path."""
+    for path in (REPO_DIR, SIM_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    # MicroPython's gc has a few functions CPython's lacks
+    if not hasattr(gc, "mem_free"):
+        gc.mem_free = lambda: 150_000
+        gc.mem_alloc = lambda: 50_000
+
+
+# Wiring used for the matrix and shift backends when config.py has none
+SIM_WIRING = {
+    "ROW_PINS": ("GP2", "GP3", "GP4", "GP5", "GP6"),
+    "COLUMN_PINS": ("GP7", "GP8", "GP9", "GP10", "GP11", "GP12"),
+    "CLOCK_PIN": "GP10",
+    "DATA_PIN": "GP11",
+    "LATCH_PIN": "GP12",
+    "KEY_COUNT": 32,
+}
+
+
+def sim_wiring():
+    """Return SIM_WIRING with pin names replaced by board pins."""
+    import board
+
+    wiring = {}
+    for name, value in SIM_WIRING.items():
+        if isinstance(value, str):
+            value = getattr(board, value)
+        elif isinstance(value, tuple):
+            value = tuple(getattr(board, pin) for pin in value)
+        wiring[name] = value
+    return wiring
+
+
+def button_pins():
+    """
+    Return button name -> simulated pin name: the board pin from
+    PIN_CONFIG, or KEYn for buttons on a key matrix or shift register.
+    """
+    install()
+    from stratabox import config
+    from stratabox.input.buttons import ButtonTable
+
+    buttons = ButtonTable(config.PIN_CONFIG, config.KEY_CONFIG, config.KEY_NUMBERS)
+    if config.INPUT_BACKEND in ("matrix", "shift"):
+        return {name: "KEY%d" % buttons.key_numbers[index] for index, name in enumerate(buttons.names)}
+    return {name: buttons.pins[index].name for index, name in enumerate(buttons.names)}
+
+
+def run(changes, duration, output=None, script="code.py", hid_mode="6kro", cdc_requests=(),
+        input_backend=None, host_poll_ms=1.0, settings=None):
+    """
+    Run a firmware script against a trace for `duration` seconds, write the
+    captured results to `output` and exit the process.
+
+    Args:
+        changes: List of (ms, button name, pressed) pin changes
+        duration: Seconds to run before stopping the firmware
+        output: Path of the JSON results file, or None
+        script: Firmware script to run, relative to the repository root
+        hid_mode: "6kro" or "nkro", the keyboard boot.py would have enabled
+        cdc_requests: (ms, bytes) written by the host to the usb_cdc data port
+        input_backend: Overrides INPUT_BACKEND from config.py ("keypad" or "pio")
+        host_poll_ms: USB poll interval of the simulated host
+        settings: Dictionary of stratabox.config settings to override
+    """
+    install()
+    import simhw
+    import usb_hid
+    import stratabox.config
+
+    if input_backend:
+        stratabox.config.INPUT_BACKEND = input_backend
+    for name, value in (settings or {}).items():
+        setattr(stratabox.config, name, value)
+    if stratabox.config.INPUT_BACKEND in ("matrix", "shift") and not stratabox.config.INPUT_WIRING:
+        stratabox.config.INPUT_WIRING = sim_wiring()
+    simhw.load_trace(changes, button_pins())
+    simhw.cdc_requests.extend(sorted(cdc_requests))
+    simhw.host_poll_ms = host_poll_ms
+    if hid_mode == "nkro":
+        usb_hid.devices = (usb_hid.Device(in_report_lengths=(14,)),)
+        stratabox.config.HID_MODE = "nkro"
+
+    def stop():
+        time.sleep(duration)
+        if output:
+            simhw.write_results(output)
+        sys.stdout.flush()
+        os._exit(0)
+
+    threading.Thread(target=stop, daemon=True).start()
+    runpy.run_path(os.path.join(REPO_DIR, script), run_name="__main__")
+    # The script finished on its own
+    time.sleep(duration + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run StrataBox firmware on the computer")
+    parser.add_argument("trace", help="JSON trace of [ms, button, pressed] changes")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds to run")
+    parser.add_argument("--output", help="write captured reports to this JSON file")
+    parser.add_argument("--script", default="code.py", help="firmware script to run")
+    parser.add_argument("--hid-mode", choices=("6kro", "nkro"), default="6kro")
+    parser.add_argument(
+        "--input-backend", choices=("keypad", "pio", "matrix", "shift"), help="override INPUT_BACKEND",
+    )
+    parser.add_argument("--host-poll-ms", type=float, default=1.0, help="USB poll interval of the host")
+    parser.add_argument(
+        "--set", action="append", default=[], metavar="NAME=VALUE",
+        help="override a config.py setting, e.g. SLEEP_AFTER=1",
+    )
+    parser.add_argument(
+        "--query-at", type=float, action="append", default=[],
+        help="send a stats query ('?') on the data port at this ms",
+    )
+    parser.add_argument(
+        "--send", action="append", default=[], metavar="MS:HEX",
+        help="write these bytes (hex) to the data port at this ms, e.g. a command frame",
+    )
+    args = parser.parse_args()
+    with open(args.trace) as f:
+        changes = json.load(f)
+    requests = [(at, b"?") for at in args.query_at]
+    for item in args.send:
+        at, _, data = item.partition(":")
+        requests.append((float(at), bytes.fromhex(data)))
+    settings = {}
+    for item in args.set:
+        name, _, value = item.partition("=")
+        settings[name] = ast.literal_eval(value)
+    run(changes, args.duration, args.output, args.script, args.hid_mode, requests, args.input_backend,
+        args.host_poll_ms, settings)
+
+
+if __name__ == "__main__":
+    main()
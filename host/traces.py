@@ -0,0 +1,188 @@
+"""
+StrataBox Synthetic Traces
+Builds scripted button traces for host/simulate.py, including contact
+bounce noise, together with the keystrokes each trace should produce.
+"""
+
+import random
+
+DIRECTIONS = ("UP", "DOWN", "LEFT", "RIGHT")
+
+# Presses start after the firmware's startup (boot-mode detection window)
+FIRST_PRESS_MS = 1000
+
+
+class Trace:
+    """
+    A list of pin changes plus the presses a perfect controller reports.
+
+    Args:
+        name: Scenario name used in benchmark output
+        seed: Random seed, so every run of a scenario is identical
+    """
+
+    def __init__(self, name, seed=0):
+        self.name = name
+        self.changes = []       # (ms, button, pressed)
+        self.presses = []       # (ms, button) of each physical press
+        self.boot_held = []     # buttons held from power-up
+        self.macro = ()         # button names the SOS macro should send
+        self.settings = {}      # config.py settings the scenario runs with
+        self.end_ms = FIRST_PRESS_MS
+        self.rng = random.Random(seed)
+
+    def _edge(self, button, at, pressed, bounce_ms):
+        # Bouncing contacts toggle a few times before settling
+        if bounce_ms:
+            toggles = self.rng.randint(1, 3) * 2
+            for i in range(toggles):
+                offset = bounce_ms * i / toggles
+                self.changes.append((at + offset, button, pressed if i % 2 == 0 else not pressed))
+            at += bounce_ms
+        self.changes.append((at, button, pressed))
+
+    def tap(self, button, at, hold_ms, bounce_ms=0.0):
+        """Press a button at `at` ms and release it `hold_ms` later."""
+        self._edge(button, at, True, bounce_ms)
+        self._edge(button, at + hold_ms, False, bounce_ms)
+        self.presses.append((at, button))
+        self.end_ms = max(self.end_ms, at + hold_ms + bounce_ms)
+
+    def hold_at_boot(self, button, release_ms):
+        """Hold a button from power-up, for the SOS and practice boot modes."""
+        self.changes.append((0, button, True))
+        self.changes.append((release_ms, button, False))
+        self.boot_held.append(button)
+
+    @property
+    def duration(self):
+        """Seconds to run the simulation for this trace."""
+        return (self.end_ms + 1000) / 1000
+
+
+def taps(count=40, hold_ms=80, gap_ms=120, seed=1):
+    trace = Trace("taps", seed)
+    at = FIRST_PRESS_MS
+    for _ in range(count):
+        trace.tap(trace.rng.choice(DIRECTIONS), at, hold_ms)
+        at += hold_ms + gap_ms
+    return trace
+
+
+def fast_taps(count=60, hold_ms=25, gap_ms=35, seed=2):
+    trace = taps(count, hold_ms, gap_ms, seed)
+    trace.name = "fast_taps"
+    return trace
+
+
+def bouncy(count=40, hold_ms=70, gap_ms=90, max_bounce_ms=4.0, seed=3):
+    trace = Trace("bouncy", seed)
+    at = FIRST_PRESS_MS
+    for _ in range(count):
+        bounce = trace.rng.uniform(0.5, max_bounce_ms)
+        trace.tap(trace.rng.choice(DIRECTIONS), at, hold_ms, bounce)
+        at += hold_ms + gap_ms + bounce
+    return trace
+
+
+def chords(count=20, hold_ms=120, gap_ms=150, seed=4):
+    trace = Trace("chords", seed)
+    at = FIRST_PRESS_MS
+    for _ in range(count):
+        first, second = trace.rng.sample(DIRECTIONS, 2)
+        trace.tap(first, at, hold_ms)
+        trace.tap(second, at + trace.rng.uniform(0, 3), hold_ms)
+        at += hold_ms + gap_ms
+    return trace
+
+
+def zero_window(count=40, hold_ms=60, gap_ms=80, seed=10):
+    """DEBOUNCE_TIME = 0 with each algorithm on its own button; no key may stick."""
+    trace = Trace("zero_window", seed)
+    trace.settings = {
+        "DEBOUNCE_TIME": 0,
+        "DEBOUNCE_MODE": "eager",
+        "DEBOUNCE_CONFIG": {"DOWN": ("integrator", 0), "LEFT": ("defer", 0)},
+    }
+    at = FIRST_PRESS_MS
+    for _ in range(count):
+        trace.tap(trace.rng.choice(("UP", "DOWN", "LEFT")), at, hold_ms)
+        at += hold_ms + gap_ms
+    return trace
+
+
+def holds(count=8, seed=5):
+    trace = Trace("holds", seed)
+    at = FIRST_PRESS_MS
+    for _ in range(count):
+        hold = trace.rng.uniform(300, 600)
+        trace.tap(trace.rng.choice(DIRECTIONS), at, hold)
+        at += hold + 150
+    return trace
+
+
+def sos(seed=6):
+    """UP held at boot enables SOS mode; three MENU taps play the macro."""
+    trace = Trace("sos", seed)
+    trace.hold_at_boot("UP", 800)
+    at = FIRST_PRESS_MS + 500
+    for _ in range(3):
+        trace.tap("MENU", at, 60, 1.5)
+        at += 150
+    trace.macro = ("UP", "DOWN", "RIGHT", "LEFT", "UP")
+    trace.end_ms = at + 1000
+    return trace
+
+
+def sleep_wake(seed=7):
+    """Presses after idle back-off and after light sleep, including a very short tap."""
+    trace = Trace("sleep_wake", seed)
+    trace.settings = {"ACTIVE_TIME": 0.1, "SLEEP_AFTER": 0.8}
+    at = FIRST_PRESS_MS
+    trace.tap("UP", at, 80)
+    # Idle back-off, but not yet asleep
+    at += 500
+    trace.tap("LEFT", at, 80)
+    # Asleep: a normal press and one released before scanning restarts
+    at += 1500
+    trace.tap("DOWN", at, 80, 1.0)
+    at += 1500
+    trace.tap("RIGHT", at, 4)
+    return trace
+
+
+def sleep_wake_matrix(seed=9):
+    """
+    The sleep_wake timing on a key matrix, which must stay out of light
+    sleep: its pins cannot wake the controller, so every press has to be
+    seen by the idle scan.
+    """
+    trace = Trace("sleep_wake_matrix", seed)
+    trace.settings = {"ACTIVE_TIME": 0.1, "SLEEP_AFTER": 0.8, "INPUT_BACKEND": "matrix"}
+    at = FIRST_PRESS_MS
+    for button in ("UP", "LEFT", "DOWN", "RIGHT"):
+        trace.tap(button, at, 80)
+        at += 1500
+    return trace
+
+
+def wide(count=60, hold_ms=60, gap_ms=40, seed=8):
+    """24 buttons on a key matrix: five standard ones and 19 extra slots sending letters."""
+    trace = Trace("wide", seed)
+    key_config = {"MENU_KEY": 0x13, "UP_KEY": 0x52, "DOWN_KEY": 0x51, "LEFT_KEY": 0x50, "RIGHT_KEY": 0x4F}
+    # A-T except P, which MENU sends
+    letters = [keycode for keycode in range(0x04, 0x18) if keycode != 0x13]
+    for slot, keycode in enumerate(letters):
+        key_config[f"SLOT{slot + 1:02}_KEY"] = keycode
+    trace.settings = {"INPUT_BACKEND": "matrix", "KEY_CONFIG": key_config}
+    names = [key[:-len("_KEY")] for key in key_config]
+    at = FIRST_PRESS_MS
+    for _ in range(count):
+        first, second = trace.rng.sample(names, 2)
+        trace.tap(first, at, hold_ms)
+        trace.tap(second, at + trace.rng.uniform(0, 20), hold_ms)
+        at += hold_ms + gap_ms
+    return trace
+
+
+SCENARIOS = (taps, fast_taps, bouncy, chords, zero_window, holds, sos, sleep_wake, sleep_wake_matrix, wide)
@@ -0,0 +1,79 @@
+"""
+StrataBox Import Benchmark
+Measures how long each firmware module takes to import and how much heap
+it keeps, so the .py sources can be compared with the .mpy bytecode built
+by host/build_mpy.py. Run it from the REPL with `import import_benchmark`
+(after a soft reset, so nothing is imported yet), once with the .py files
+on the drive and once with the .mpy build.
+"""
+
+import gc
+import sys
+import time
+
+# Firmware modules in the order code.py imports them, so each one is
+# measured without the modules it depends on
+MODULES = (
+    "asyncio",
+    "adafruit_hid.keycode",
+    "stratabox.config",
+    "stratabox.input.buttons",
+    "stratabox.input.scanner",
+    "stratabox.input.matrix",
+    "stratabox.input.debounce",
+    "stratabox.output.keystate",
+    "stratabox.output.hid_report",
+    "stratabox.output.led",
+    "stratabox.keymap",
+    "stratabox.diagnostics.latency",
+    "stratabox.diagnostics.ringlog",
+    "stratabox.diagnostics.usage",
+    "stratabox.runtime",
+    "stratabox.power",
+    "stratabox.memory",
+    "stratabox.commands",
+    "stratabox.diagnostics.linestream",
+    "stratabox.diagnostics.query",
+    "stratabox.diagnostics.report",
+    "stratabox.gestures",
+)
+
+
+def measure(name):
+    """
+    Import one module and print its import time and the heap it kept.
+
+    Returns:
+        (microseconds, bytes) for the import
+    """
+    if name in sys.modules:
+        print(f"{name}: already imported")
+        return 0, 0
+    gc.collect()
+    free_before = gc.mem_free()
+    start = time.monotonic_ns()
+    __import__(name)
+    elapsed_us = (time.monotonic_ns() - start) // 1000
+    gc.collect()
+    used = free_before - gc.mem_free()
+    path = getattr(sys.modules[name], "__file__", "built in")
+    print(f"{name}: {elapsed_us} us, {used} bytes ({path})")
+    return elapsed_us, used
+
+
+def run():
+    print("=== StrataBox import benchmark ===")
+    gc.collect()
+    print(f"Free heap before: {gc.mem_free()} bytes")
+    total_us = 0
+    total_bytes = 0
+    for name in MODULES:
+        elapsed_us, used = measure(name)
+        total_us += elapsed_us
+        total_bytes += used
+    gc.collect()
+    print(f"Free heap after: {gc.mem_free()} bytes")
+    print(f"Total: {total_us} us, {total_bytes} bytes")
+
+
+run()
@@ -0,0 +1,18 @@
+"""
+StrataBox Firmware Package
+The modules behind code.py, grouped by what they do:
+
+- stratabox.config: settings from config.py, with defaults
+- stratabox.input: button table, background scanning and debouncing
+- stratabox.output: held-key state, HID keyboard reports and the status LED
+- stratabox.diagnostics: debug log, timing statistics, usage counters and reports
+- stratabox.keymap: button -> keycode table and its profiles
+- stratabox.runtime: helpers shared by the asyncio tasks
+- stratabox.power: idle scan back-off and light sleep
+- stratabox.memory: garbage collection in idle windows
+- stratabox.commands: data port command protocol, imported on first use
+- stratabox.gestures: SOS mode gestures, only imported when it is turned on
+
+Nothing is imported here, so scripts only load (and spend RAM on) the
+modules they actually use.
+"""
@@ -0,0 +1,149 @@
+"""
+StrataBox Command Protocol
+Small binary protocol on the usb_cdc data port for changing the keymap
+and modes of the running firmware without a file write (which would make
+CircuitPython reload). host/keymap_client.py is the computer side.
+
+Host -> device frame:
+    magic (0x5A), command, payload length, payload, checksum
+The checksum is the sum of the command, length and payload bytes, modulo
+256. A single "?" byte (outside a frame) still requests the statistics
+text from stratabox.diagnostics.query.
+
+Device -> host: every frame is answered with a LOG_COMMAND record in the
+debug log stream (see ringlog), so replies arrive in order with the other
+records and decode_log.py shows them too.
+
+This module has no CircuitPython dependencies so the host client can
+import it.
+"""
+
+CMD_MAGIC = 0x5A
+MAX_PAYLOAD = 16
+
+# Requests returned by CommandReader.poll() that are not frame commands.
+# Their ids are reserved in the command space: a frame carrying one is
+# answered as a bad frame, so acks with index REQUEST_BAD_FRAME can never
+# be mistaken for the reply to a real command.
+REQUEST_NONE = 0
+REQUEST_STATS = 0x3F    # "?"
+REQUEST_BAD_FRAME = 0xFF
+RESERVED_COMMANDS = (REQUEST_NONE, REQUEST_STATS, REQUEST_BAD_FRAME)
+
+# Commands
+CMD_SELECT_PROFILE = 1  # payload: profile number
+CMD_REMAP = 2           # payload: button number, keycode
+CMD_GET_KEYMAP = 3      # no payload; one LOG_KEYMAP record per button
+CMD_SET_SOS = 4         # payload: 1 to enable the SOS macro, 0 to disable
+CMD_DIAGNOSTICS = 5     # no payload; streams the diagnostics report (see
+                        # stratabox.diagnostics.report) after the reply
+CMD_PING = 6            # no payload; the reply's timestamp is the device clock
+                        # when the ping was handled (host clock alignment)
+
+# Status in the low byte of a LOG_COMMAND record value. The next bytes
+# hold the active profile number and the number of profiles.
+STATUS_OK = 0
+STATUS_BAD_FRAME = 1
+STATUS_UNKNOWN_COMMAND = 2
+STATUS_BAD_ARGUMENT = 3
+STATUS_NAMES = ("ok", "bad frame", "unknown command", "bad argument")
+
+
+def checksum(command, payload):
+    """Return the frame checksum of a command and its payload."""
+    total = command + len(payload)
+    for byte in payload:
+        total += byte
+    return total & 0xFF
+
+
+def encode(command, payload=b""):
+    """Return a complete frame as bytes (used by the host client)."""
+    if command in RESERVED_COMMANDS:
+        raise ValueError(f"Command id {command} is reserved")
+    return bytes((CMD_MAGIC, command, len(payload))) + bytes(payload) + bytes((checksum(command, payload),))
+
+
+def ack_value(status, profile, profile_count):
+    """Pack the value of a LOG_COMMAND reply record."""
+    return status | (profile << 8) | (profile_count << 16)
+
+
+def parse_ack(value):
+    """Unpack a LOG_COMMAND value into (status, profile, profile_count)."""
+    return value & 0xFF, (value >> 8) & 0xFF, (value >> 16) & 0xFF
+
+
+class CommandReader:
+    """
+    Collect bytes from the data port and split them into requests.
+    Partial frames are kept until the rest arrives; bytes that cannot
+    start a request are skipped.
+
+    Args:
+        port: usb_cdc.data
+    """
+
+    def __init__(self, port):
+        self.port = port
+        self.buffer = bytearray(2 * (MAX_PAYLOAD + 4))
+        self.view = memoryview(self.buffer)
+        self.used = 0
+        # Payload of the last command returned by poll()
+        self.payload = bytearray(MAX_PAYLOAD)
+        self.length = 0
+
+    def _consume(self, count):
+        self.used -= count
+        self.buffer[:self.used] = self.view[count:count + self.used]
+
+    def _fill(self):
+        waiting = self.port.in_waiting
+        space = len(self.buffer) - self.used
+        if waiting and space:
+            data = self.port.read(min(waiting, space))
+            self.buffer[self.used:self.used + len(data)] = data
+            self.used += len(data)
+
+    def poll(self):
+        """
+        Read any waiting bytes and return the next complete request:
+        REQUEST_STATS, a command (payload in self.payload[:self.length]),
+        REQUEST_BAD_FRAME, or REQUEST_NONE if nothing is complete yet.
+        """
+        self._fill()
+        buffer = self.buffer
+        while self.used:
+            first = buffer[0]
+            if first == REQUEST_STATS:
+                self._consume(1)
+                return REQUEST_STATS
+            if first != CMD_MAGIC:
+                self._consume(1)
+                continue
+            if self.used < 3:
+                return REQUEST_NONE
+            command = buffer[1]
+            length = buffer[2]
+            if length > MAX_PAYLOAD:
+                self._consume(1)
+                return REQUEST_BAD_FRAME
+            end = 3 + length + 1
+            if self.used < end:
+                return REQUEST_NONE
+            total = command + length
+            for i in range(3, 3 + length):
+                total += buffer[i]
+            if total & 0xFF != buffer[end - 1]:
+                # Resynchronise on the next magic byte
+                self._consume(1)
+                return REQUEST_BAD_FRAME
+            if command in RESERVED_COMMANDS:
+                self._consume(end)
+                return REQUEST_BAD_FRAME
+            for i in range(length):
+                self.payload[i] = buffer[3 + i]
+            self.length = length
+            self._consume(end)
+            return command
+        return REQUEST_NONE
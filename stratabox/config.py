@@ -0,0 +1,107 @@
+"""
+StrataBox Settings
+Loads the user's config.py and fills in a default for every setting it
+does not define, so config.py only needs the lines a user wants to change
+and every script sees the same values.
+
+Usage:
+    from stratabox import config
+    interval = config.SCAN_INTERVAL
+"""
+
+# Try to import config, use defaults if not available
+try:
+    import config as _user_config
+except ImportError:
+    _user_config = None
+
+
+def _setting(name, default):
+    """Return a setting from config.py, or the default if it is not defined."""
+    return getattr(_user_config, name, default)
+
+
+PIN_CONFIG = _setting("PIN_CONFIG", None)
+if PIN_CONFIG is None:
+    import board
+
+    PIN_CONFIG = {
+        "MENU_BTN_PIN": board.GP15,
+        "UP_BTN_PIN": board.GP16,
+        "DOWN_BTN_PIN": board.GP17,
+        "LEFT_BTN_PIN": board.GP18,
+        "RIGHT_BTN_PIN": board.GP19,
+    }
+
+KEY_CONFIG = _setting("KEY_CONFIG", None)
+if KEY_CONFIG is None:
+    from adafruit_hid.keycode import Keycode
+
+    KEY_CONFIG = {
+        "MENU_KEY": Keycode.P,
+        "UP_KEY": Keycode.UP_ARROW,
+        "DOWN_KEY": Keycode.DOWN_ARROW,
+        "LEFT_KEY": Keycode.LEFT_ARROW,
+        "RIGHT_KEY": Keycode.RIGHT_ARROW,
+    }
+
+# Debouncing
+DEBOUNCE_TIME = _setting("DEBOUNCE_TIME", 0.01)
+DEBOUNCE_MODE = _setting("DEBOUNCE_MODE", "eager")
+DEBOUNCE_CONFIG = _setting("DEBOUNCE_CONFIG", {})
+# Per-button windows measured by button_test.py's calibration mode
+try:
+    from debounce_calibration import DEBOUNCE_WINDOWS
+except ImportError:
+    DEBOUNCE_WINDOWS = {}
+
+# Seconds button_test.py records edges for in calibration mode
+CALIBRATION_TIME = _setting("CALIBRATION_TIME", 20)
+
+# Feedback
+LED_ENABLED = _setting("LED_ENABLED", True)
+PRINT_DEBUG = _setting("PRINT_DEBUG", True)
+
+# Scanning
+INPUT_BACKEND = _setting("INPUT_BACKEND", "keypad")
+# Key matrix or shift register wiring, see stratabox.input.matrix
+INPUT_WIRING = _setting("INPUT_WIRING", {})
+KEY_NUMBERS = _setting("KEY_NUMBERS", {})
+SCAN_INTERVAL = _setting("SCAN_INTERVAL", 0.005)
+LOOP_INTERVAL = _setting("LOOP_INTERVAL", 0.001)
+# Scan rate back-off and light sleep while idle, see stratabox.power
+ACTIVE_TIME = _setting("ACTIVE_TIME", 2.0)
+IDLE_LOOP_INTERVAL = _setting("IDLE_LOOP_INTERVAL", 0.02)
+SLEEP_AFTER = _setting("SLEEP_AFTER", 600)
+
+# Keymap profiles that can be selected at runtime, see stratabox.keymap
+KEY_PROFILES = _setting("KEY_PROFILES", ())
+
+# Gestures played in SOS mode, see stratabox.gestures; None for the SOS macro
+GESTURES = _setting("GESTURES", None)
+TAP_TIMEOUT = _setting("TAP_TIMEOUT", 1.0)
+COMBO_WINDOW = _setting("COMBO_WINDOW", 0.05)
+
+# Diagnostics
+LOG_CAPACITY = _setting("LOG_CAPACITY", 128)
+# Lifetime usage counters kept in nvm, see stratabox.diagnostics.usage
+USAGE_FLUSH_INTERVAL = _setting("USAGE_FLUSH_INTERVAL", 600)
+USAGE_FLUSH_PRESSES = _setting("USAGE_FLUSH_PRESSES", 500)
+
+# Garbage collection scheduling, see stratabox.memory
+GC_MODE = _setting("GC_MODE", "idle")
+GC_IDLE_MS = _setting("GC_IDLE_MS", 50)
+GC_MIN_ALLOC = _setting("GC_MIN_ALLOC", 4096)
+
+# Keyboard report format: "6kro" (boot keyboard) or "nkro" (bitmap)
+HID_MODE = _setting("HID_MODE", "6kro")
+# Shortest time between the reports of a played key sequence
+REPORT_INTERVAL = _setting("REPORT_INTERVAL", 0.001)
+
+# Startup
+FAST_BOOT = _setting("FAST_BOOT", True)
+BOOT_BUDGET_MS = _setting("BOOT_BUDGET_MS", 300)
+BOOT_SAMPLE_MS = _setting("BOOT_SAMPLE_MS", 50)
+
+if _user_config is None and PRINT_DEBUG:
+    print("No config.py found, using default settings")
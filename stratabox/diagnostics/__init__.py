@@ -0,0 +1,8 @@
+"""
+StrataBox Diagnostics
+Debug log (ringlog), timing statistics (latency), lifetime usage
+counters saved in nvm (usage), the data port query handler (query), the
+streamed diagnostics report (report) and the chunked writer both answers
+use (linestream). Only ringlog, latency and usage are used on the hot
+path; the others are imported the first time the host asks for them.
+"""
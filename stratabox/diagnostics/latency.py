@@ -0,0 +1,242 @@
+"""
+StrataBox Latency Instrumentation
+Always-on timing statistics for the firmware, kept in fixed-bucket
+histograms so recording a sample never allocates a new bucket:
+
+- scan loop period: time between consecutive scan task iterations
+- report latency: time from the scan task seeing a button change to the
+  HID report carrying it being sent
+- stall: the worst scan loop period in each stats interval
+- sequence time: time to play a queued key sequence, from taking it off
+  the queue to the report releasing its last key
+- send errors: HID reports that failed and were retried
+- wake latency: time from a press to the scan loop handling it, for each
+  scan mode (active, idle back-off, light sleep; see stratabox.power)
+- garbage collection: pause of every scheduled collection, how many
+  automatic ones happened anyway and the lowest free heap seen
+  (see stratabox.memory)
+
+Times are measured with time.monotonic_ns() and stored in microseconds.
+"""
+
+import gc
+import time
+from array import array
+
+# Upper bounds (exclusive) of the histogram buckets in microseconds.
+# The last bucket holds everything at or above the last bound.
+BUCKET_BOUNDS_US = (125, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+# Key sequences take a report interval or more per key change
+SEQUENCE_BOUNDS_US = (5000, 10000, 20000, 40000, 80000, 160000, 320000)
+# Sample counts saturate at the largest MicroPython small int, so counting
+# never allocates however long the controller runs (about 12 days of
+# loop_period samples at 1 kHz)
+COUNT_MAX = (1 << 30) - 1
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram of microsecond values. Counts stop at COUNT_MAX;
+    the maximum keeps being tracked.
+
+    Args:
+        name: Name used in reports
+        bounds: Exclusive upper bounds of the buckets
+    """
+
+    def __init__(self, name, bounds=BUCKET_BOUNDS_US):
+        self.name = name
+        self.bounds = bounds
+        self.counts = array("L", [0] * (len(bounds) + 1))
+        self.count = 0
+        self.max = 0
+
+    def add(self, value_us):
+        """Record one sample."""
+        bounds = self.bounds
+        bucket = 0
+        while bucket < len(bounds) and value_us >= bounds[bucket]:
+            bucket += 1
+        if self.count < COUNT_MAX:
+            self.counts[bucket] += 1
+            self.count += 1
+        if value_us > self.max:
+            self.max = value_us
+
+    def reset(self):
+        """Clear all samples."""
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.count = 0
+        self.max = 0
+
+    def format(self):
+        """Return the histogram as a single line of text."""
+        parts = [f"{self.name}: n={self.count} max={self.max}us"]
+        for i, bound in enumerate(self.bounds):
+            if self.counts[i]:
+                parts.append(f"<{bound}:{self.counts[i]}")
+        if self.counts[-1]:
+            parts.append(f">={self.bounds[-1]}:{self.counts[-1]}")
+        return " ".join(parts)
+
+
+class LatencyStats:
+    """Timing instrumentation shared by the firmware tasks."""
+
+    def __init__(self):
+        self.loop_period = Histogram("loop_period")
+        self.report_latency = Histogram("report_latency")
+        self.stall = Histogram("interval_stall")
+        self.sequence_time = Histogram("sequence_time", SEQUENCE_BOUNDS_US)
+        self.send_errors = 0
+        self.wake_latency = (
+            Histogram("wake_active"),
+            Histogram("wake_idle"),
+            Histogram("wake_sleep"),
+        )
+        self.gc_pause = Histogram("gc_pause")
+        self.gc_auto_count = 0
+        self.gc_min_free = 0
+        # Every histogram, in report order
+        self.histograms = (
+            self.loop_period, self.report_latency, self.stall, self.sequence_time,
+        ) + self.wake_latency + (self.gc_pause,)
+        self.last_scan_ns = time.monotonic_ns()
+        self.interval_max_us = 0
+        self.detect_ns = 0
+
+    def start(self):
+        """Call when the scan loop starts, so startup time is not counted."""
+        self.last_scan_ns = time.monotonic_ns()
+
+    def scan_tick(self):
+        """Call once per scan loop iteration."""
+        now = time.monotonic_ns()
+        period_us = (now - self.last_scan_ns) // 1000
+        self.last_scan_ns = now
+        self.loop_period.add(period_us)
+        if period_us > self.interval_max_us:
+            self.interval_max_us = period_us
+
+    def detected(self):
+        """Call when a button change is seen; the oldest unreported change is timed."""
+        if not self.detect_ns:
+            self.detect_ns = time.monotonic_ns()
+
+    def reported(self):
+        """Call right after send_report has carried the detected changes."""
+        if self.detect_ns:
+            self.report_latency.add((time.monotonic_ns() - self.detect_ns) // 1000)
+            self.detect_ns = 0
+
+    def send_failed(self):
+        """Call when send_report failed and the report will be retried."""
+        self.send_errors += 1
+
+    def sequence_played(self, duration_us):
+        """Call when a key sequence has been played, with its total time."""
+        self.sequence_time.add(duration_us)
+
+    def woke(self, mode, latency_us):
+        """Call when the scan loop handles a press, with the scan mode it was in."""
+        self.wake_latency[mode].add(latency_us)
+
+    def gc_collected(self, pause_us, free):
+        """Call after a scheduled collection with its pause and the free heap after it."""
+        self.gc_pause.add(pause_us)
+        self.gc_free(free)
+
+    def gc_auto(self):
+        """Call when an automatic collection was noticed."""
+        self.gc_auto_count += 1
+
+    def gc_free(self, free):
+        """Record a free heap sample."""
+        if not self.gc_min_free or free < self.gc_min_free:
+            self.gc_min_free = free
+
+    def end_interval(self):
+        """Close a stats interval and return its worst loop period in microseconds."""
+        stall_us = self.interval_max_us
+        self.stall.add(stall_us)
+        self.interval_max_us = 0
+        return stall_us
+
+    def reset(self):
+        """Clear every histogram."""
+        self.loop_period.reset()
+        self.report_latency.reset()
+        self.stall.reset()
+        self.sequence_time.reset()
+        self.send_errors = 0
+        for histogram in self.wake_latency:
+            histogram.reset()
+        self.gc_pause.reset()
+        self.gc_auto_count = 0
+        self.gc_min_free = 0
+
+    def report_lines(self):
+        """Return the statistics as lines of text."""
+        return (
+            self.loop_period.format(),
+            self.report_latency.format(),
+            self.stall.format(),
+            self.sequence_time.format(),
+            f"send_errors: {self.send_errors}",
+        ) + tuple(histogram.format() for histogram in self.wake_latency) + (
+            self.gc_pause.format(),
+            f"gc: auto={self.gc_auto_count} min_free={self.gc_min_free}B",
+        )
+
+
+# Startup phases timed by BootTimer, in order
+BOOT_IMPORTS = 0     # modules imported
+BOOT_HID = 1         # keyboard report writer ready
+BOOT_SCANNER = 2     # background scanning started
+BOOT_MODES = 3       # SOS/practice boot modes detected
+BOOT_FIRST_SCAN = 4  # first iteration of the scan loop
+BOOT_USB = 5         # host finished enumerating the keyboard
+BOOT_PHASE_NAMES = ("imports", "hid", "scanner", "modes", "first_scan", "usb")
+
+
+class BootTimer:
+    """
+    Time the startup phases of code.py, in microseconds since it started,
+    and record the free heap after each phase.
+
+    Args:
+        start_ns: time.monotonic_ns() taken at the top of code.py
+        start_free: gc.mem_free() taken at the top of code.py
+    """
+
+    def __init__(self, start_ns, start_free=0):
+        self.start_ns = start_ns
+        self.start_free = start_free
+        self.phase_us = array("L", [0] * len(BOOT_PHASE_NAMES))
+        self.phase_free = array("L", [0] * len(BOOT_PHASE_NAMES))
+
+    def mark(self, phase):
+        """Record that a phase finished; returns its time in microseconds."""
+        elapsed = (time.monotonic_ns() - self.start_ns) // 1000
+        self.phase_us[phase] = elapsed
+        self.phase_free[phase] = gc.mem_free()
+        return elapsed
+
+    def format(self):
+        """Return the phase timings as a single line of text."""
+        parts = ["boot:"]
+        for phase, name in enumerate(BOOT_PHASE_NAMES):
+            parts.append(f"{name}={self.phase_us[phase]}us")
+        return " ".join(parts)
+
+    def report_lines(self):
+        """Return the phase timings and the free heap after each phase."""
+        parts = [f"boot_heap: start={self.start_free}B"]
+        for phase, name in enumerate(BOOT_PHASE_NAMES):
+            parts.append(f"{name}={self.phase_free[phase]}B")
+        return (self.format(), " ".join(parts))
+
+
+# Shared instance used by code.py
+stats = LatencyStats()
@@ -0,0 +1,59 @@
+"""
+StrataBox Line Stream
+Writes text answers (the stats query, the diagnostics report) to the
+usb_cdc data port a chunk at a time, so a host that is slow to read
+never holds up scanning. Imported with the first of query and report.
+"""
+
+
+class LineStream:
+    """
+    Write lines to a port a chunk at a time.
+
+    Each pump() call writes at most max_bytes and never waits, so the
+    firmware calls it from its idle time between scans. A line that did
+    not fit is finished by the next calls before anything else should be
+    written to the port (see mid_line).
+
+    Args:
+        port: usb_cdc.data, with a write timeout of 0
+        lines: Iterator of lines as bytes, each ending in a newline
+    """
+
+    def __init__(self, port, lines):
+        self.port = port
+        self.lines = lines
+        self._line = b""
+        self._view = memoryview(self._line)
+        self._sent = 0
+        self.written = 0                # bytes written so far
+
+    @property
+    def mid_line(self):
+        """True while part of a line has been written and the rest has not."""
+        return 0 < self._sent < len(self._line)
+
+    def next_line(self):
+        """Return the next line to write, or None once there are no more."""
+        try:
+            return next(self.lines)
+        except StopIteration:
+            return None
+
+    def pump(self, max_bytes=64):
+        """
+        Write the next chunk. Returns False once every line has been
+        written.
+        """
+        if self._sent == len(self._line):
+            line = self.next_line()
+            if line is None:
+                return False
+            self._line = line
+            self._view = memoryview(line)
+            self._sent = 0
+        end = min(len(self._line), self._sent + max_bytes)
+        written = self.port.write(self._view[self._sent:end]) or 0
+        self._sent += written
+        self.written += written
+        return True
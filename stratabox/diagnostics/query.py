@@ -0,0 +1,39 @@
+"""
+StrataBox Stats Query
+Answers statistics requests (a "?" on the usb_cdc data port) from
+host/query_stats.py. Imported by code.py the first time a request
+arrives, so the text formatting is not loaded at boot.
+"""
+
+from stratabox.diagnostics.linestream import LineStream
+
+
+def stats_lines(stats, boot_timer):
+    """
+    Generate the answer to a "?" request: the latency histograms and boot
+    timings as text lines between STATS BEGIN and STATS END, as bytes.
+
+    Args:
+        stats: LatencyStats of the running firmware
+        boot_timer: BootTimer of the running firmware
+    """
+    yield b"\nSTATS BEGIN\n"
+    for line in stats.report_lines():
+        yield line.encode() + b"\n"
+    for line in boot_timer.report_lines():
+        yield line.encode() + b"\n"
+    yield b"STATS END\n"
+
+
+class StatsStream(LineStream):
+    """
+    Write the stats text to a port a chunk at a time (see LineStream).
+
+    Args:
+        port: usb_cdc.data, with a write timeout of 0
+        stats: LatencyStats of the running firmware
+        boot_timer: BootTimer of the running firmware
+    """
+
+    def __init__(self, port, stats, boot_timer):
+        super().__init__(port, stats_lines(stats, boot_timer))
@@ -0,0 +1,140 @@
+"""
+StrataBox Diagnostics Report
+A structured snapshot of the controller (CircuitPython version, heap,
+CPU, HID devices, firmware state, latency histograms, lifetime usage
+counters, boot timings and the files on the drive), generated one
+record at a time and streamed as JSON lines, so it can be pulled from a
+running controller without building the whole report in RAM or writing
+it to flash.
+
+Every line is "DIAG " followed by one JSON object with a "type" field,
+and the last record is {"type": "end", "records": <count>}. The prefix
+lets host/collect_diagnostics.py pick the lines out of the binary debug
+log records that share the data port.
+
+Imported by code.py the first time a report is requested, and by
+debug_probe_utils.py.
+"""
+
+import gc
+import json
+import os
+import microcontroller
+import supervisor
+import usb_hid
+from stratabox.diagnostics.linestream import LineStream
+
+REPORT_VERSION = 1
+LINE_PREFIX = b"DIAG "
+
+
+def report_records(stats=None, boot_timer=None, firmware=None, usage=None):
+    """
+    Generate the report records as dictionaries. Each record is only
+    gathered when it is asked for, so a caller can send one and go back
+    to scanning before the next (one os.stat() per file record).
+
+    Args:
+        stats: LatencyStats of the running firmware, or None
+        boot_timer: BootTimer of the running firmware, or None
+        firmware: Dictionary of firmware settings and state for the
+            "firmware" record, or None
+        usage: UsageCounters of the running firmware, or None
+    """
+    yield {"type": "begin", "version": REPORT_VERSION, "ticks_ms": supervisor.ticks_ms()}
+    uname = os.uname()
+    yield {"type": "system", "circuitpython": uname.version, "board": uname.machine}
+    yield {"type": "heap", "free": gc.mem_free(), "alloc": gc.mem_alloc()}
+    cpu = microcontroller.cpu
+    temperature = getattr(cpu, "temperature", None)
+    yield {
+        "type": "cpu",
+        "frequency": cpu.frequency,
+        "temperature": None if temperature is None else round(temperature, 1),
+    }
+    if firmware:
+        record = {"type": "firmware"}
+        record.update(firmware)
+        yield record
+    for index, device in enumerate(usb_hid.devices):
+        yield {"type": "hid", "index": index, "usage_page": device.usage_page, "usage": device.usage}
+    if stats is not None:
+        for histogram in stats.histograms:
+            yield {
+                "type": "histogram",
+                "name": histogram.name,
+                "count": histogram.count,
+                "max_us": histogram.max,
+                "bounds_us": list(histogram.bounds),
+                "counts": list(histogram.counts),
+            }
+        yield {
+            "type": "counters",
+            "send_errors": stats.send_errors,
+            "gc_auto": stats.gc_auto_count,
+            "gc_min_free": stats.gc_min_free,
+            "interval_max_us": stats.interval_max_us,
+        }
+    if usage is not None:
+        yield {
+            "type": "usage",
+            "boots": usage.boots,
+            "gestures": usage.gestures,
+            "seconds": usage.seconds,
+            "peak_report_us": usage.peak_report_us,
+            "peak_stall_us": usage.peak_stall_us,
+            "presses": list(usage.presses[:usage.button_count]),
+            "unsaved": usage.unsaved,
+        }
+    if boot_timer is not None:
+        from stratabox.diagnostics.latency import BOOT_PHASE_NAMES
+
+        yield {
+            "type": "boot",
+            "phases_us": {name: boot_timer.phase_us[i] for i, name in enumerate(BOOT_PHASE_NAMES)},
+            "start_free": boot_timer.start_free,
+            "phases_free": {name: boot_timer.phase_free[i] for i, name in enumerate(BOOT_PHASE_NAMES)},
+        }
+    try:
+        names = sorted(os.listdir("/"))
+    except OSError:
+        names = ()
+        yield {"type": "error", "what": "file listing"}
+    for name in names:
+        try:
+            info = os.stat("/" + name)
+            yield {"type": "file", "name": name, "size": info[6], "dir": bool(info[0] & 0x4000)}
+        except OSError:
+            yield {"type": "file", "name": name, "size": None, "dir": None}
+
+
+def format_record(record):
+    """Return a record as one report line, as bytes."""
+    return LINE_PREFIX + json.dumps(record).encode() + b"\n"
+
+
+class ReportStream(LineStream):
+    """
+    Write report records to a port a chunk at a time (see LineStream),
+    ending with the "end" record.
+
+    Args:
+        port: usb_cdc.data, with a write timeout of 0
+        records: Iterator of records, normally report_records()
+    """
+
+    def __init__(self, port, records):
+        super().__init__(port, records)
+        self.count = 0
+        self._ended = False
+
+    def next_line(self):
+        if self._ended:
+            return None
+        try:
+            record = next(self.lines)
+        except StopIteration:
+            record = {"type": "end", "records": self.count + 1}
+            self._ended = True
+        self.count += 1
+        return format_record(record)
@@ -0,0 +1,138 @@
+"""
+StrataBox Ring Log
+Non-blocking debug log. The hot path writes fixed-size binary records
+into a preallocated ring buffer; the records are drained to the usb_cdc
+data port only when the firmware is idle. When the buffer is full new
+records are counted as dropped instead of blocking.
+
+Each record is 12 bytes, little-endian:
+    magic (0xA5), event code, button index, pad, timestamp (ms ticks), value
+Use host/decode_log.py to turn the stream back into readable lines.
+This module only depends on struct so the host decoder can import it.
+"""
+
+import struct
+
+RECORD_FORMAT = "<BBBxII"
+RECORD_SIZE = 12
+MAGIC = 0xA5
+
+# Event codes
+LOG_BOOT = 1        # value: 1 if SOS mode, 2 if practice mode (bitmask)
+LOG_PRESS = 2       # value: keycode
+LOG_RELEASE = 3     # value: keycode
+LOG_MACRO = 4       # value: number of keys in the sequence
+LOG_QUEUE_LOST = 5  # scanner event queue overflowed
+LOG_DROPPED = 6     # value: records dropped because the ring was full
+LOG_SCAN_GAP = 7    # value: worst scan gap in microseconds
+LOG_BOOT_TIME = 8   # value: microseconds from code.py start to the first scan
+LOG_COMMAND = 9     # index: command; value: status, profile, profile count (see commands)
+LOG_KEYMAP = 10     # index: button; value: keycode in the active keymap
+LOG_MACRO_DONE = 11  # index: stalled reports; value: sequence time in microseconds
+LOG_SLEEP = 12      # index: button that woke the controller (255: unknown); value: ms asleep
+LOG_GC = 13         # value: pause of a scheduled garbage collection in microseconds
+LOG_USAGE = 14      # index: nvm slot; value: microseconds to save the usage counters
+
+EVENT_NAMES = {
+    LOG_BOOT: "boot",
+    LOG_PRESS: "press",
+    LOG_RELEASE: "release",
+    LOG_MACRO: "macro",
+    LOG_QUEUE_LOST: "queue_lost",
+    LOG_DROPPED: "dropped",
+    LOG_SCAN_GAP: "scan_gap",
+    LOG_BOOT_TIME: "boot_time",
+    LOG_COMMAND: "command",
+    LOG_KEYMAP: "keymap",
+    LOG_MACRO_DONE: "macro_done",
+    LOG_SLEEP: "sleep",
+    LOG_GC: "gc",
+    LOG_USAGE: "usage",
+}
+
+
+class RingLog:
+    """
+    Preallocated ring buffer of binary log records.
+
+    Args:
+        capacity: Number of records the ring can hold
+        stream: Where drain() writes records, normally usb_cdc.data.
+            With None the log keeps counting but never drains.
+    """
+
+    def __init__(self, capacity=128, stream=None):
+        self.buffer = bytearray(capacity * RECORD_SIZE)
+        self.view = memoryview(self.buffer)
+        self.stream = stream
+        self._read = 0       # byte offset of the next byte to drain
+        self._used = 0       # bytes waiting to be drained
+        self.dropped = 0     # records lost since the last LOG_DROPPED record
+        self.total_dropped = 0
+
+    def log(self, code, index, timestamp, value=0):
+        """
+        Append a record. Never blocks or allocates; returns False and counts
+        the record as dropped if the ring is full.
+        """
+        size = len(self.buffer)
+        if self._used + RECORD_SIZE > size:
+            self.dropped += 1
+            self.total_dropped += 1
+            return False
+        offset = (self._read + self._used) % size
+        struct.pack_into(RECORD_FORMAT, self.buffer, offset, MAGIC, code, index, timestamp, value)
+        self._used += RECORD_SIZE
+        return True
+
+    def __len__(self):
+        return self._used // RECORD_SIZE
+
+    @property
+    def mid_record(self):
+        """True while part of a record has been written and the rest has not."""
+        return self._read % RECORD_SIZE != 0
+
+    def drain(self, timestamp, max_bytes=64):
+        """
+        Write up to max_bytes of queued records to the stream.
+        Call only when the firmware is idle. Returns the number of bytes written.
+        """
+        stream = self.stream
+        if stream is None or not stream.connected:
+            return 0
+        if self.dropped and self._used + RECORD_SIZE <= len(self.buffer):
+            # Mark the gap left by dropped records
+            dropped = self.dropped
+            self.dropped = 0
+            self.log(LOG_DROPPED, 0, timestamp, dropped)
+        if not self._used:
+            return 0
+        # Only write the contiguous part; the rest goes out next time
+        count = min(self._used, max_bytes, len(self.buffer) - self._read)
+        written = stream.write(self.view[self._read:self._read + count]) or 0
+        self._read = (self._read + written) % len(self.buffer)
+        self._used -= written
+        return written
+
+
+def decode(data):
+    """
+    Decode a byte string of records, skipping any bytes that do not start
+    a valid record.
+
+    Returns:
+        A list of (code, index, timestamp, value) tuples and the offset of
+        the first byte that was not consumed
+    """
+    records = []
+    offset = 0
+    end = len(data)
+    while end - offset >= RECORD_SIZE:
+        if data[offset] != MAGIC or data[offset + 1] not in EVENT_NAMES:
+            offset += 1
+            continue
+        _, code, index, timestamp, value = struct.unpack_from(RECORD_FORMAT, data, offset)
+        records.append((code, index, timestamp, value))
+        offset += RECORD_SIZE
+    return records, offset
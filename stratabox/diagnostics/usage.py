@@ -0,0 +1,217 @@
+"""
+StrataBox Usage Counters
+Lifetime usage statistics that survive power cycles: presses of every
+button (to predict switch wear), gestures played (SOS macros), boots,
+seconds powered, and the worst report latency and scan stall seen.
+
+The counters live in RAM; counting a press is one array increment. They
+are written to microcontroller.nvm in batches, only from the firmware's
+idle time and no more often than the flush interval allows, so no flash
+write ever lands in the input path and the number of writes stays
+bounded.
+
+NVM layout: the nvm is split into SLOT_SIZE-byte slots (one 256-byte
+flash page each). Every flush writes the next slot in turn, with a
+sequence number and a crc32, and loading picks the valid slot with the
+highest sequence, so a slot whose page was only partly programmed is
+skipped and the previous counts are read instead. On the RP2040 the
+whole nvm is one 4 KB flash sector that is erased and rewritten on every
+write, so the rotation only guards against a torn page program: a power
+loss during the erase can lose every slot, and the counts start again
+from zero. The sector's wear is set by the flush interval: at the
+default of 10 minutes the 100,000 erase cycles last over 16,000 hours
+of use.
+
+Only depends on struct and binascii, so debug_probe_utils.py and host
+tools can decode an nvm dump too.
+"""
+
+import struct
+import time
+from array import array
+from binascii import crc32
+from stratabox.input.buttons import MAX_BUTTONS
+
+SLOT_SIZE = 256
+MAGIC = 0x5342  # "BS"
+FORMAT_VERSION = 1
+# magic, version, button count, sequence, boots, gestures, seconds powered,
+# peak report latency (us), peak scan stall (us), presses of every button
+_SLOT_FORMAT = "<HBBIIIIII%dI" % MAX_BUTTONS
+_CRC_AT = struct.calcsize(_SLOT_FORMAT)
+_MAX_SLOTS = 16
+_COUNTER_MAX = 0xFFFFFFFF
+# A threshold flush still waits this long after the previous write
+MIN_FLUSH_GAP_MS = 300_000
+# The first flush after power-up, which saves the boot, only waits this long
+FIRST_FLUSH_GAP_MS = 10_000
+
+
+def decode_slot(data):
+    """
+    Decode one slot.
+
+    Returns:
+        A dictionary of the counters, or None if the slot is empty or
+        its checksum does not match
+    """
+    if len(data) < _CRC_AT + 4:
+        return None
+    stored_crc = struct.unpack_from("<I", data, _CRC_AT)[0]
+    if crc32(bytes(data[:_CRC_AT])) != stored_crc:
+        return None
+    values = struct.unpack_from(_SLOT_FORMAT, data, 0)
+    if values[0] != MAGIC or values[1] != FORMAT_VERSION:
+        return None
+    return {
+        "buttons": values[2],
+        "sequence": values[3],
+        "boots": values[4],
+        "gestures": values[5],
+        "seconds": values[6],
+        "peak_report_us": values[7],
+        "peak_stall_us": values[8],
+        "presses": values[9:9 + values[2]],
+    }
+
+
+def read_usage(nvm):
+    """
+    Return the newest valid counters in an nvm (or a copy of it) and the
+    slot they were read from, or (None, -1) if no slot is valid.
+    """
+    latest = None
+    latest_slot = -1
+    for slot in range(min(len(nvm) // SLOT_SIZE, _MAX_SLOTS)):
+        start = slot * SLOT_SIZE
+        usage = decode_slot(nvm[start:start + SLOT_SIZE])
+        if usage is not None and (latest is None or usage["sequence"] > latest["sequence"]):
+            latest = usage
+            latest_slot = slot
+    return latest, latest_slot
+
+
+class UsageCounters:
+    """
+    Count button presses and other usage in RAM and flush the counts to
+    nvm in idle time.
+
+    Counts are stored by button number, so reordering the buttons in
+    config.py moves the counts with the numbers.
+
+    Args:
+        nvm: microcontroller.nvm, or None to count in RAM only
+        button_count: Number of buttons
+        flush_interval_ms: Longest time unsaved counts wait for an idle
+            flush, and the shortest time between two flushes unless
+            flush_presses is reached; 0 never writes to nvm
+        flush_presses: Unsaved presses and gestures that trigger a flush
+            at the next idle moment, MIN_FLUSH_GAP_MS after the last one
+    """
+
+    def __init__(self, nvm, button_count, flush_interval_ms=600_000, flush_presses=500):
+        self.nvm = nvm if nvm is not None and len(nvm) >= SLOT_SIZE else None
+        self.button_count = button_count
+        self.flush_interval_ms = flush_interval_ms
+        self.flush_presses = flush_presses
+        self.presses = array("L", [0] * MAX_BUTTONS)
+        self.boots = 0
+        self.gestures = 0
+        self.seconds = 0
+        self.peak_report_us = 0
+        self.peak_stall_us = 0
+        self.sequence = 0
+        self.slot = -1          # last slot written or read
+        self.unsaved = 0        # presses, gestures and boots since the last flush
+        self.flushes = 0        # flushes since power-up
+        self._buffer = bytearray(b"\xff" * SLOT_SIZE)
+        self._flushed_ns = time.monotonic_ns()
+        self._counted_ns = self._flushed_ns
+        if self.nvm is not None:
+            stored, self.slot = read_usage(self.nvm)
+            if stored is not None:
+                self._restore(stored)
+
+    def _restore(self, stored):
+        self.sequence = stored["sequence"]
+        self.boots = stored["boots"]
+        self.gestures = stored["gestures"]
+        self.seconds = stored["seconds"]
+        self.peak_report_us = stored["peak_report_us"]
+        self.peak_stall_us = stored["peak_stall_us"]
+        for index, count in enumerate(stored["presses"]):
+            self.presses[index] = count
+
+    def booted(self):
+        """Count a boot of the firmware."""
+        self.boots += 1
+        self.unsaved += 1
+
+    def pressed(self, index):
+        """Count a press of a button. Only touches RAM."""
+        if self.presses[index] < _COUNTER_MAX:
+            self.presses[index] += 1
+        self.unsaved += 1
+
+    def gesture(self):
+        """Count a played gesture (SOS macro)."""
+        self.gestures += 1
+        self.unsaved += 1
+
+    def update(self, stats=None):
+        """Add the time powered since the last update and the peaks seen in `stats`."""
+        now = time.monotonic_ns()
+        seconds = (now - self._counted_ns) // 1_000_000_000
+        self.seconds += seconds
+        self._counted_ns += seconds * 1_000_000_000
+        if stats is not None:
+            self.peak_report_us = max(self.peak_report_us, stats.report_latency.max)
+            self.peak_stall_us = max(self.peak_stall_us, stats.stall.max, stats.interval_max_us)
+
+    def flush_due(self):
+        """True if the counts should be written now (call only when idle)."""
+        if self.nvm is None or not self.flush_interval_ms or not self.unsaved:
+            return False
+        elapsed_ms = (time.monotonic_ns() - self._flushed_ns) // 1_000_000
+        if elapsed_ms >= self.flush_interval_ms:
+            return True
+        if not self.flushes:
+            # Saves the boot count even in a short session
+            return elapsed_ms >= FIRST_FLUSH_GAP_MS
+        return elapsed_ms >= MIN_FLUSH_GAP_MS and self.unsaved >= self.flush_presses
+
+    def flush(self, stats=None):
+        """
+        Write the counters to the next nvm slot.
+
+        Returns:
+            The time the write took in microseconds
+        """
+        start = time.monotonic_ns()
+        self.update(stats)
+        self.sequence += 1
+        self.slot = (self.slot + 1) % min(len(self.nvm) // SLOT_SIZE, _MAX_SLOTS)
+        buffer = self._buffer
+        struct.pack_into(
+            _SLOT_FORMAT, buffer, 0, MAGIC, FORMAT_VERSION, self.button_count, self.sequence,
+            self.boots, self.gestures, self.seconds, self.peak_report_us, self.peak_stall_us,
+            *self.presses,
+        )
+        struct.pack_into("<I", buffer, _CRC_AT, crc32(bytes(buffer[:_CRC_AT])))
+        offset = self.slot * SLOT_SIZE
+        self.nvm[offset:offset + SLOT_SIZE] = buffer
+        self.unsaved = 0
+        self.flushes += 1
+        self._flushed_ns = time.monotonic_ns()
+        return (self._flushed_ns - start) // 1000
+
+    def idle(self, stats=None):
+        """
+        Call regularly while no input is pending. Flushes if one is due.
+
+        Returns:
+            The write time in microseconds, or -1 if nothing was written
+        """
+        if self.flush_due():
+            return self.flush(stats)
+        return -1
@@ -0,0 +1,196 @@
+"""
+StrataBox Gestures
+Button gestures that play a key sequence: multi-taps, long presses and
+combos of buttons pressed together. They are defined by GESTURES in
+config.py and compiled at startup into lookup tables, so matching an
+event is a few table lookups whatever the number of gestures, and
+nothing is allocated while matching.
+
+Gestures are active in SOS mode, which is selected by holding UP while
+the controller starts or switched on over the data port
+(host/keymap_client.py --sos on). Without a GESTURES setting the only
+gesture is the SOS macro: three MENU taps. code.py only imports this
+module when SOS mode is turned on, so normal use does not pay for it.
+Practice mode is a keymap profile, see stratabox.keymap.
+
+Matched gestures are not played here: their key sequence is put on a
+queue for the sequence player task (stratabox.runtime.play_sequences).
+"""
+
+from adafruit_hid.keycode import Keycode
+from stratabox.input.scanner import ticks_diff
+
+# Arrow key sequence sent by the SOS macro: up>down>right>left>up
+SOS_SEQUENCE = (Keycode.UP_ARROW, Keycode.DOWN_ARROW, Keycode.RIGHT_ARROW, Keycode.LEFT_ARROW, Keycode.UP_ARROW)
+
+# Used when config.py has no GESTURES setting
+DEFAULT_GESTURES = (
+    ("tap", "MENU", 3, SOS_SEQUENCE),
+)
+
+# Tap counts are packed into the tap table key next to the button number
+_MAX_TAPS = 15
+_TAP_BITS = 4
+
+
+class GestureMatcher:
+    """
+    Match debounced button changes against compiled gestures.
+
+    Call press() and release() with every debounced change and poll()
+    regularly. press() and poll() return the number of the gesture they
+    matched, whose key sequence has been queued, or -1.
+
+    Args:
+        count: Number of buttons
+        queue: RingQueue the key sequences of matched gestures are put on
+        tap_timeout_ms: Longest time between two taps of a multi-tap
+        combo_window_ms: Longest time between the first and last press of a combo
+    """
+
+    def __init__(self, count, queue, tap_timeout_ms=1000, combo_window_ms=50):
+        self.count = count
+        self.queue = queue
+        self.tap_timeout = tap_timeout_ms
+        self.combo_window = combo_window_ms
+        # Compiled gestures
+        self.actions = []                # key sequence of each gesture
+        self.buttons = bytearray()       # first button of each gesture, for the log
+        self.taps = {}                   # button << _TAP_BITS | tap count -> gesture
+        self.tap_max = bytearray(count)  # highest tap count with a gesture, per button
+        self.hold_ms = [0] * count       # long press time per button, 0 if none
+        self.hold_gesture = [-1] * count
+        self.combos = {}                 # mask of held buttons -> gesture
+        # Matching state
+        self.tap_count = bytearray(count)
+        self.last_tap = [0] * count      # ms ticks of the last counted tap
+        self.pressed_at = [0] * count    # ms ticks of the last press
+        self.held = 0                    # bitmask of held buttons
+        self.hold_pending = 0            # held buttons whose long press has not fired
+
+    def _add(self, button, keys):
+        self.actions.append(tuple(keys))
+        self.buttons.append(button)
+        return len(self.actions) - 1
+
+    def add_tap(self, button, count, keys):
+        """Add a gesture for `count` presses of a button in quick succession."""
+        if not 1 <= count <= _MAX_TAPS:
+            raise ValueError(f"Tap count must be 1 to {_MAX_TAPS}")
+        self.taps[button << _TAP_BITS | count] = self._add(button, keys)
+        self.tap_max[button] = max(self.tap_max[button], count)
+
+    def add_hold(self, button, hold_ms, keys):
+        """Add a gesture for holding a button down for hold_ms."""
+        if self.hold_ms[button]:
+            raise ValueError("Only one hold gesture per button")
+        self.hold_gesture[button] = self._add(button, keys)
+        self.hold_ms[button] = max(1, hold_ms)
+
+    def add_combo(self, buttons, keys):
+        """Add a gesture for pressing a set of buttons together."""
+        mask = 0
+        for button in buttons:
+            mask |= 1 << button
+        if mask in self.combos:
+            raise ValueError("Duplicate combo gesture")
+        self.combos[mask] = self._add(min(buttons), keys)
+
+    def _fire(self, gesture):
+        self.queue.put(self.actions[gesture])
+        return gesture
+
+    def press(self, index, timestamp):
+        """Process a debounced press; returns the matched gesture or -1."""
+        bit = 1 << index
+        self.held |= bit
+        self.pressed_at[index] = timestamp
+        if self.hold_ms[index]:
+            self.hold_pending |= bit
+        gesture = self.combos.get(self.held, -1)
+        if gesture >= 0 and self._combo_in_window(timestamp):
+            return self._fire(gesture)
+        tap_max = self.tap_max[index]
+        if not tap_max:
+            return -1
+        taps = self.tap_count[index]
+        if taps and ticks_diff(timestamp, self.last_tap[index]) > self.tap_timeout:
+            taps = 0
+        taps += 1
+        self.tap_count[index] = taps
+        self.last_tap[index] = timestamp
+        gesture = self.taps.get(index << _TAP_BITS | taps, -1)
+        if gesture >= 0:
+            if taps == tap_max:
+                self.tap_count[index] = 0
+            return self._fire(gesture)
+        return -1
+
+    def _combo_in_window(self, timestamp):
+        # Every held button must have been pressed within the combo window
+        held = self.held
+        index = 0
+        while held:
+            if held & 1 and ticks_diff(timestamp, self.pressed_at[index]) > self.combo_window:
+                return False
+            held >>= 1
+            index += 1
+        return True
+
+    def release(self, index, timestamp):
+        """Process a debounced release."""
+        bit = 1 << index
+        self.held &= ~bit
+        self.hold_pending &= ~bit
+
+    def poll(self, now):
+        """Fire a long press whose time has come; returns the gesture or -1."""
+        pending = self.hold_pending
+        if not pending:
+            return -1
+        index = 0
+        while pending:
+            if pending & 1 and ticks_diff(now, self.pressed_at[index]) >= self.hold_ms[index]:
+                self.hold_pending &= ~(1 << index)
+                return self._fire(self.hold_gesture[index])
+            pending >>= 1
+            index += 1
+        return -1
+
+
+def build_matcher(button_names, gestures, queue, tap_timeout=1.0, combo_window=0.05):
+    """
+    Compile the GESTURES setting into a GestureMatcher.
+
+    Args:
+        button_names: Button names in key number order
+        gestures: GESTURES from config.py, a sequence of
+            (trigger, button(s), amount, keys): ("tap", name, count, keys),
+            ("hold", name, seconds, keys) or ("combo", (names...), None, keys);
+            None for DEFAULT_GESTURES
+        queue: RingQueue the key sequences of matched gestures are put on
+        tap_timeout: Seconds allowed between the taps of a multi-tap
+        combo_window: Seconds allowed between the presses of a combo
+    """
+    if gestures is None:
+        gestures = DEFAULT_GESTURES
+    matcher = GestureMatcher(
+        len(button_names), queue, int(tap_timeout * 1000), int(combo_window * 1000)
+    )
+
+    def button_number(name):
+        try:
+            return button_names.index(name)
+        except ValueError:
+            raise ValueError(f"Unknown button in gesture: {name}")
+
+    for trigger, buttons, amount, keys in gestures:
+        if trigger == "tap":
+            matcher.add_tap(button_number(buttons), amount, keys)
+        elif trigger == "hold":
+            matcher.add_hold(button_number(buttons), int(amount * 1000), keys)
+        elif trigger == "combo":
+            matcher.add_combo([button_number(name) for name in buttons], keys)
+        else:
+            raise ValueError(f"Unknown gesture trigger: {trigger}")
+    return matcher
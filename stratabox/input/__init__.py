@@ -0,0 +1,5 @@
+"""
+StrataBox Input
+Button table (buttons), background scanning (scanner) and debouncing
+(debounce). Import the submodules directly.
+"""
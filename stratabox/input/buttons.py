@@ -0,0 +1,93 @@
+"""
+StrataBox Button Table
+Compact description of the buttons, built once from PIN_CONFIG,
+KEY_CONFIG and KEY_NUMBERS and shared by code.py, button_test.py and
+debug_probe_utils.py. Everything is indexed by button number, which is
+also the key number reported by the scanner.
+
+The five standard buttons always come first. Any other NAME_KEY entry in
+KEY_CONFIG adds a button called NAME, numbered after them in name order.
+"""
+
+# Button names in button number order, matching the PIN_CONFIG/KEY_CONFIG keys
+BUTTON_NAMES = ("MENU", "UP", "DOWN", "LEFT", "RIGHT")
+
+# Button numbers
+MENU = 0
+UP = 1
+DOWN = 2
+LEFT = 3
+RIGHT = 4
+
+# Human readable names for test and diagnostic output
+LABELS = ("MENU (P key)", "UP ARROW", "DOWN ARROW", "LEFT ARROW", "RIGHT ARROW")
+
+# Held buttons are tracked in bitmasks, which must stay small integers
+MAX_BUTTONS = 30
+
+
+def button_names(config):
+    """
+    Return the button names in button number order: the five standard
+    buttons, then the extra ones named in a KEY_CONFIG ("NAME_KEY") or
+    PIN_CONFIG ("NAME_BTN_PIN") dictionary, sorted by name.
+    """
+    extra = []
+    for key in config:
+        for suffix in ("_BTN_PIN", "_KEY"):
+            if key.endswith(suffix):
+                name = key[:-len(suffix)]
+                if name not in BUTTON_NAMES and name not in extra:
+                    extra.append(name)
+    extra.sort()
+    return BUTTON_NAMES + tuple(extra)
+
+
+class ButtonTable:
+    """
+    Parallel per-button arrays indexed by button number.
+
+    Args:
+        pin_config: The PIN_CONFIG dictionary from config.py
+        key_config: The KEY_CONFIG dictionary from config.py, or None when
+            only the pins are needed
+        key_numbers: The KEY_NUMBERS dictionary from config.py, button name
+            -> key number on a key matrix or shift register chain; buttons
+            not listed get their button number
+    """
+
+    def __init__(self, pin_config, key_config=None, key_numbers=None):
+        self.names = button_names(pin_config if key_config is None else key_config)
+        self.count = len(self.names)
+        if self.count > MAX_BUTTONS:
+            raise ValueError(f"At most {MAX_BUTTONS} buttons are supported")
+        self.labels = LABELS + self.names[len(LABELS):]
+        # None for buttons that are not wired to a pin of their own
+        self.pins = tuple(pin_config.get(name + "_BTN_PIN") for name in self.names)
+        self.keycodes = bytearray(self.count)
+        if key_config is not None:
+            for index, name in enumerate(self.names):
+                self.keycodes[index] = key_config[name + "_KEY"]
+        self.key_numbers = bytearray(range(self.count))
+        if key_numbers:
+            for index, name in enumerate(self.names):
+                self.key_numbers[index] = key_numbers.get(name, index)
+
+    def make_inputs(self):
+        """
+        Create pulled-up DigitalInOut inputs for every button pin, for tools
+        that sample the pins directly instead of using the scanner.
+        Buttons read False while pressed.
+        """
+        if None in self.pins:
+            raise ValueError("Every button needs its own pin (PIN_CONFIG) to be read directly")
+        # Imported here so the table itself can be used on the host
+        import digitalio
+
+        inputs = []
+        for pin in self.pins:
+            button = digitalio.DigitalInOut(pin)
+            button.direction = digitalio.Direction.INPUT
+            button.pull = digitalio.Pull.UP
+            inputs.append(button)
+        return tuple(inputs)
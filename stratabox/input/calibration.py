@@ -0,0 +1,180 @@
+"""
+StrataBox Debounce Calibration
+Measures how long each switch bounces and suggests the shortest safe
+debounce window per button, so healthy switches are not slowed down by
+the window a worn one needs. Used by the calibration mode of
+button_test.py.
+
+EdgeRecorder samples the pins in a tight loop and stores every change of
+the pin word, bounce included, into preallocated arrays. The loop only
+notes the sample number of each change, a small int, so nothing is
+allocated while sampling; the sample numbers are turned into microsecond
+timestamps from the measured sample rate once the capture ends. The
+edges of each button are then grouped into bursts: a burst ends once the
+contact has been quiet for QUIET_US, and its bounce time is the span
+from its first to its last edge.
+"""
+
+import gc
+import time
+from array import array
+
+import supervisor
+from stratabox.input.scanner import ticks_diff
+
+QUIET_US = 25000       # Quiet time that ends a burst of bounce edges
+MIN_WINDOW_MS = 1      # Never suggest a shorter window than this
+MAX_WINDOW_MS = 50     # Bounce longer than this is a broken switch, not bounce
+MARGIN = 1.5           # Safety factor applied to the worst bounce seen
+MIN_TRANSITIONS = 10   # Presses plus releases needed before a window is suggested
+
+
+class EdgeRecorder:
+    """
+    Capture raw pin changes with timestamps.
+
+    Args:
+        inputs: Pulled-up DigitalInOut inputs in button number order
+            (ButtonTable.make_inputs())
+        capacity: Maximum number of pin word changes to store
+    """
+
+    def __init__(self, inputs, capacity=2048):
+        self.inputs = inputs
+        self.masks = bytearray(capacity)        # pressed bitmask after each change
+        self.times = array("L", [0] * capacity)  # microseconds since the capture started
+        self.count = 0
+        self.initial = 0      # pressed bitmask when the capture started
+        self.overflowed = False
+        self.samples = 0
+        self.duration_us = 0
+
+    def _read(self):
+        mask = 0
+        bit = 1
+        for pin in self.inputs:
+            if not pin.value:
+                mask |= bit
+            bit <<= 1
+        return mask
+
+    def capture(self, duration):
+        """
+        Sample the pins for `duration` seconds and record every change.
+        Automatic garbage collection is paused so it cannot hide edges;
+        the sampling loop allocates nothing, so the heap cannot run out.
+        """
+        masks = self.masks
+        times = self.times
+        capacity = len(masks)
+        read = self._read
+        self.count = 0
+        self.overflowed = False
+        gc.collect()
+        gc.disable()
+        try:
+            last = read()
+            self.initial = last
+            samples = 0
+            start_ticks = supervisor.ticks_ms()
+            start_ns = time.monotonic_ns()
+            duration_ms = int(duration * 1000)
+            while True:
+                mask = read()
+                samples += 1
+                if mask != last:
+                    # Timed by sample number: reading the µs clock would allocate
+                    if self.count < capacity:
+                        times[self.count] = samples
+                        masks[self.count] = mask
+                        self.count += 1
+                    else:
+                        self.overflowed = True
+                    last = mask
+                if samples & 0xFF:
+                    continue
+                if ticks_diff(supervisor.ticks_ms(), start_ticks) >= duration_ms:
+                    break
+            self.duration_us = (time.monotonic_ns() - start_ns) // 1000
+            self.samples = samples
+        finally:
+            gc.enable()
+        for i in range(self.count):
+            times[i] = times[i] * self.duration_us // samples
+
+    def sample_rate(self):
+        """Return the achieved pin word samples per second."""
+        if not self.duration_us:
+            return 0
+        return self.samples * 1000000 // self.duration_us
+
+    def bursts(self, index):
+        """
+        Group the edges of one button into bursts.
+
+        Returns:
+            A list of (pressed, bounce_us, edges) per burst, where pressed is
+            the state the contact settled in
+        """
+        bit = 1 << index
+        state = self.initial & bit
+        result = []
+        first = last = 0
+        edges = 0
+        previous = state
+        for i in range(self.count):
+            level = self.masks[i] & bit
+            if level == state:
+                continue
+            state = level
+            now = self.times[i]
+            if edges and now - last >= QUIET_US:
+                result.append((bool(previous), last - first, edges))
+                edges = 0
+            if not edges:
+                first = now
+            last = now
+            previous = state
+            edges += 1
+        if edges:
+            result.append((bool(state), last - first, edges))
+        return result
+
+
+def percentile(sorted_values, fraction):
+    """Return the value at a fraction (0..1) of a sorted list."""
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def safe_window_ms(bursts):
+    """
+    Return the shortest debounce window in ms that covers every burst seen,
+    with MARGIN to spare, or None if there are too few transitions to tell.
+    """
+    if len(bursts) < MIN_TRANSITIONS:
+        return None
+    worst_us = max(bounce for _, bounce, _ in bursts)
+    window = int(worst_us * MARGIN / 1000) + 1
+    return max(MIN_WINDOW_MS, min(MAX_WINDOW_MS, window))
+
+
+def format_calibration(windows_ms):
+    """
+    Return the contents of debounce_calibration.py for a list of
+    (button name, window in ms) pairs.
+    """
+    lines = [
+        '"""',
+        "StrataBox Debounce Calibration",
+        "Written by the calibration mode of button_test.py. Per-button debounce",
+        "windows in seconds; DEBOUNCE_CONFIG in config.py takes precedence.",
+        '"""',
+        "",
+        "DEBOUNCE_WINDOWS = {",
+    ]
+    for name, window in windows_ms:
+        lines.append(f'    "{name}": {window / 1000},')
+    lines.append("}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,204 @@
+"""
+StrataBox Debounce
+Per-button debounce state machines that filter both press and release
+bounce. Each button can use its own algorithm and window:
+
+- "eager": act on the first edge, then ignore further edges for the
+  window. No added latency on the first press or release.
+- "integrator": integrate the time the contact spends pressed versus
+  released and switch once the total reaches the window. Rejects short
+  glitches at the cost of up to one window of latency.
+- "defer": wait until the contact has been stable for the whole window
+  before switching. The most conservative and the slowest.
+
+All state lives in preallocated per-button arrays, so filtering an event
+does not allocate.
+"""
+
+from stratabox.input.scanner import ticks_diff
+
+MODE_EAGER = 0
+MODE_INTEGRATOR = 1
+MODE_DEFER = 2
+
+MODE_NAMES = ("eager", "integrator", "defer")
+
+# Shortest window a button can have; 0 in config.py means this
+MIN_WINDOW_MS = 1
+
+
+def mode_from_name(name):
+    """Return the mode constant for a debounce algorithm name."""
+    try:
+        return MODE_NAMES.index(name)
+    except ValueError:
+        raise ValueError(f"Unknown debounce mode: {name}")
+
+
+class Debouncer:
+    """
+    Debounce state for a set of buttons, indexed by key number.
+
+    Feed every raw edge to edge() and call poll() regularly; both report
+    changes of the debounced output. The debounced state of button N is
+    out[N] (1 when pressed).
+
+    Args:
+        count: Number of buttons
+        mode: Default algorithm for every button (MODE_* constant)
+        window_ms: Default debounce window in milliseconds; windows under
+            MIN_WINDOW_MS are raised to it (an integrator needs a non-zero
+            window to tell pressed from released)
+    """
+
+    def __init__(self, count, mode=MODE_EAGER, window_ms=10):
+        self.count = count
+        self.mode = bytearray([mode] * count)
+        self.window = [max(window_ms, MIN_WINDOW_MS)] * count
+        self.out = bytearray(count)    # debounced state
+        self.raw = bytearray(count)    # last raw state seen
+        self.since = [0] * count       # ms ticks of the last accepted edge or raw change
+        self.level = [0] * count       # integrator value in ms, 0..window
+        self.locked = 0                # bitmask of eager buttons inside their lockout
+        self.pending = 0               # bitmask of buttons poll() must look at
+
+    def configure(self, index, mode, window_ms):
+        """Set the algorithm and window used by one button (at least MIN_WINDOW_MS)."""
+        self.mode[index] = mode
+        self.window[index] = max(window_ms, MIN_WINDOW_MS)
+
+    def edge(self, index, pressed, timestamp):
+        """
+        Process a raw edge for a button.
+
+        Args:
+            index: Key number of the button
+            pressed: True for a press edge, False for a release edge
+            timestamp: ms ticks of the edge
+
+        Returns:
+            True if the debounced state of the button changed
+        """
+        bit = 1 << index
+        mode = self.mode[index]
+        if mode == MODE_INTEGRATOR:
+            # Integrate up to this edge at the previous raw level
+            self._integrate(index, timestamp)
+        self.raw[index] = 1 if pressed else 0
+        if mode == MODE_EAGER:
+            if self.locked & bit:
+                if ticks_diff(timestamp, self.since[index]) < self.window[index]:
+                    # Still locked out; poll() picks up the final level
+                    return False
+                self.locked &= ~bit
+                self.pending &= ~bit
+            if self.raw[index] == self.out[index]:
+                return False
+            self._accept(index, timestamp)
+            return True
+        self.since[index] = timestamp
+        self.pending |= bit
+        if mode == MODE_DEFER:
+            return False
+        return self._settle(index)
+
+    def poll(self, now):
+        """
+        Advance timers for buttons waiting on a window.
+
+        Args:
+            now: Current ms ticks
+
+        Returns:
+            Bitmask of buttons whose debounced state changed
+        """
+        changed = 0
+        # Only visit waiting buttons, so the cost does not grow with the button count
+        pending = self.pending
+        index = 0
+        while pending:
+            if pending & 1:
+                changed |= self._poll_one(index, now)
+            pending >>= 1
+            index += 1
+        return changed
+
+    def _poll_one(self, index, now):
+        # Returns the button's bit if its debounced state changed, else 0
+        bit = 1 << index
+        if self.mode[index] == MODE_INTEGRATOR:
+            self._integrate(index, now)
+            self.since[index] = now
+            return bit if self._settle(index) else 0
+        if ticks_diff(now, self.since[index]) < self.window[index]:
+            return 0
+        self.pending &= ~bit
+        self.locked &= ~bit
+        if self.raw[index] == self.out[index]:
+            return 0
+        if self.mode[index] == MODE_EAGER:
+            # The late edge starts a new lockout
+            self._accept(index, now)
+        else:
+            self.out[index] = self.raw[index]
+        return bit
+
+    def _accept(self, index, timestamp):
+        # Eager: switch now and lock out further edges for the window
+        bit = 1 << index
+        self.out[index] = self.raw[index]
+        self.since[index] = timestamp
+        self.locked |= bit
+        self.pending |= bit
+
+    def _integrate(self, index, now):
+        elapsed = ticks_diff(now, self.since[index])
+        if elapsed <= 0:
+            return
+        if self.raw[index]:
+            level = self.level[index] + elapsed
+            window = self.window[index]
+            self.level[index] = window if level > window else level
+        else:
+            level = self.level[index] - elapsed
+            self.level[index] = 0 if level < 0 else level
+
+    def _settle(self, index):
+        # Switch the output once the integrator reaches either end
+        level = self.level[index]
+        if level >= self.window[index]:
+            state = 1
+        elif level <= 0:
+            state = 0
+        else:
+            return False
+        if state == self.raw[index]:
+            self.pending &= ~(1 << index)
+        if state == self.out[index]:
+            return False
+        self.out[index] = state
+        return True
+
+
+def build_debouncer(button_names, default_mode, default_time, per_button, calibrated=None):
+    """
+    Create a Debouncer from the config.py settings.
+
+    Args:
+        button_names: Button names in key number order
+        default_mode: Algorithm name used unless overridden
+        default_time: Window in seconds used unless overridden
+        per_button: Dictionary of button name -> (mode name, window seconds)
+        calibrated: Dictionary of button name -> measured window in seconds
+            (DEBOUNCE_WINDOWS from debounce_calibration.py), used with the
+            default algorithm for buttons not in per_button
+    """
+    default_mode = mode_from_name(default_mode)
+    debouncer = Debouncer(len(button_names), default_mode, int(default_time * 1000))
+    for index, name in enumerate(button_names):
+        if name in per_button:
+            mode, window = per_button[name]
+            debouncer.configure(index, mode_from_name(mode), int(window * 1000))
+        elif calibrated and name in calibrated:
+            debouncer.configure(index, default_mode, round(calibrated[name] * 1000))
+    return debouncer
@@ -0,0 +1,124 @@
+"""
+StrataBox Matrix and Shift Register Scanners
+Input backends for builds with more buttons than spare GPIO pins:
+
+- "matrix": buttons on a row/column grid scanned by keypad.KeyMatrix,
+  key number = row * number of columns + column
+- "shift": buttons read through a chain of 74HC165 shift registers by
+  keypad.ShiftRegisterKeys, key number = position in the chain
+
+Both scan in the background in C like the direct-pin backend, so the
+Python side only sees an event when a button changes, however many
+buttons there are. KEY_NUMBERS in config.py says which key number each
+button is; the scanners translate key numbers to button numbers with a
+lookup table and offer the same interface as KeyScanner.
+
+Imported by make_scanner() only when one of these backends is selected.
+"""
+
+import keypad
+from stratabox.input.scanner import KeyScanner
+
+# Lookup table value for key numbers without a button
+_NO_BUTTON = 0xFF
+
+
+class ButtonEvent:
+    """Reused event object with the fields of keypad.Event."""
+
+    def __init__(self):
+        self.key_number = 0     # button number
+        self.pressed = False
+        self.timestamp = 0      # supervisor.ticks_ms() time of the change
+
+
+class MappedScanner(KeyScanner):
+    """
+    Base for scanners whose key numbers are not button numbers.
+
+    Args:
+        keys: keypad scanner (KeyMatrix or ShiftRegisterKeys)
+        key_numbers: Key number of each button (ButtonTable.key_numbers)
+    """
+
+    def __init__(self, keys, key_numbers):
+        self.keys = keys
+        self.key_count = len(key_numbers)
+        self.event = ButtonEvent()
+        self._raw = keypad.Event()
+        self._buttons = bytearray([_NO_BUTTON] * keys.key_count)
+        for button, key_number in enumerate(key_numbers):
+            if key_number >= keys.key_count:
+                keys.deinit()
+                raise ValueError(f"Key number {key_number} is not on the {self.name}")
+            self._buttons[key_number] = button
+
+    def next_event(self):
+        """
+        Return the next press/release event of a button, or None if there
+        is none. Keys without a button are skipped. The returned event
+        object is reused by the next call.
+        """
+        raw = self._raw
+        while self.keys.events.get_into(raw):
+            button = self._buttons[raw.key_number]
+            if button != _NO_BUTTON:
+                event = self.event
+                event.key_number = button
+                event.pressed = raw.pressed
+                event.timestamp = raw.timestamp
+                return event
+        return None
+
+
+class MatrixScanner(MappedScanner):
+    """
+    Scan buttons wired in a row/column matrix with keypad.KeyMatrix.
+
+    Args:
+        key_numbers: Key number of each button (ButtonTable.key_numbers)
+        wiring: INPUT_WIRING from config.py with ROW_PINS, COLUMN_PINS and
+            optionally COLUMNS_TO_ANODES (the diode direction, default True)
+        interval: Seconds between background scans
+        max_events: Size of the timestamped event queue
+    """
+
+    name = "matrix"
+
+    def __init__(self, key_numbers, wiring, interval=0.005, max_events=64):
+        keys = keypad.KeyMatrix(
+            wiring["ROW_PINS"],
+            wiring["COLUMN_PINS"],
+            columns_to_anodes=wiring.get("COLUMNS_TO_ANODES", True),
+            interval=interval,
+            max_events=max_events,
+        )
+        super().__init__(keys, key_numbers)
+
+
+class ShiftRegisterScanner(MappedScanner):
+    """
+    Scan buttons read through a 74HC165 chain with keypad.ShiftRegisterKeys.
+
+    Args:
+        key_numbers: Key number of each button (ButtonTable.key_numbers)
+        wiring: INPUT_WIRING from config.py with CLOCK_PIN, DATA_PIN,
+            LATCH_PIN, KEY_COUNT (8 per chip) and optionally
+            VALUE_WHEN_PRESSED (default False: pulled up, pressed to ground)
+        interval: Seconds between background scans
+        max_events: Size of the timestamped event queue
+    """
+
+    name = "shift"
+
+    def __init__(self, key_numbers, wiring, interval=0.005, max_events=64):
+        keys = keypad.ShiftRegisterKeys(
+            clock=wiring["CLOCK_PIN"],
+            data=wiring["DATA_PIN"],
+            latch=wiring["LATCH_PIN"],
+            key_count=wiring["KEY_COUNT"],
+            value_when_pressed=wiring.get("VALUE_WHEN_PRESSED", False),
+            interval=interval,
+            max_events=max_events,
+        )
+        super().__init__(keys, key_numbers)
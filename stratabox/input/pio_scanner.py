@@ -0,0 +1,244 @@
+"""
+StrataBox PIO Scanner
+Optional input backend that samples the button pins in an RP2040 PIO
+state machine instead of Python. The state machine watches the five
+contiguous pins (GP15-GP19 by default) and, whenever the pin word
+changes, pushes it together with a free-running counter that ticks every
+1.4 us. Edges are therefore timestamped in hardware, and none are missed
+while the Python side is busy or collecting garbage.
+
+The pushed words are copied into a RAM ring by DMA (background_read,
+CircuitPython 9) or, on older versions, read from the RX FIFO with
+readinto(). PioScanner offers the same interface as KeyScanner, so code.py
+and the debouncer do not care which backend produced the events.
+
+Needs rp2pio (RP2040 boards only); select it with INPUT_BACKEND = "pio".
+"""
+
+from array import array
+
+import board
+import rp2pio
+import supervisor
+from stratabox.input.scanner import KeyScanner, ticks_diff
+
+# PIO program, assembled from:
+#
+#     .wrap_target
+#         mov x, osr          ; counter lives in OSR, count it down
+#         jmp x-- count
+#     count:
+#         mov osr, x
+#         mov isr, ~null      ; pins plus a 1 bit above them
+#         in pins, 5
+#         mov x, isr
+#         jmp x!=y changed    ; compare with the last pushed pin word
+#     .wrap
+#     changed:
+#         mov y, x
+#         mov isr, null
+#         in y, 6             ; marker bit and pins
+#         in osr, 24          ; low 24 counter bits
+#         push noblock
+#         mov x, osr          ; this path is 14 cycles: two counter steps
+#         jmp x-- count2
+#     count2:
+#         jmp x-- count3
+#     count3:
+#         mov osr, x
+#         jmp 0 [4]
+#
+# Every 7 cycles is one counter step, so at 5 MHz the counter ticks every
+# 1.4 us. Pushed word: bit 29 always set (so a ring slot is never 0 once
+# written), bits 24-28 the pin levels, bits 0-23 the counter. Bits 30-31
+# stay clear so reading a word never allocates a long integer.
+PROGRAM = array("H", (
+    0xA027, 0x0042, 0xA0E1, 0xA0CB, 0x4005, 0xA026, 0x00A7, 0xA041, 0xA0C3,
+    0x4046, 0x40F8, 0x8000, 0xA027, 0x004E, 0x004F, 0xA0E1, 0x0400,
+))
+_WRAP_TARGET = 0
+_WRAP = 6
+PIO_FREQUENCY = 5_000_000
+PIN_COUNT = 5
+
+_PIN_SHIFT = 24
+_COUNTER_MASK = (1 << 24) - 1
+_TICKS_MAX = (1 << 29) - 1
+# Counter ticks are 7/5 us, so it wraps every 23.5 s; 7 ms is exactly
+# 5000 ticks. The anchor is moved on in whole 7 s steps to stay within
+# 14 s of now, on every scan pass (check_overflow) and every event.
+_REBASE_MS = 7000
+_REBASE_COUNTS = 5_000_000
+
+
+def _first_gpio(pins):
+    """Return the GPIO number of the first pin, checking the pins are contiguous."""
+    for number in range(30):
+        if getattr(board, f"GP{number}", None) is pins[0]:
+            break
+    else:
+        raise ValueError("PIO scanning needs GPn pins")
+    for offset, pin in enumerate(pins):
+        if getattr(board, f"GP{number + offset}", None) is not pin:
+            raise ValueError("PIO scanning needs contiguous pins, e.g. GP15-GP19")
+    return number
+
+
+class PinEvent:
+    """Reused event object with the fields of keypad.Event."""
+
+    def __init__(self):
+        self.key_number = 0
+        self.pressed = False
+        self.timestamp = 0      # supervisor.ticks_ms() time of the edge
+        self.timestamp_us = 0   # microseconds, wraps like ticks_ms (use ticks_diff)
+
+
+class PioScanner(KeyScanner):
+    """
+    Capture button edges with a PIO state machine.
+
+    Args:
+        pins: Button pins in button number order; must be consecutive GPIOs
+        ring_size: Words in the DMA ring the state machine writes to
+    """
+
+    name = "pio"
+
+    def __init__(self, pins, ring_size=64):
+        if len(pins) != PIN_COUNT:
+            raise ValueError(f"PIO scanning needs exactly {PIN_COUNT} pins")
+        _first_gpio(pins)
+        self.key_count = len(pins)
+        self.event = PinEvent()
+        self.ring = array("L", [0] * ring_size)
+        self._read_index = 0
+        self._fill = 0
+        self._released = (1 << self.key_count) - 1
+        self._levels = self._released   # pin levels after the last word, 1 = released
+        self._changed = 0               # bits of the current word not yet returned
+        self._word = 0
+        self.sm = rp2pio.StateMachine(
+            PROGRAM,
+            frequency=PIO_FREQUENCY,
+            first_in_pin=pins[0],
+            in_pin_count=PIN_COUNT,
+            pull_in_pin_up=self._released,
+            in_shift_right=False,
+            wrap_target=_WRAP_TARGET,
+            wrap=_WRAP,
+        )
+        # The counter starts at 0 when the state machine does
+        self._anchor_ms = supervisor.ticks_ms()
+        self._anchor_count = 0
+        self._anchor_us = 0
+        self._resync = False            # DMA ring was cleared after an overrun
+        self._dma = hasattr(self.sm, "background_read")
+        if self._dma:
+            self.sm.background_read(loop=self.ring)
+
+    def _next_word(self):
+        # Return the next pushed word, or 0 if there is none yet
+        ring = self.ring
+        if self._dma:
+            if self._resync:
+                # Pick up at the oldest word written since the ring was cleared
+                for index in range(len(ring)):
+                    if ring[index] and not ring[index - 1]:
+                        self._read_index = index
+                        self._resync = False
+                        break
+                else:
+                    return 0
+            word = ring[self._read_index]
+            if word:
+                ring[self._read_index] = 0
+                self._read_index = (self._read_index + 1) % len(ring)
+            return word
+        if self._read_index == self._fill:
+            waiting = min(self.sm.in_waiting, len(ring))
+            if not waiting:
+                return 0
+            self.sm.readinto(ring, end=waiting)
+            self._read_index = 0
+            self._fill = waiting
+        word = ring[self._read_index]
+        self._read_index += 1
+        return word
+
+    def _rebase(self, now):
+        # Keep the anchor recent so the 24-bit counter cannot be ambiguous;
+        # returns ms since the anchor. Normally one step at a time, so the
+        # products stay small ints.
+        since_anchor = ticks_diff(now, self._anchor_ms)
+        if since_anchor > 2 * _REBASE_MS:
+            steps = since_anchor // _REBASE_MS - 1
+            self._anchor_ms = (self._anchor_ms + steps * _REBASE_MS) & _TICKS_MAX
+            self._anchor_count = (self._anchor_count + steps * _REBASE_COUNTS) & _COUNTER_MASK
+            self._anchor_us = (self._anchor_us + steps * _REBASE_MS * 1000) & _TICKS_MAX
+            since_anchor -= steps * _REBASE_MS
+        return since_anchor
+
+    def _stamp(self, word):
+        # Turn the counter in a word into ms ticks and us timestamps
+        since_anchor = self._rebase(supervisor.ticks_ms())
+        count = (_COUNTER_MASK - (word & _COUNTER_MASK) - self._anchor_count) & _COUNTER_MASK
+        # The edge happened before now (2 ms of slack for the ms clock)
+        limit = (since_anchor + 2) * 5000 // 7
+        count = limit - ((limit - count) & _COUNTER_MASK)
+        micros = count * 7 // 5
+        event = self.event
+        event.timestamp_us = (self._anchor_us + micros) & _TICKS_MAX
+        event.timestamp = (self._anchor_ms + micros // 1000) & _TICKS_MAX
+
+    def next_event(self):
+        """
+        Return the next press/release event, or None if there is none.
+        The returned event object is reused by the next call.
+        """
+        while not self._changed:
+            word = self._next_word()
+            if not word:
+                return None
+            levels = (word >> _PIN_SHIFT) & self._released
+            self._changed = levels ^ self._levels
+            self._levels = levels
+            self._word = word
+        # Report simultaneous changes one button at a time
+        changed = self._changed
+        index = 0
+        while not changed & (1 << index):
+            index += 1
+        self._changed = changed & ~(1 << index)
+        event = self.event
+        event.key_number = index
+        event.pressed = not (self._levels >> index) & 1
+        self._stamp(self._word)
+        return event
+
+    def check_overflow(self):
+        """
+        Return True if edges were lost: the DMA ring filled up, or without
+        DMA the RX FIFO overflowed. Call on every scan pass; it also keeps
+        the timestamp anchor recent while no edges arrive.
+        """
+        self._rebase(supervisor.ticks_ms())
+        if self._dma:
+            ring = self.ring
+            # The reader clears every slot it reads, so a word in the slot
+            # before the read position means the writer has gone all the
+            # way round and is overwriting unread words
+            if not ring[self._read_index - 1]:
+                return False
+            for index in range(len(ring)):
+                ring[index] = 0
+            self._resync = True
+            return True
+        if self.sm.rxstall:
+            self.sm.clear_rxfifo()
+            return True
+        return False
+
+    def deinit(self):
+        """Stop the state machine and release the pins."""
+        self.sm.deinit()
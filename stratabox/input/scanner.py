@@ -0,0 +1,128 @@
+"""
+StrataBox Input Scanner
+Background button scanning built on CircuitPython's keypad module.
+The pins are scanned in the background and every press and release is
+queued with a timestamp, so the main loop never reads the pins itself.
+"""
+
+import time
+import keypad
+import supervisor
+
+# keypad timestamps come from supervisor.ticks_ms(), which wraps at 2**29
+_TICKS_PERIOD = 1 << 29
+_TICKS_MAX = _TICKS_PERIOD - 1
+_TICKS_HALFPERIOD = _TICKS_PERIOD // 2
+
+
+def ticks_diff(end, start):
+    """
+    Return the signed difference in milliseconds between two ticks values,
+    taking the 2**29 wraparound into account.
+    """
+    diff = (end - start) & _TICKS_MAX
+    return ((diff + _TICKS_HALFPERIOD) & _TICKS_MAX) - _TICKS_HALFPERIOD
+
+
+class KeyScanner:
+    """
+    Scan the StrataBox buttons in the background with keypad.Keys.
+
+    Args:
+        pins: Button pins in button number order (ButtonTable.pins)
+        interval: Seconds between background scans of the pins
+        max_events: Size of the timestamped event queue
+    """
+
+    name = "keypad"
+
+    def __init__(self, pins, interval=0.005, max_events=64):
+        # Buttons are wired active-low with the internal pull-ups enabled
+        self.keys = keypad.Keys(
+            pins,
+            value_when_pressed=False,
+            pull=True,
+            interval=interval,
+            max_events=max_events,
+        )
+        self.key_count = len(pins)
+        # Reused for every event so reading the queue does not allocate
+        self.event = keypad.Event()
+
+    def next_event(self):
+        """
+        Return the next queued press/release event, or None if the queue is empty.
+        The returned event object is reused by the next call.
+        """
+        if self.keys.events.get_into(self.event):
+            return self.event
+        return None
+
+    def sample_held(self, settle_ms, max_ms):
+        """
+        Return a bitmask of the buttons held at startup, with bit N set for
+        key number N. Buttons held since power-up are reported as presses
+        by the first scans, so the queue is sampled until no event has
+        arrived for settle_ms, or max_ms has passed.
+        """
+        start = supervisor.ticks_ms()
+        last_change = start
+        mask = 0
+        while True:
+            event = self.next_event()
+            now = supervisor.ticks_ms()
+            if event:
+                if event.pressed:
+                    mask |= 1 << event.key_number
+                else:
+                    mask &= ~(1 << event.key_number)
+                last_change = now
+            elif ticks_diff(now, last_change) >= settle_ms or ticks_diff(now, start) >= max_ms:
+                return mask
+            else:
+                time.sleep(0.001)
+
+    def check_overflow(self):
+        """Return True (and clear the flag) if events were dropped from a full queue."""
+        if self.keys.events.overflowed:
+            self.keys.events.overflowed = False
+            return True
+        return False
+
+    def deinit(self):
+        """Stop scanning and release the pins."""
+        self.keys.deinit()
+
+
+def make_scanner(buttons, backend="keypad", interval=0.005, wiring=None):
+    """
+    Return the scanner for the input backend selected in config.py.
+
+    "keypad" scans one pin per button in the background with keypad.Keys.
+    "pio" timestamps edges in a PIO state machine
+    (stratabox.input.pio_scanner); it needs rp2pio and contiguous pins,
+    and falls back to keypad without them. "matrix" and "shift" scan a
+    key matrix or a shift register chain described by `wiring`
+    (stratabox.input.matrix). Check the name attribute of the result for
+    the backend in use.
+
+    Args:
+        buttons: ButtonTable of the buttons to scan
+        backend: INPUT_BACKEND from config.py
+        interval: Seconds between background scans of the pins
+        wiring: INPUT_WIRING from config.py, for "matrix" and "shift"
+    """
+    if backend in ("matrix", "shift"):
+        from stratabox.input.matrix import MatrixScanner, ShiftRegisterScanner
+
+        scanner_class = MatrixScanner if backend == "matrix" else ShiftRegisterScanner
+        return scanner_class(buttons.key_numbers, wiring or {}, interval=interval)
+    if None in buttons.pins:
+        raise ValueError(f'INPUT_BACKEND "{backend}" needs a PIN_CONFIG pin for every button')
+    if backend == "pio":
+        try:
+            from stratabox.input.pio_scanner import PioScanner
+            return PioScanner(buttons.pins)
+        except (ImportError, ValueError, RuntimeError) as e:
+            print(f"PIO scanning not available ({e}), using keypad")
+    return KeyScanner(buttons.pins, interval=interval)
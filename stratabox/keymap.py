@@ -0,0 +1,90 @@
+"""
+StrataBox Keymap
+The button -> keycode lookup table used by code.py, with a set of
+keymap profiles built once at boot. Switching profiles or remapping a
+key fills a spare table and swaps it in with a single assignment, so the
+scan loop always sees either the old or the new table, never a mix, and
+nothing is allocated after construction.
+"""
+
+from stratabox.input.buttons import BUTTON_NAMES, MENU
+
+# Built-in profiles; KEY_PROFILES from config.py are numbered after these
+PROFILE_DEFAULT = 0   # KEY_CONFIG
+PROFILE_PRACTICE = 1  # KEY_CONFIG with MENU sending R
+
+# Keycode.R, sent by the MENU button in practice mode
+PRACTICE_MENU_KEY = 0x15
+
+
+def build_profiles(keycodes, key_profiles=(), names=BUTTON_NAMES):
+    """
+    Build every keymap profile as a bytearray indexed by button number.
+
+    Args:
+        keycodes: Keycodes of the default profile (ButtonTable.keycodes)
+        key_profiles: KEY_PROFILES from config.py, a sequence of
+            (name, {"UP_KEY": keycode, ...}) listing only the keys that
+            differ from the default profile
+        names: Button names in button number order (ButtonTable.names)
+
+    Returns:
+        (names, tables) tuples in profile number order
+    """
+    practice = bytearray(keycodes)
+    practice[MENU] = PRACTICE_MENU_KEY
+    profile_names = ["default", "practice"]
+    tables = [bytearray(keycodes), practice]
+    for name, overrides in key_profiles:
+        table = bytearray(keycodes)
+        for index, button in enumerate(names):
+            table[index] = overrides.get(button + "_KEY", table[index])
+        profile_names.append(name)
+        tables.append(table)
+    return tuple(profile_names), tuple(tables)
+
+
+class Keymap:
+    """
+    Active button -> keycode table with runtime profile switching.
+
+    Read keycodes from keymap.active[button]; the attribute is replaced,
+    not edited, on every change.
+
+    Args:
+        names: Profile names from build_profiles()
+        tables: Profile tables from build_profiles()
+    """
+
+    def __init__(self, names, tables):
+        self.names = names
+        self.tables = tables
+        self.profile = PROFILE_DEFAULT
+        self.active = bytearray(tables[PROFILE_DEFAULT])
+        self._spare = bytearray(len(self.active))
+
+    def _swap(self):
+        active = self.active
+        self.active = self._spare
+        self._spare = active
+
+    def select(self, profile):
+        """Switch to a profile. Returns False if there is no such profile."""
+        if not 0 <= profile < len(self.tables):
+            return False
+        self._spare[:] = self.tables[profile]
+        self._swap()
+        self.profile = profile
+        return True
+
+    def remap(self, index, keycode):
+        """
+        Change the keycode of one button in the active table until the
+        next profile switch. Returns False for an unknown button.
+        """
+        if not 0 <= index < len(self.active):
+            return False
+        self._spare[:] = self.active
+        self._spare[index] = keycode
+        self._swap()
+        return True
@@ -0,0 +1,83 @@
+"""
+StrataBox Memory
+Garbage collection scheduling. MicroPython collects when an allocation
+finds the heap full, which can be in the middle of a press and stall the
+scan loop for milliseconds. In "idle" mode the heap is collected in the
+quiet time after input instead, once enough has been allocated, so the
+heap is rarely full when input comes. MicroPython's own collection when
+an allocation fails is left as it is (gc.threshold() is not set: an
+allocation threshold would only trigger automatic collections earlier).
+
+Every collection is timed, and automatic collections are noticed from
+the free heap growing without one of ours, so GC pauses show up in the
+statistics (LatencyStats.gc_*).
+"""
+
+import gc
+import time
+
+# A free heap this much larger than last time means the VM collected
+_AUTO_GC_BYTES = 1024
+
+
+class GcScheduler:
+    """
+    Collect garbage in idle windows and keep GC statistics.
+
+    Args:
+        stats: LatencyStats the collections are recorded in
+        mode: "idle" to collect in idle windows, "auto" to leave collection
+            to MicroPython and only record statistics
+        idle_ms: Quiet time after the last button event before collecting
+        min_alloc: Bytes allocated since the last collection before an
+            idle window is used for another one
+    """
+
+    def __init__(self, stats, mode="idle", idle_ms=50, min_alloc=4096):
+        if mode not in ("idle", "auto"):
+            raise ValueError(f"Unknown GC mode: {mode}")
+        self.stats = stats
+        self.scheduled = mode == "idle"
+        self.idle_ms = idle_ms
+        self.min_alloc = min_alloc
+        self.last_free = gc.mem_free()
+        self.collected_alloc = gc.mem_alloc()
+
+    def collect(self):
+        """Collect now and record the pause. Returns the pause in us."""
+        self.sample()
+        start = time.monotonic_ns()
+        gc.collect()
+        pause_us = (time.monotonic_ns() - start) // 1000
+        free = gc.mem_free()
+        self.last_free = free
+        self.collected_alloc = gc.mem_alloc()
+        self.stats.gc_collected(pause_us, free)
+        return pause_us
+
+    def sample(self):
+        """Track the lowest free heap and notice automatic collections."""
+        free = gc.mem_free()
+        if free > self.last_free + _AUTO_GC_BYTES:
+            self.stats.gc_auto()
+            self.collected_alloc = gc.mem_alloc()
+        self.last_free = free
+        self.stats.gc_free(free)
+
+    def idle(self, idle_ms):
+        """
+        Call regularly while no input is pending, with the time since the
+        last button event. Collects if the window is long enough and
+        enough has been allocated since the last collection.
+
+        Returns:
+            The pause in microseconds, or -1 if nothing was collected
+        """
+        self.sample()
+        if (
+            self.scheduled
+            and idle_ms >= self.idle_ms
+            and gc.mem_alloc() - self.collected_alloc >= self.min_alloc
+        ):
+            return self.collect()
+        return -1
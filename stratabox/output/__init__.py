@@ -0,0 +1,6 @@
+"""
+StrataBox Output
+HID keyboard reports (hid_report), the held-key state that drives them
+(keystate) and the non-blocking status LED driver (led). Import the
+submodules directly.
+"""
@@ -0,0 +1,159 @@
+"""
+StrataBox HID Report Writer
+Sends keyboard reports straight to the HID device defined in boot.py.
+One preallocated report is updated in place, so pressing, releasing and
+sending keys does not allocate. Both keyboard formats from boot.py are
+supported: the 8-byte boot keyboard (6KRO) and the NKRO bitmap.
+"""
+
+# Report layout from the descriptor in boot.py:
+# byte 0 modifier bits, byte 1 reserved, bytes 2-7 key slots
+REPORT_LENGTH = 8
+_FIRST_SLOT = 2
+_MODIFIER_FIRST = 0xE0
+_MODIFIER_LAST = 0xE7
+
+# NKRO report from boot.py: byte 0 modifier bits, then one bit per usage
+NKRO_REPORT_LENGTH = 14
+NKRO_MAX_KEYCODE = 0x67
+
+
+def find_keyboard_device(devices):
+    """
+    Return the keyboard device (usage page 0x01, usage 0x06) from usb_hid.devices.
+    Unlike adafruit_hid this does not wait for USB, so scanning can start
+    while the host is still enumerating.
+    """
+    for device in devices:
+        if device.usage_page == 0x01 and device.usage == 0x06:
+            return device
+    raise ValueError("Could not find matching HID device.")
+
+
+class RawKeyboard:
+    """
+    Zero-allocation 6-key rollover keyboard report.
+
+    press() and release() only edit the report; nothing reaches the host
+    until send() is called.
+
+    Args:
+        devices: usb_hid.devices
+    """
+
+    def __init__(self, devices):
+        self.device = find_keyboard_device(devices)
+        self.report = bytearray(REPORT_LENGTH)
+
+    def press(self, keycode):
+        """
+        Add a keycode to the report.
+        Returns False if all six key slots are already in use.
+        """
+        report = self.report
+        if _MODIFIER_FIRST <= keycode <= _MODIFIER_LAST:
+            report[0] |= 1 << (keycode - _MODIFIER_FIRST)
+            return True
+        for i in range(_FIRST_SLOT, REPORT_LENGTH):
+            slot = report[i]
+            if slot == keycode:
+                return True
+            if slot == 0:
+                report[i] = keycode
+                return True
+        return False
+
+    def release(self, keycode):
+        """Remove a keycode from the report, keeping the used slots packed."""
+        report = self.report
+        if _MODIFIER_FIRST <= keycode <= _MODIFIER_LAST:
+            report[0] &= ~(1 << (keycode - _MODIFIER_FIRST))
+            return
+        for i in range(_FIRST_SLOT, REPORT_LENGTH):
+            if report[i] == keycode:
+                # Shift the following slots down over the released key
+                for j in range(i, REPORT_LENGTH - 1):
+                    report[j] = report[j + 1]
+                report[REPORT_LENGTH - 1] = 0
+                return
+
+    def release_all(self):
+        """Clear every key and modifier in the report."""
+        for i in range(REPORT_LENGTH):
+            self.report[i] = 0
+
+    def send(self):
+        """Send the current report to the host."""
+        self.device.send_report(self.report)
+
+
+class NkroKeyboard:
+    """
+    Zero-allocation N-key rollover bitmap report, matching the NKRO
+    descriptor in boot.py. Every press or release is a single bit flip,
+    so any number of keys can change in one report.
+
+    Args:
+        devices: usb_hid.devices
+    """
+
+    def __init__(self, devices):
+        self.device = find_keyboard_device(devices)
+        self.report = bytearray(NKRO_REPORT_LENGTH)
+
+    def press(self, keycode):
+        """
+        Set the bit for a keycode.
+        Returns False for keycodes outside the bitmap.
+        """
+        if _MODIFIER_FIRST <= keycode <= _MODIFIER_LAST:
+            self.report[0] |= 1 << (keycode - _MODIFIER_FIRST)
+            return True
+        if keycode > NKRO_MAX_KEYCODE:
+            return False
+        self.report[1 + (keycode >> 3)] |= 1 << (keycode & 7)
+        return True
+
+    def release(self, keycode):
+        """Clear the bit for a keycode."""
+        if _MODIFIER_FIRST <= keycode <= _MODIFIER_LAST:
+            self.report[0] &= ~(1 << (keycode - _MODIFIER_FIRST))
+        elif keycode <= NKRO_MAX_KEYCODE:
+            self.report[1 + (keycode >> 3)] &= ~(1 << (keycode & 7))
+
+    def release_all(self):
+        """Clear every key and modifier in the report."""
+        for i in range(NKRO_REPORT_LENGTH):
+            self.report[i] = 0
+
+    def send(self):
+        """Send the current report to the host."""
+        self.device.send_report(self.report)
+
+
+def make_keyboard(devices, mode="6kro"):
+    """
+    Return the report writer for the keyboard format selected in config.py.
+    Nothing is sent, so this does not wait for USB; an NKRO writer is
+    confirmed by check_keyboard() once the host is connected.
+    """
+    if mode == "nkro":
+        return NkroKeyboard(devices)
+    return RawKeyboard(devices)
+
+
+def check_keyboard(keyboard, devices):
+    """
+    Return the writer matching the keyboard boot.py actually enabled.
+    Call once USB is connected, before the first report is sent.
+
+    An NKRO writer sends its current report: if the device expects the
+    8-byte boot report instead (boot.py fell back to it), the 6KRO writer
+    is returned. Raises OSError like send() if the host is not polling.
+    """
+    if isinstance(keyboard, NkroKeyboard):
+        try:
+            keyboard.send()
+        except ValueError:
+            return RawKeyboard(devices)
+    return keyboard
@@ -0,0 +1,115 @@
+"""
+StrataBox Key State
+Level-tracking key state engine. Keys are held for as long as their
+buttons are held, and a HID report is only sent when the set of held
+keys changes.
+"""
+
+# Changes collected before a report is forced out
+_MAX_PENDING = 16
+
+
+class KeyState:
+    """
+    Track the set of held keycodes and send keyboard reports on change.
+
+    Changes are collected until flush() is called, so everything that
+    changed in the same scan goes out in one report. A key that is pressed
+    and released again before the next flush is never lost: the pending
+    report is sent first, as long as the host is taking reports (`live`).
+    Otherwise only the latest state is kept for the next flush. Nothing is
+    allocated after construction.
+
+    Args:
+        writer: The RawKeyboard or NkroKeyboard report writer
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        # Number of sources (buttons, macros) holding each keycode
+        self._counts = bytearray(256)
+        # Keycodes changed since the last report, with a flag per keycode
+        self._changed = bytearray(256)
+        self._pending = bytearray(_MAX_PENDING)
+        self._pending_count = 0
+        # Reports sent so far, so tasks can wait for a change to go out
+        self.reports = 0
+        # False while the host cannot take reports (not connected yet):
+        # changes are then only collected, never sent from key_down/key_up
+        self.live = True
+
+    def key_down(self, keycode):
+        """Mark a keycode as held by one more source."""
+        self._counts[keycode] += 1
+        if self._counts[keycode] == 1:
+            self._change(keycode)
+            self.writer.press(keycode)
+
+    def key_up(self, keycode):
+        """Mark a keycode as released by one source."""
+        if not self._counts[keycode]:
+            return
+        self._counts[keycode] -= 1
+        if not self._counts[keycode]:
+            self._change(keycode)
+            self.writer.release(keycode)
+
+    def _change(self, keycode):
+        if self._changed[keycode] or self._pending_count == _MAX_PENDING:
+            # Key changed back before it was reported: report the first change
+            sent = False
+            if self.live:
+                try:
+                    sent = self.flush()
+                except OSError:
+                    pass  # host suspended or not polling
+            if not sent:
+                # The first change is lost; the latest state stays pending
+                self._clear_pending()
+        self._changed[keycode] = 1
+        self._pending[self._pending_count] = keycode
+        self._pending_count += 1
+
+    def replace_writer(self, writer):
+        """Move the held keys to another report writer, e.g. after check_keyboard()."""
+        writer.release_all()
+        for keycode in range(256):
+            if self._counts[keycode]:
+                writer.press(keycode)
+        self.writer = writer
+
+    def is_held(self, keycode):
+        """Return True if any source is holding the keycode."""
+        return self._counts[keycode] != 0
+
+    @property
+    def dirty(self):
+        """True if there are changes that have not been reported yet."""
+        return self._pending_count != 0
+
+    def flush(self):
+        """
+        Report pending changes to the host in a single report.
+        Returns True if anything was sent.
+        """
+        if not self._pending_count:
+            return False
+        self.writer.send()
+        self.reports += 1
+        self._clear_pending()
+        return True
+
+    def _clear_pending(self):
+        for i in range(self._pending_count):
+            self._changed[self._pending[i]] = 0
+        self._pending_count = 0
+
+    def release_all(self):
+        """Release every held key and report it immediately."""
+        for keycode in range(256):
+            self._counts[keycode] = 0
+            self._changed[keycode] = 0
+        self._pending_count = 0
+        self.writer.release_all()
+        self.writer.send()
+        self.reports += 1
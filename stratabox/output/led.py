@@ -0,0 +1,168 @@
+"""
+StrataBox LED
+Status LED driver. The LED pin is claimed once, by LedDriver, and every
+blink (startup patterns, per-press flashes, blink codes, stratagem
+practice patterns) is played from a compiled timing table by tick(),
+which only compares the clock and sets the pin. Nothing sleeps, so LED
+feedback never holds up button scanning.
+
+A pattern is an array of alternating on and off times in ms, starting
+with on. Build patterns once with compile_pattern(), blink_code() or
+stratagem_pattern() and play them as often as needed.
+"""
+
+import time
+from array import array
+import board
+import digitalio
+import supervisor
+from stratabox.input.scanner import ticks_diff
+
+# Blinks that stand for each direction in a stratagem practice pattern
+DIRECTION_BLINKS = {"UP": 1, "DOWN": 2, "LEFT": 3, "RIGHT": 4}
+
+
+def compile_pattern(durations):
+    """
+    Build a timing table from alternating on/off times in ms, starting
+    with on. Raises ValueError for an empty pattern or a time outside
+    1-65535 ms.
+    """
+    if not durations:
+        raise ValueError("LED pattern is empty")
+    for duration in durations:
+        if not 0 < duration <= 0xFFFF:
+            raise ValueError(f"LED pattern time out of range: {duration} ms")
+    return array("H", durations)
+
+
+def blink_code(count, on_ms=100, off_ms=100, gap_ms=0):
+    """
+    Build a pattern of `count` equal blinks, followed by `gap_ms` more off
+    time. Raises ValueError if count is less than 1.
+    """
+    if count < 1:
+        raise ValueError(f"Blink count must be at least 1: {count}")
+    durations = [on_ms, off_ms] * count
+    durations[-1] += gap_ms
+    return compile_pattern(durations)
+
+
+def stratagem_pattern(directions, on_ms=150, off_ms=150, gap_ms=600):
+    """
+    Build a practice pattern for a stratagem: every direction ("UP",
+    "DOWN", "LEFT", "RIGHT") is a group of DIRECTION_BLINKS blinks, and
+    the groups are separated by `gap_ms`.
+    """
+    durations = []
+    for direction in directions:
+        if direction not in DIRECTION_BLINKS:
+            raise ValueError(f"Unknown stratagem direction: {direction}")
+        durations.extend((on_ms, off_ms) * DIRECTION_BLINKS[direction])
+        durations[-1] += gap_ms
+    return compile_pattern(durations)
+
+
+# boot.py's short-long-short startup pattern
+STARTUP_PATTERN = compile_pattern((100, 100, 100, 100, 100, 400, 500, 200, 100, 100, 100, 100, 100, 100))
+# Played by code.py once it is running when boot.py played the startup pattern
+READY_PATTERN = blink_code(3)
+# Acknowledges a button press
+FLASH_PATTERN = compile_pattern((100,))
+
+
+class LedDriver:
+    """
+    Own the status LED and play patterns on it without blocking.
+
+    Outside a pattern the LED shows the level set with hold(), e.g. on
+    while a button is held. A pattern overrides that level until it ends.
+    Nothing is allocated after construction.
+
+    Args:
+        pin: LED pin, board.LED by default
+        enabled: False leaves the pin alone and never lights the LED
+            (LED_ENABLED in config.py)
+    """
+
+    def __init__(self, pin=None, enabled=True):
+        self._led = None
+        if enabled:
+            self._led = digitalio.DigitalInOut(board.LED if pin is None else pin)
+            self._led.direction = digitalio.Direction.OUTPUT
+        self.value = False
+        self.level = False      # shown while no pattern is playing
+        self.pattern = None
+        self._step = 0
+        self._step_at = 0       # supervisor.ticks_ms() when the step began
+        self._repeats = 0
+
+    def _set(self, value):
+        if value != self.value:
+            self.value = value
+            if self._led is not None:
+                self._led.value = value
+
+    def play(self, pattern, repeat=1):
+        """Start a pattern now, `repeat` times in a row (0 repeats until stopped)."""
+        self.pattern = pattern
+        self._step = 0
+        self._step_at = supervisor.ticks_ms()
+        self._repeats = repeat
+        self._set(True)
+
+    def stop(self):
+        """End the pattern early and go back to the held level."""
+        self.pattern = None
+        self._set(self.level)
+
+    def hold(self, value):
+        """Set the level shown while no pattern is playing."""
+        self.level = value
+        if self.pattern is None:
+            self._set(value)
+
+    def tick(self, now):
+        """
+        Advance the pattern to `now` (supervisor.ticks_ms()). Steps are
+        timed from when the previous one was due, so a late tick shortens
+        the next step instead of stretching the whole pattern.
+
+        Returns:
+            ms until the LED next changes, or -1 if no pattern is playing
+        """
+        pattern = self.pattern
+        if pattern is None:
+            return -1
+        elapsed = ticks_diff(now, self._step_at)
+        step = self._step
+        if elapsed < pattern[step]:
+            return pattern[step] - elapsed
+        while elapsed >= pattern[step]:
+            elapsed -= pattern[step]
+            step += 1
+            if step == len(pattern):
+                if self._repeats == 1:
+                    self.stop()
+                    return -1
+                if self._repeats:
+                    self._repeats -= 1
+                step = 0
+        self._step = step
+        self._step_at = now - elapsed
+        # Even steps are on times, odd steps off times
+        self._set(not step & 1)
+        return pattern[step] - elapsed
+
+    def wait(self):
+        """Play the rest of the pattern, blocking. For scripts with nothing to scan."""
+        remaining_ms = self.tick(supervisor.ticks_ms())
+        while remaining_ms >= 0:
+            time.sleep(remaining_ms / 1000)
+            remaining_ms = self.tick(supervisor.ticks_ms())
+
+    def deinit(self):
+        """Release the pin, e.g. at the end of boot.py so code.py can claim it."""
+        if self._led is not None:
+            self._led.deinit()
+            self._led = None
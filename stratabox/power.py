@@ -0,0 +1,83 @@
+"""
+StrataBox Power
+Adaptive pacing of the scan loop. The loop runs at full rate for a while
+after every button event, then sleeps longer and longer between scans
+while nothing happens. After a long idle period the controller goes into
+alarm light sleep until a button pin goes low.
+
+The background scanner keeps timestamping edges while the loop is slow,
+so backing off only delays when a press is handled, it never loses one.
+"""
+
+import time
+
+# Scan modes, also used to index the wake latency histograms
+MODE_ACTIVE = 0  # full scan rate after recent activity
+MODE_IDLE = 1    # backing off while idle
+MODE_SLEEP = 2   # idle long enough for light sleep
+MODE_NAMES = ("active", "idle", "sleep")
+
+
+class ScanPacer:
+    """
+    Pick the scan loop sleep from the time since the last button event.
+
+    The interval starts at `fast`, doubles after every further
+    `active_ms` without activity and stops at `slow`. The intervals are
+    built once, so interval() does not allocate.
+
+    Args:
+        fast: Loop sleep in seconds while active (LOOP_INTERVAL)
+        slow: Longest loop sleep in seconds while idle
+        active_ms: Time at full rate after activity, and between back-off steps
+        sleep_ms: Idle time before light sleep is due; 0 never sleeps
+    """
+
+    def __init__(self, fast=0.001, slow=0.02, active_ms=2000, sleep_ms=0):
+        steps = []
+        interval = fast
+        while interval < slow:
+            steps.append(interval)
+            interval *= 2
+        steps.append(slow)
+        self.steps = tuple(steps)
+        self.active_ms = max(1, active_ms)
+        self.sleep_ms = sleep_ms
+        self.mode = MODE_ACTIVE
+
+    def interval(self, idle_ms):
+        """Return the loop sleep in seconds and update mode for idle_ms without activity."""
+        if idle_ms < self.active_ms:
+            self.mode = MODE_ACTIVE
+            return self.steps[0]
+        if self.sleep_ms and idle_ms >= self.sleep_ms:
+            self.mode = MODE_SLEEP
+        else:
+            self.mode = MODE_IDLE
+        step = idle_ms // self.active_ms
+        if step >= len(self.steps):
+            step = len(self.steps) - 1
+        return self.steps[step]
+
+
+def sleep_until_press(pins):
+    """
+    Light sleep until one of the button pins is pulled low.
+
+    The pins must not be in use, so stop the scanner first. Raises
+    ImportError when the board has no alarm module.
+
+    Returns:
+        (button number that woke the controller or -1, time.monotonic_ns()
+        right after waking)
+    """
+    import alarm
+
+    alarms = [alarm.pin.PinAlarm(pin, value=False, pull=True) for pin in pins]
+    woke = alarm.light_sleep_until_alarms(*alarms)
+    woke_ns = time.monotonic_ns()
+    woke_pin = getattr(woke, "pin", None)
+    for index, pin in enumerate(pins):
+        if pin is woke_pin:
+            return index, woke_ns
+    return -1, woke_ns
@@ -0,0 +1,137 @@
+"""
+StrataBox Runtime Helpers
+Small building blocks for the asyncio firmware in code.py, such as the
+preallocated queue used to pass work between tasks and the task that
+plays queued key sequences.
+"""
+
+import asyncio
+import time
+import supervisor
+from stratabox.diagnostics.latency import stats
+from stratabox.diagnostics.ringlog import LOG_MACRO_DONE
+
+
+class RingQueue:
+    """
+    Fixed-size FIFO queue shared between asyncio tasks.
+    Nothing is allocated after construction; put() fails instead of
+    growing when the queue is full.
+
+    Args:
+        size: Maximum number of queued items
+    """
+
+    def __init__(self, size):
+        self._items = [None] * size
+        self._head = 0
+        self._count = 0
+        self.event = asyncio.Event()
+
+    def __len__(self):
+        return self._count
+
+    def put(self, item):
+        """Queue an item and wake the consumer. Returns False if the queue is full."""
+        size = len(self._items)
+        if self._count == size:
+            return False
+        self._items[(self._head + self._count) % size] = item
+        self._count += 1
+        self.event.set()
+        return True
+
+    def get_nowait(self):
+        """Return the oldest item, or None if the queue is empty."""
+        if not self._count:
+            return None
+        item = self._items[self._head]
+        self._items[self._head] = None
+        self._head = (self._head + 1) % len(self._items)
+        self._count -= 1
+        return item
+
+    async def get(self):
+        """Wait for an item and return it."""
+        while not self._count:
+            self.event.clear()
+            await self.event.wait()
+        return self.get_nowait()
+
+
+# A report not sent within this time is counted as stalled and retried
+REPORT_STALL_NS = 50_000_000
+
+
+async def wait_reported(key_state, hid_pending, reports):
+    """
+    Wait until key_state has sent a report after its `reports` count,
+    which carries every change made before the call.
+
+    USB HID reports are picked up by the host once per poll interval, and
+    send_report waits for the previous report to be picked up, so a sent
+    report is as far as the firmware can follow a change. A report not
+    sent within REPORT_STALL_NS is nudged again (the HID task retries
+    failed sends) and counted.
+
+    Returns:
+        The number of times the report stalled
+    """
+    stalls = 0
+    start = time.monotonic_ns()
+    while key_state.reports == reports:
+        if time.monotonic_ns() - start < REPORT_STALL_NS:
+            await asyncio.sleep(0)
+            continue
+        stalls += 1
+        start = time.monotonic_ns()
+        hid_pending.set()
+        await asyncio.sleep(0.01)
+    return stalls
+
+
+async def play_sequences(queue, key_state, hid_pending, interval=0.001, log=None):
+    """
+    Play keycode sequences from a RingQueue without blocking the scan loop.
+
+    Each press and release goes out in its own report, as soon as the
+    previous one has been sent and at least `interval` after it, so a
+    sequence takes a couple of USB poll intervals per key instead of a
+    fixed delay and no key is merged away when the host is slow.
+
+    Args:
+        queue: RingQueue of keycode sequences
+        key_state: KeyState the keys are pressed on
+        hid_pending: Event set whenever key_state has changes to report
+        interval: Shortest time between two reports in seconds; the host's
+            USB poll interval
+        log: RingLog that gets a LOG_MACRO_DONE record per sequence
+    """
+    interval_ns = int(interval * 1_000_000_000)
+    while True:
+        sequence = await queue.get()
+        start = time.monotonic_ns()
+        # The key that triggered the sequence is reported first
+        stalls = 0
+        if key_state.dirty:
+            stalls += await wait_reported(key_state, hid_pending, key_state.reports)
+        sent_ns = time.monotonic_ns()
+        for key in sequence:
+            for pressed in (True, False):
+                wait_ns = interval_ns - (time.monotonic_ns() - sent_ns)
+                if wait_ns > 0:
+                    await asyncio.sleep(wait_ns / 1_000_000_000)
+                reports = key_state.reports
+                if pressed:
+                    key_state.key_down(key)
+                else:
+                    key_state.key_up(key)
+                # Nothing to report if a button already holds the key
+                if key_state.dirty:
+                    hid_pending.set()
+                    stalls += await wait_reported(key_state, hid_pending, reports)
+                    sent_ns = time.monotonic_ns()
+        duration_us = (sent_ns - start) // 1000
+        stats.sequence_played(duration_us)
+        if log is not None:
+            log.log(LOG_MACRO_DONE, min(stalls, 255), supervisor.ticks_ms(), duration_us)